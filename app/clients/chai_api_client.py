@@ -1,17 +1,92 @@
 import httpx
 import logging
+import orjson
 import asyncio
-from typing import List, Optional, Dict, Any
-from app.clients.schemas.chai_schemas import ChatMessage, CHAIAPIRequest
+import contextlib
+import importlib.util
+import time
+from typing import AsyncIterator, List, Optional, Dict, Any, Sequence
+from app.clients.schemas.chai_schemas import CallSite
+from app.clients.rate_limiter import AdaptiveRateLimiter, get_shared_rate_limiter, parse_retry_after
+from app.clients.single_flight import SingleFlight
+from app.clients.streaming import ModelOutputDecoder, StopSequenceScanner, WhitespaceTrimmer
+from app.clients.response_cache import CachePolicy, ResponseCache, canonical_request_key
+from app.clients.hedging import RequestHedger
+from app.clients.circuit_breaker import CircuitBreaker
+from app.clients.completion_backend import CompletionBackend
+from app.clients.scheduler import FairScheduler, priority_for
 from app.utils.env_validator import validate_chai_api_key
+from app.utils.structured_logging import truncate_for_log
+from app.utils.deadline import Deadline, DeadlineExceededError, cap_timeout
+from app.utils.metrics import CHAI_STOP_SEQUENCE_CUTS_TOTAL, CHAI_LLM_DURATION_SECONDS, CHAI_RESPONSE_SIZE_BYTES, CHAI_RETRIES_TOTAL, CHAI_THROTTLED_TOTAL
 
 logger = logging.getLogger(__name__)
 
-class CHAIAPIClient:
-    
-    def __init__(self, max_retries=3, initial_backoff=1, backoff_factor=2):
+DEFAULT_CHAI_API_URL = "http://guanaco-submitter.guanaco-backend.k2.chaiverse.com/endpoints/onsite/chat"
+
+class CHAIAPIClient(CompletionBackend):
+    """
+    Async client for the CHAI chat completion endpoint; the CompletionBackend used in production.
+
+    The client owns a single pooled httpx.AsyncClient which is reused by every call,
+    so connections (and their TCP/DNS setup cost) are kept alive between LLM invocations.
+    Call start() when the app starts and aclose() when it shuts down; if start() was never
+    called the pool is created lazily on the first request.
+
+    Every upstream attempt first acquires a token from an AdaptiveRateLimiter (the process-wide
+    one unless another is given), which backs off on 429s and speeds up again on success.
+
+    If a RequestHedger is given, invoke_llm attempts that run slower than usual for their call
+    site are raced against a second identical request.
+
+    Each upstream URL has a CircuitBreaker: after repeated 5xx responses, timeouts or connection
+    errors, calls fail fast with CircuitOpenError until a trial call succeeds. Callers may pass a
+    Deadline, which caps rate limiting waits, retry backoff and the per-attempt HTTP timeout;
+    DeadlineExceededError is raised when it runs out.
+
+    If a ResponseCache is given, invoke_llm answers repeated identical requests from it for
+    call sites that have a caching policy.
+
+    Concurrent invoke_llm calls for the same canonical request are coalesced into a single
+    upstream call (single-flight): every caller awaits the same shared task, errors reach all
+    of them, and cancelling one caller does not cancel the call for the others.
+
+    Call sites may pass stop sequences to invoke_llm; the response is cut before the first one.
+    If the endpoint supports a "stop" parameter (upstream_stop_sequences) they are sent with the
+    request. Otherwise the full response is fetched (with retries and hedging, like any other
+    call) and cut client-side. That cut only cleans up the output: CHAI sends the body in one
+    piece once generation has finished, so neither cutting nor reading it incrementally makes
+    the call return sooner.
+
+    If a FairScheduler is given, every upstream call (after the cache and coalescing) waits for
+    a slot from it, queued by the caller's session and the call site's priority class.
+    """
+
+    def __init__(
+        self,
+        max_retries=3,
+        initial_backoff=1,
+        backoff_factor=2,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        max_connections_per_host: Optional[int] = None,
+        http2: bool = False,
+        timeout: float = 60.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        response_cache: Optional[ResponseCache] = None,
+        coalesce_requests: bool = True,
+        base_url: Optional[str] = None,
+        hedger: Optional[RequestHedger] = None,
+        circuit_breaker_failure_threshold: Optional[int] = 5,
+        circuit_breaker_recovery_timeout: float = 30.0,
+        upstream_stop_sequences: bool = False,
+        scheduler: Optional[FairScheduler] = None,
+    ):
         self.api_key = validate_chai_api_key()
-        self.base_url = "http://guanaco-submitter.guanaco-backend.k2.chaiverse.com/endpoints/onsite/chat"
+        # Overridable so load tests can point the client at a local stand-in (see benchmarks/)
+        self.base_url = base_url or DEFAULT_CHAI_API_URL
         self.headers = {
             "Authorization": self.api_key,
             "Content-Type": "application/json"
@@ -20,64 +95,542 @@ class CHAIAPIClient:
         self.max_retries = max_retries
         self.initial_backoff = initial_backoff
         self.backoff_factor = backoff_factor
+        # Connection pool configuration
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.max_connections_per_host = max_connections_per_host
+        self.http2 = http2
+        self.timeout = timeout  # LLM generations are slow, so this is generous
+        self._transport = transport
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_shared_rate_limiter()
+        self.response_cache = response_cache
+        self.coalesce_requests = coalesce_requests
+        self.hedger = hedger
+        # One circuit breaker per upstream URL; a threshold of None disables them
+        self.circuit_breaker_failure_threshold = circuit_breaker_failure_threshold
+        self.circuit_breaker_recovery_timeout = circuit_breaker_recovery_timeout
+        self._circuit_breakers: Dict[str, CircuitBreaker] = {}
+        # Whether the endpoint accepts a "stop" parameter; if not, stop sequences are applied to the response client-side
+        self.upstream_stop_sequences = upstream_stop_sequences
+        self.scheduler = scheduler
+        # Upstream calls currently in progress, keyed by canonical request key
+        self._single_flight = SingleFlight()
+        # Number of invoke_llm / stream_llm calls currently in progress
+        self.in_flight_requests = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
         logger.info("CHAIAPIClient initialized with valid API key and retry mechanism")
-    
+
+    async def start(self) -> None:
+        """
+        Create the shared connection pool. Safe to call more than once.
+        """
+        if self._http_client is not None:
+            return
+
+        http2 = self.http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 was requested but the 'h2' package is not installed; falling back to HTTP/1.1")
+            http2 = False
+
+        self._http_client = httpx.AsyncClient(
+            limits=self.limits,
+            http2=http2,
+            timeout=self.timeout,
+            transport=self._transport,
+        )
+        logger.info(
+            f"CHAIAPIClient connection pool started (max_connections={self.limits.max_connections}, "
+            f"max_keepalive_connections={self.limits.max_keepalive_connections}, "
+            f"keepalive_expiry={self.limits.keepalive_expiry}s, http2={http2})"
+        )
+
+    async def aclose(self) -> None:
+        """
+        Close the shared connection pool, releasing any kept-alive connections.
+        """
+        if self._http_client is None:
+            return
+        http_client = self._http_client
+        self._http_client = None
+        await http_client.aclose()
+        logger.info("CHAIAPIClient connection pool closed")
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Wait for in-flight invoke_llm / stream_llm calls to finish, e.g. before shutting down.
+
+        Args:
+            timeout: The most seconds to wait
+
+        Returns:
+            True if every call finished, False if some were still running at the deadline
+        """
+        if self.in_flight_requests == 0:
+            return True
+        logger.info(f"Draining {self.in_flight_requests} in-flight CHAI API calls (up to {timeout}s)")
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self.in_flight_requests} CHAI API calls still in flight after {timeout}s drain deadline")
+            return False
+        return True
+
+    def _request_started(self) -> None:
+        self.in_flight_requests += 1
+        self._idle.clear()
+
+    def _request_finished(self) -> None:
+        self.in_flight_requests -= 1
+        if self.in_flight_requests == 0:
+            self._idle.set()
+
+    async def _get_http_client(self) -> httpx.AsyncClient:
+        if self._http_client is None:
+            await self.start()
+        return self._http_client
+
+    def _get_host_semaphore(self, url: str) -> Optional[asyncio.Semaphore]:
+        """
+        Returns the semaphore capping concurrent connections to the host of the given url,
+        or None if no per-host limit is configured.
+        """
+        if self.max_connections_per_host is None:
+            return None
+        host = httpx.URL(url).host
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_connections_per_host)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    async def _post(self, url: str, body: bytes, timeout: Optional[float] = None) -> httpx.Response:
+        client = await self._get_http_client()
+        semaphore = self._get_host_semaphore(url)
+        request_timeout = timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT
+        if semaphore is None:
+            return await client.post(url, headers=self.headers, content=body, timeout=request_timeout)
+        async with semaphore:
+            return await client.post(url, headers=self.headers, content=body, timeout=request_timeout)
+
+    def _get_circuit_breaker(self, url: str) -> Optional[CircuitBreaker]:
+        if self.circuit_breaker_failure_threshold is None:
+            return None
+        breaker = self._circuit_breakers.get(url)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                url,
+                failure_threshold=self.circuit_breaker_failure_threshold,
+                recovery_timeout=self.circuit_breaker_recovery_timeout,
+            )
+            self._circuit_breakers[url] = breaker
+        return breaker
+
+    @staticmethod
+    def _record_attempt(
+        breaker: Optional[CircuitBreaker],
+        deadline: Optional[Deadline],
+        response: Optional[httpx.Response] = None,
+        error: Optional[BaseException] = None
+    ) -> None:
+        """
+        Report the outcome of an upstream attempt to its circuit breaker.
+        5xx responses, timeouts and connection errors count as failures, except timeouts caused by
+        the caller's own deadline. A 429 or an abandoned attempt says nothing about the endpoint's health.
+        """
+        if breaker is None:
+            return
+        if response is not None:
+            if response.status_code >= 500:
+                breaker.on_failure()
+            elif response.status_code == 429:
+                breaker.on_neutral()
+            else:
+                breaker.on_success()
+        elif isinstance(error, httpx.TransportError) and not (deadline is not None and deadline.expired()):
+            breaker.on_failure()
+        else:
+            breaker.on_neutral()
+
+    async def _acquire_rate_limit(self, deadline: Optional[Deadline]) -> None:
+        if deadline is None:
+            await self.rate_limiter.acquire()
+        else:
+            await deadline.run(self.rate_limiter.acquire())
+
+    def _scheduled(self, session_id: Optional[str], call_site: Optional[CallSite], deadline: Optional[Deadline]):
+        """
+        Returns a context manager holding an upstream slot from the scheduler, if there is one.
+        """
+        if self.scheduler is None:
+            return contextlib.nullcontext()
+        return self.scheduler.slot(session_id, priority_for(call_site), deadline=deadline)
+
+    async def _send_attempt(self, body: bytes, call_site: Optional[CallSite], deadline: Optional[Deadline]) -> httpx.Response:
+        """
+        Make one upstream attempt: circuit check, rate limiting, then the (optionally hedged) POST,
+        all within the deadline.
+        """
+        breaker = self._get_circuit_breaker(self.base_url)
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            await self._acquire_rate_limit(deadline)
+            timeout = cap_timeout(self.timeout, deadline)
+            if self.hedger is not None:
+                response = await self.hedger.send(
+                    call_site.value if call_site is not None else "unknown",
+                    lambda: self._post(self.base_url, body, timeout),
+                    # A hedge is only worth sending if the limiter has a token to spare right now
+                    self.rate_limiter.try_acquire,
+                )
+            else:
+                response = await self._post(self.base_url, body, timeout)
+        except BaseException as e:
+            self._record_attempt(breaker, deadline, error=e)
+            if isinstance(e, httpx.TimeoutException) and deadline is not None and deadline.expired():
+                raise DeadlineExceededError(f"Request deadline of {deadline.seconds}s exceeded waiting for the CHAI API") from e
+            raise
+        self._record_attempt(breaker, deadline, response=response)
+        return response
+
+    @staticmethod
+    def _build_request_data(
+        prompt: str,
+        character_1_name: str,
+        character_2_name: str,
+        chat_history: List[Dict[str, str]],
+        stop_sequences: Optional[Sequence[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Build the request payload in the CHAIAPIRequest format.
+
+        The chat history is built by the service as {"sender", "message"} dicts, so it is passed
+        through as-is instead of being re-validated into ChatMessage models.
+        """
+        payload = {
+            "memory": "",  # Deprecated
+            "prompt": prompt,
+            "bot_name": character_1_name,
+            "user_name": character_2_name,
+            "chat_history": chat_history,
+        }
+        if stop_sequences:
+            payload["stop"] = list(stop_sequences)
+        return payload
+
+    async def _wait_before_retry(
+        self,
+        response: httpx.Response,
+        retries: int,
+        backoff_time: float,
+        deadline: Optional[Deadline] = None
+    ) -> Optional[float]:
+        """
+        Handle a 429 from the CHAI API: slow down the shared rate limiter and wait before retrying.
+
+        Args:
+            response: The 429 response
+            retries: The number of retries already made
+            backoff_time: The current exponential backoff delay
+            deadline: The caller's deadline, if any
+
+        Returns:
+            The backoff delay to use for the next retry, or None if retries are exhausted
+
+        Raises:
+            DeadlineExceededError: If the wait would outlast the deadline
+        """
+        # Slow down every caller sharing the limiter, honouring Retry-After if present
+        CHAI_THROTTLED_TOTAL.inc()
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        await self.rate_limiter.on_throttle(retry_after)
+
+        if retries >= self.max_retries:
+            return None
+        wait_time = retry_after if retry_after is not None else backoff_time
+        if deadline is not None and wait_time >= deadline.remaining():
+            raise DeadlineExceededError(f"Request deadline of {deadline.seconds}s leaves no time to retry after a 429")
+        CHAI_RETRIES_TOTAL.inc()
+
+        if retry_after is not None:
+            # The limiter holds the next acquire() until Retry-After has elapsed
+            logger.warning(f"Received 429 Too Many Requests. Retry attempt {retries + 1}/{self.max_retries} after Retry-After of {retry_after}s")
+            return backoff_time
+
+        logger.warning(f"Received 429 Too Many Requests. Retry attempt {retries + 1}/{self.max_retries} after {backoff_time}s backoff")
+        await asyncio.sleep(backoff_time)
+        return backoff_time * self.backoff_factor  # Exponential backoff
+
     async def invoke_llm(
         self,
         prompt: str,
         character_1_name: str,
         character_2_name: str,
-        chat_history: List[Dict[str, str]]
+        chat_history: List[Dict[str, str]],
+        call_site: Optional[CallSite] = None,
+        deadline: Optional[Deadline] = None,
+        stop_sequences: Optional[Sequence[str]] = None,
+        session_id: Optional[str] = None
     ) -> Optional[str]:
-        # Format the request data outside the retry loop
-        formatted_chat_history = [
-            ChatMessage(sender=msg["sender"], message=msg["message"])
-            for msg in chat_history
-        ]
-        
-        request_data = CHAIAPIRequest(
-            memory="",  # Deprecated
-            prompt=prompt,
-            bot_name=character_1_name,
-            user_name=character_2_name,
-            chat_history=formatted_chat_history
+        """
+        Invoke the CHAI API and return the generated text, stripped of surrounding whitespace.
+
+        Args:
+            prompt: The bot's prompt
+            character_1_name: The name of the character the model is acting as
+            character_2_name: The name of the agent interacting with the model
+            chat_history: List of {"sender", "message"} dicts
+            call_site: Which part of the service is calling, for caching, hedging and metrics
+            deadline: The caller's deadline, if any
+            stop_sequences: The response is cut before the first of these, if given
+            session_id: The session the call is made for, so the scheduler can share capacity fairly
+        """
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await self._invoke_llm_once(prompt, character_1_name, character_2_name, chat_history, call_site, deadline, stop_sequences, session_id)
+            outcome = "success"
+            return response
+        finally:
+            call_site_label = call_site.value if call_site is not None else "unknown"
+            CHAI_LLM_DURATION_SECONDS.labels(call_site_label, outcome).observe(time.perf_counter() - start)
+
+    async def _invoke_llm_once(
+        self,
+        prompt: str,
+        character_1_name: str,
+        character_2_name: str,
+        chat_history: List[Dict[str, str]],
+        call_site: Optional[CallSite],
+        deadline: Optional[Deadline],
+        stop_sequences: Optional[Sequence[str]] = None,
+        session_id: Optional[str] = None
+    ) -> Optional[str]:
+        cache_policy = self.response_cache.policy_for(call_site) if self.response_cache is not None else None
+        request_key = None
+        if cache_policy is not None or self.coalesce_requests:
+            request_key = canonical_request_key(prompt, character_1_name, character_2_name, chat_history, stop_sequences)
+
+        if cache_policy is not None:
+            cached_response = await self.response_cache.get(request_key)
+            if cached_response is not None:
+                logger.info(f"Response cache hit for {call_site.value} request")
+                return cached_response
+
+        if not self.coalesce_requests:
+            return await self._invoke_and_cache(prompt, character_1_name, character_2_name, chat_history, request_key, cache_policy, call_site, deadline, stop_sequences, session_id)
+
+        if self._single_flight.is_pending(request_key):
+            logger.info("Coalescing invoke_llm call with an identical request already in flight")
+        return await self._single_flight.run(
+            request_key,
+            lambda: self._invoke_and_cache(prompt, character_1_name, character_2_name, chat_history, request_key, cache_policy, call_site, deadline, stop_sequences, session_id),
+            deadline,
         )
 
-        logger.info(f"\n\nRequest data for CHAI API: {request_data.model_dump()}\n")
-        
+    async def _invoke_and_cache(
+        self,
+        prompt: str,
+        character_1_name: str,
+        character_2_name: str,
+        chat_history: List[Dict[str, str]],
+        request_key: Optional[str],
+        cache_policy: Optional[CachePolicy],
+        call_site: Optional[CallSite],
+        deadline: Optional[Deadline],
+        stop_sequences: Optional[Sequence[str]] = None,
+        session_id: Optional[str] = None
+    ) -> Optional[str]:
+        self._request_started()
+        try:
+            async with self._scheduled(session_id, call_site, deadline):
+                if stop_sequences and not self.upstream_stop_sequences:
+                    response = await self._invoke_llm(prompt, character_1_name, character_2_name, chat_history, call_site, deadline)
+                    response = self._cut_at_stop_sequence(response, stop_sequences, call_site)
+                else:
+                    response = await self._invoke_llm(prompt, character_1_name, character_2_name, chat_history, call_site, deadline, stop_sequences)
+        finally:
+            self._request_finished()
+
+        if cache_policy is not None:
+            await self.response_cache.set(request_key, response, cache_policy)
+        return response
+
+    async def _invoke_llm(
+        self,
+        prompt: str,
+        character_1_name: str,
+        character_2_name: str,
+        chat_history: List[Dict[str, str]],
+        call_site: Optional[CallSite] = None,
+        deadline: Optional[Deadline] = None,
+        stop_sequences: Optional[Sequence[str]] = None
+    ) -> Optional[str]:
+        # Format the request data outside the retry loop
+        payload = self._build_request_data(prompt, character_1_name, character_2_name, chat_history, stop_sequences)
+        # Serialized once and reused by every retry and hedge
+        body = orjson.dumps(payload)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("CHAI API request", extra={"call_site": call_site.value if call_site else None, "payload": truncate_for_log(payload)})
+
         # Initialize retry variables
         retries = 0
         backoff_time = self.initial_backoff
-        
+
         # Retry loop
         while True:
             try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        self.base_url,
-                        headers=self.headers,
-                        json=request_data.model_dump(),
-                        timeout=60.0  # Increased timeout for LLM API calls
-                    )
-                    response.raise_for_status()
-                    data = response.json()
-                    logger.info(f"\nResponse from CHAI API: {data['model_output'].strip()}\n\n")
-                    return data["model_output"].strip()
-                
+                response = await self._send_attempt(body, call_site, deadline)
+                response.raise_for_status()
+                self.rate_limiter.on_success()
+                CHAI_RESPONSE_SIZE_BYTES.observe(len(response.content))
+                data = orjson.loads(response.content)
+                model_output = data["model_output"].strip()
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("CHAI API response", extra={"call_site": call_site.value if call_site else None, "model_output": truncate_for_log(model_output)})
+                return model_output
+
             except httpx.HTTPStatusError as e:
                 # Check if it's a 429 error and we haven't exceeded max retries
-                if e.response.status_code == 429 and retries < self.max_retries:
-                    retries += 1
-                    logger.warning(f"Received 429 Too Many Requests. Retry attempt {retries}/{self.max_retries} after {backoff_time}s backoff")
-                    await asyncio.sleep(backoff_time)
-                    backoff_time *= self.backoff_factor  # Exponential backoff
-                    continue  # Try again
-                
+                if e.response.status_code == 429:
+                    next_backoff_time = await self._wait_before_retry(e.response, retries, backoff_time, deadline)
+                    if next_backoff_time is not None:
+                        retries += 1
+                        backoff_time = next_backoff_time
+                        continue  # Try again
+
                 # If it's not a 429 error or we've exceeded max retries, log and re-raise
                 logger.error(f"Error invoking CHAI API: {str(e)}")
                 raise
-                
+
             except Exception as e:
                 # For any other exception, log and re-raise
                 logger.error(f"Error invoking CHAI API: {str(e)}")
                 raise
+
+    @staticmethod
+    def _cut_at_stop_sequence(model_output: str, stop_sequences: Sequence[str], call_site: Optional[CallSite]) -> str:
+        """
+        Cut the model output before the first stop sequence, for endpoints without a "stop" parameter.
+        """
+        scanner = StopSequenceScanner(stop_sequences)
+        cut_output, stopped = scanner.feed(model_output)
+        if not stopped:
+            return cut_output + scanner.flush()
+        CHAI_STOP_SEQUENCE_CUTS_TOTAL.labels(call_site.value if call_site is not None else "unknown").inc()
+        return cut_output
+
+    async def stream_llm(
+        self,
+        prompt: str,
+        character_1_name: str,
+        character_2_name: str,
+        chat_history: List[Dict[str, str]],
+        call_site: Optional[CallSite] = None,
+        deadline: Optional[Deadline] = None,
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Invoke the CHAI API and yield the generated text as the response body arrives.
+
+        The concatenation of all yielded chunks equals what invoke_llm would return.
+        Closing the generator early (e.g. once the caller has seen enough) closes the
+        upstream connection without downloading the rest of the body.
+        """
+        self._request_started()
+        start = time.perf_counter()
+        outcome = "error"
+        response_stream = self._stream_llm(prompt, character_1_name, character_2_name, chat_history, deadline)
+        try:
+            async with self._scheduled(session_id, call_site, deadline):
+                async for text in response_stream:
+                    yield text
+            outcome = "success"
+        except GeneratorExit:
+            outcome = "closed"
+            raise
+        finally:
+            # Close the upstream response promptly if the caller stopped early
+            await response_stream.aclose()
+            self._request_finished()
+            call_site_label = call_site.value if call_site is not None else "unknown"
+            CHAI_LLM_DURATION_SECONDS.labels(call_site_label, outcome).observe(time.perf_counter() - start)
+
+    async def _stream_llm(
+        self,
+        prompt: str,
+        character_1_name: str,
+        character_2_name: str,
+        chat_history: List[Dict[str, str]],
+        deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[str]:
+        payload = self._build_request_data(prompt, character_1_name, character_2_name, chat_history)
+        body = orjson.dumps(payload)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("CHAI API streaming request", extra={"payload": truncate_for_log(payload)})
+
+        # Initialize retry variables
+        retries = 0
+        backoff_time = self.initial_backoff
+
+        # Retry loop; retries are only possible before any text has been yielded
+        while True:
+            breaker = self._get_circuit_breaker(self.base_url)
+            if breaker is not None:
+                breaker.before_call()
+            attempt_recorded = False
+            try:
+                await self._acquire_rate_limit(deadline)
+                client = await self._get_http_client()
+                semaphore = self._get_host_semaphore(self.base_url)
+                if semaphore is not None:
+                    await semaphore.acquire()
+                try:
+                    timeout = cap_timeout(self.timeout, deadline)
+                    async with client.stream("POST", self.base_url, headers=self.headers, content=body, timeout=timeout) as response:
+                        self._record_attempt(breaker, deadline, response=response)
+                        attempt_recorded = True
+                        response.raise_for_status()
+                        self.rate_limiter.on_success()
+                        decoder = ModelOutputDecoder()
+                        trimmer = WhitespaceTrimmer()
+                        async for chunk in response.aiter_bytes():
+                            text = trimmer.feed(decoder.feed(chunk))
+                            if text:
+                                yield text
+                            if decoder.finished:
+                                break
+                        decoder.close()
+                        return
+                finally:
+                    if semaphore is not None:
+                        semaphore.release()
+
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code == 429:
+                    next_backoff_time = await self._wait_before_retry(e.response, retries, backoff_time, deadline)
+                    if next_backoff_time is not None:
+                        retries += 1
+                        backoff_time = next_backoff_time
+                        continue  # Try again
+
+                logger.error(f"Error streaming from CHAI API: {str(e)}")
+                raise
+
+            except BaseException as e:
+                if not attempt_recorded:
+                    self._record_attempt(breaker, deadline, error=e)
+                if isinstance(e, httpx.TimeoutException) and deadline is not None and deadline.expired():
+                    logger.error(f"Request deadline exceeded while streaming from CHAI API: {str(e)}")
+                    raise DeadlineExceededError(f"Request deadline of {deadline.seconds}s exceeded waiting for the CHAI API") from e
+                if isinstance(e, Exception):
+                    logger.error(f"Error streaming from CHAI API: {str(e)}")
+                raise
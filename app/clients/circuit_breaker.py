@@ -0,0 +1,92 @@
+"""
+Circuit breaker for upstream endpoints.
+"""
+import logging
+import time
+from enum import Enum
+
+logger = logging.getLogger(__name__)
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling an upstream endpoint whose circuit is open.
+
+    Attributes:
+        retry_after: Seconds until the circuit lets a trial call through
+    """
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"Circuit for {endpoint} is open; retry in {retry_after:.1f}s")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open circuit breaker for one upstream endpoint.
+
+    While closed, calls go through and consecutive failures are counted. After failure_threshold
+    consecutive failures the circuit opens and calls fail fast with CircuitOpenError for
+    recovery_timeout seconds. It then goes half-open and lets up to half_open_max_calls trial
+    calls through. A trial success closes the circuit again; a trial failure reopens it.
+    """
+
+    def __init__(self, endpoint: str, failure_threshold: int = 5, recovery_timeout: float = 30.0, half_open_max_calls: int = 1):
+        if failure_threshold < 1:
+            raise ValueError("Circuit breaker failure_threshold must be at least 1")
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+
+    def before_call(self) -> None:
+        """
+        Check that a call may be made, reserving a trial slot when half-open.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with every trial slot taken
+        """
+        if self.state == CircuitState.OPEN:
+            retry_after = self._opened_at + self.recovery_timeout - time.monotonic()
+            if retry_after > 0:
+                raise CircuitOpenError(self.endpoint, retry_after)
+            self.state = CircuitState.HALF_OPEN
+            self._half_open_calls = 0
+            logger.info(f"Circuit for {self.endpoint} is half-open; allowing trial calls")
+
+        if self.state == CircuitState.HALF_OPEN:
+            if self._half_open_calls >= self.half_open_max_calls:
+                raise CircuitOpenError(self.endpoint, self.recovery_timeout)
+            self._half_open_calls += 1
+
+    def on_success(self) -> None:
+        if self.state != CircuitState.CLOSED:
+            logger.info(f"Circuit for {self.endpoint} closed after a successful trial call")
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+
+    def on_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == CircuitState.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != CircuitState.OPEN:
+                logger.warning(f"Circuit for {self.endpoint} opened after {self.consecutive_failures} consecutive failures")
+            self.state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+
+    def on_neutral(self) -> None:
+        """
+        Record a call that neither proves nor disproves the endpoint's health, e.g. a 429 or a
+        call abandoned by its caller, releasing any trial slot it held.
+        """
+        if self.state == CircuitState.HALF_OPEN and self._half_open_calls > 0:
+            self._half_open_calls -= 1
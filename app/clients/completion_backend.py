@@ -0,0 +1,83 @@
+"""
+Interface of the LLM backends the service generates text with.
+"""
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, List, Optional, Sequence
+from app.clients.schemas.chai_schemas import CallSite
+from app.utils.deadline import Deadline
+
+class CompletionBackend(ABC):
+    """
+    Completes CHAI-style chat requests: the CHAI HTTP client, an in-process fake, or a router
+    spreading calls over several of them.
+
+    Attributes:
+        in_flight_requests: Number of invoke_llm / stream_llm calls currently in progress
+    """
+    in_flight_requests: int = 0
+
+    @abstractmethod
+    async def invoke_llm(
+        self,
+        prompt: str,
+        character_1_name: str,
+        character_2_name: str,
+        chat_history: List[Dict[str, str]],
+        call_site: Optional[CallSite] = None,
+        deadline: Optional[Deadline] = None,
+        stop_sequences: Optional[Sequence[str]] = None,
+        session_id: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Generate the next message and return it stripped of surrounding whitespace.
+
+        Args:
+            prompt: The bot's prompt
+            character_1_name: The name of the character the model is acting as
+            character_2_name: The name of the agent interacting with the model
+            chat_history: List of {"sender", "message"} dicts
+            call_site: Which part of the service is calling
+            deadline: The caller's deadline, if any
+            stop_sequences: The response is cut before the first of these, if given
+            session_id: The session the call is made for
+
+        Raises:
+            DeadlineExceededError: If the deadline passes first
+        """
+
+    @abstractmethod
+    def stream_llm(
+        self,
+        prompt: str,
+        character_1_name: str,
+        character_2_name: str,
+        chat_history: List[Dict[str, str]],
+        call_site: Optional[CallSite] = None,
+        deadline: Optional[Deadline] = None,
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Generate the next message, yielding it in pieces as it is produced.
+
+        The concatenation of all yielded chunks equals what invoke_llm would return.
+        Closing the generator early releases its upstream resources (e.g. the connection).
+        """
+
+    async def start(self) -> None:
+        """
+        Acquire resources (e.g. connection pools) when the app starts.
+        """
+
+    async def aclose(self) -> None:
+        """
+        Release resources when the app shuts down.
+        """
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Wait up to timeout seconds for calls in progress to finish.
+
+        Returns:
+            True if none were left in progress
+        """
+        return True
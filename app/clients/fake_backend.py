@@ -0,0 +1,126 @@
+"""
+Deterministic in-process stand-in for the CHAI API.
+"""
+import asyncio
+import random
+from typing import AsyncIterator, Dict, List, Optional, Sequence
+from app.clients.completion_backend import CompletionBackend
+from app.clients.response_cache import canonical_request_key
+from app.clients.schemas.chai_schemas import CallSite
+from app.utils.deadline import Deadline
+
+FIRST_NAMES = ["Aria", "Bram", "Cassia", "Dorian", "Elowen", "Fenris", "Isolde", "Kael", "Liora", "Orin", "Rowan", "Sable", "Thorne", "Wren"]
+LAST_NAMES = ["Ashdown", "Blackwood", "Duskmere", "Everhart", "Frostvale", "Greymantle", "Nightshade", "Stormrider", "Thornfield", "Wyncrest"]
+WORDS = (
+    "the ancient road winds past a ruined keep where the old king once hid his crown and "
+    "every traveller who passes hears whispers of a promise made before the storm came"
+).split()
+
+def _sentence(rng: random.Random, word_count: int) -> str:
+    words = [rng.choice(WORDS) for _ in range(max(1, word_count))]
+    return " ".join(words).capitalize() + "."
+
+
+def _cut_at_stop(text: str, stop_sequences: Sequence[str]) -> str:
+    cut = len(text)
+    for stop in stop_sequences:
+        index = text.find(stop) if stop else -1
+        if index != -1:
+            cut = min(cut, index)
+    return text[:cut]
+
+
+class FakeCompletionBackend(CompletionBackend):
+    """
+    Answers requests in-process with made-up text shaped like the CHAI API's responses for
+    each call site: a name, a backstory, or a line of dialogue that is sometimes followed by
+    the "USER: ..." tail the real model tends to add.
+
+    The text is derived from the request alone (and the seed), so identical requests get
+    identical responses and test and benchmark runs are reproducible without network access.
+
+    Attributes:
+        latency: Seconds each call takes
+        calls: Number of calls answered
+    """
+
+    def __init__(self, latency: float = 0.0, seed: int = 0, dialogue_words: int = 30, user_tail_probability: float = 0.3):
+        self.latency = latency
+        self.seed = seed
+        self.dialogue_words = dialogue_words
+        self.user_tail_probability = user_tail_probability
+        self.in_flight_requests = 0
+        self.calls = 0
+
+    def generate(
+        self,
+        prompt: str,
+        character_1_name: str,
+        character_2_name: str,
+        chat_history: List[Dict[str, str]],
+        call_site: Optional[CallSite] = None
+    ) -> str:
+        """
+        Returns the raw model output for a request, before stripping and stop sequences.
+        """
+        rng = random.Random(f"{self.seed}:{call_site}:{canonical_request_key(prompt, character_1_name, character_2_name, chat_history)}")
+        if call_site == CallSite.CHARACTER_NAME:
+            return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}."
+        if call_site == CallSite.CHARACTER_BACKSTORY:
+            return " ".join(_sentence(rng, rng.randint(12, 24)) for _ in range(3))
+
+        output = _sentence(rng, max(1, int(rng.expovariate(1 / self.dialogue_words))))
+        if rng.random() < self.user_tail_probability:
+            output += f"\nUSER: {_sentence(rng, 6)}"
+        return output
+
+    async def _wait(self, deadline: Optional[Deadline]) -> None:
+        if deadline is not None:
+            await deadline.run(asyncio.sleep(self.latency))
+        else:
+            await asyncio.sleep(self.latency)
+
+    async def invoke_llm(
+        self,
+        prompt: str,
+        character_1_name: str,
+        character_2_name: str,
+        chat_history: List[Dict[str, str]],
+        call_site: Optional[CallSite] = None,
+        deadline: Optional[Deadline] = None,
+        stop_sequences: Optional[Sequence[str]] = None,
+        session_id: Optional[str] = None
+    ) -> Optional[str]:
+        self.in_flight_requests += 1
+        try:
+            await self._wait(deadline)
+        finally:
+            self.in_flight_requests -= 1
+        self.calls += 1
+        output = self.generate(prompt, character_1_name, character_2_name, chat_history, call_site).strip()
+        return _cut_at_stop(output, stop_sequences) if stop_sequences else output
+
+    async def stream_llm(
+        self,
+        prompt: str,
+        character_1_name: str,
+        character_2_name: str,
+        chat_history: List[Dict[str, str]],
+        call_site: Optional[CallSite] = None,
+        deadline: Optional[Deadline] = None,
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        self.in_flight_requests += 1
+        try:
+            await self._wait(deadline)
+            self.calls += 1
+            output = self.generate(prompt, character_1_name, character_2_name, chat_history, call_site).strip()
+            # A word at a time, like tokens arriving
+            start = 0
+            while start < len(output):
+                end = output.find(" ", start + 1)
+                end = len(output) if end == -1 else end
+                yield output[start:end]
+                start = end
+        finally:
+            self.in_flight_requests -= 1
@@ -0,0 +1,166 @@
+"""
+Request hedging for upstream LLM calls.
+"""
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional
+import httpx
+from app.utils.metrics import CHAI_HEDGE_WINS_TOTAL, CHAI_HEDGES_TOTAL
+
+logger = logging.getLogger(__name__)
+
+class LatencyTracker:
+    """
+    Rolling window of recent call latencies with cheap percentile lookups.
+
+    The sorted snapshot used for percentiles is rebuilt at most every refresh_interval
+    observations, so lookups on the hot path don't sort the window every time.
+    """
+
+    def __init__(self, window_size: int = 200, min_samples: int = 20, refresh_interval: int = 10):
+        self.min_samples = min_samples
+        self.refresh_interval = refresh_interval
+        self._latencies: Deque[float] = deque(maxlen=window_size)
+        self._sorted: List[float] = []
+        self._observations_since_refresh = 0
+
+    def __len__(self) -> int:
+        return len(self._latencies)
+
+    def observe(self, latency: float) -> None:
+        self._latencies.append(latency)
+        self._observations_since_refresh += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """
+        Returns the nearest-rank percentile of the window, or None until min_samples calls were observed.
+        """
+        if len(self._latencies) < self.min_samples:
+            return None
+        if self._observations_since_refresh >= self.refresh_interval or not self._sorted:
+            self._sorted = sorted(self._latencies)
+            self._observations_since_refresh = 0
+        rank = max(1, math.ceil(fraction * len(self._sorted)))
+        return self._sorted[rank - 1]
+
+
+class HedgeBudget:
+    """
+    Caps hedges to a fraction of primary requests.
+
+    Every primary request earns `ratio` of a token (up to max_tokens) and every hedge spends one.
+    """
+
+    def __init__(self, ratio: float = 0.1, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = 0.0
+
+    def on_request(self) -> None:
+        self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def can_spend(self) -> bool:
+        return self._tokens >= 1
+
+    def spend(self) -> None:
+        self._tokens -= 1
+
+
+class RequestHedger:
+    """
+    Sends a second, identical request when the first is slower than usual; the first good response wins.
+
+    The hedge delay is a percentile of recent latencies for the same call site, so only the slow
+    tail is hedged. Hedges are limited by a HedgeBudget and only go out if the caller's
+    may_send_hedge check (e.g. a non-blocking rate limiter acquire) allows it. The losing request
+    is cancelled.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        budget_ratio: float = 0.1,
+        window_size: int = 200,
+        min_samples: int = 20,
+        min_delay: float = 0.05,
+    ):
+        if not 0 < percentile < 1:
+            raise ValueError("Hedge percentile must be between 0 and 1")
+        self.percentile = percentile
+        self.window_size = window_size
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.budget = HedgeBudget(ratio=budget_ratio)
+        self._trackers: Dict[str, LatencyTracker] = {}
+
+    def tracker(self, call_site: str) -> LatencyTracker:
+        tracker = self._trackers.get(call_site)
+        if tracker is None:
+            tracker = LatencyTracker(window_size=self.window_size, min_samples=self.min_samples)
+            self._trackers[call_site] = tracker
+        return tracker
+
+    async def send(
+        self,
+        call_site: str,
+        send_request: Callable[[], Awaitable[httpx.Response]],
+        may_send_hedge: Callable[[], Awaitable[bool]],
+    ) -> httpx.Response:
+        """
+        Send a request, hedging it if it takes longer than the call site's latency percentile.
+
+        Args:
+            call_site: Label whose latency history sets the hedge delay
+            send_request: Sends one attempt of the request
+            may_send_hedge: Called before sending a hedge; returning False skips it
+
+        Returns:
+            The first successful response, or the first failed one if both failed
+
+        Raises:
+            Exception: Whatever the primary request raised, if no request succeeded
+        """
+        tracker = self.tracker(call_site)
+        self.budget.on_request()
+        delay = tracker.percentile(self.percentile)
+
+        started_at: Dict[asyncio.Task, float] = {}
+
+        def start(attempt: str) -> asyncio.Task:
+            task = asyncio.create_task(send_request(), name=f"{call_site}-{attempt}")
+            started_at[task] = time.perf_counter()
+            return task
+
+        primary = start("primary")
+        pending = {primary}
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(pending, timeout=max(delay, self.min_delay))
+                if not done and self.budget.can_spend() and await may_send_hedge():
+                    self.budget.spend()
+                    CHAI_HEDGES_TOTAL.labels(call_site).inc()
+                    logger.info(f"Hedging {call_site} request after {delay:.2f}s")
+                    pending.add(start("hedge"))
+
+            first_failure: Optional[asyncio.Task] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Prefer the primary if both finished in the same iteration
+                for task in sorted(done, key=lambda task: task is not primary):
+                    if task.exception() is None and not task.result().is_error:
+                        tracker.observe(time.perf_counter() - started_at[task])
+                        if task is not primary:
+                            CHAI_HEDGE_WINS_TOTAL.labels(call_site).inc()
+                        return task.result()
+                    if first_failure is None or task is primary:
+                        first_failure = task
+            return first_failure.result()
+        finally:
+            for task in started_at:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # mark a losing request's error as retrieved
@@ -0,0 +1,267 @@
+"""
+Adaptive rate limiting for upstream LLM calls.
+"""
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class AdaptiveRateLimiter:
+    """
+    Async token bucket whose refill rate adapts to upstream throttling (AIMD).
+
+    Every successful call additively increases the rate, every 429 multiplicatively
+    decreases it and drains the bucket. A Retry-After value from the upstream blocks
+    all callers until it has elapsed.
+
+    Attributes:
+        rate: Current refill rate in requests per second
+        min_rate: Lower bound for the refill rate
+        max_rate: Upper bound for the refill rate
+        burst: Maximum number of tokens the bucket can hold
+        additive_increase: Amount added to the rate after each successful call
+        multiplicative_decrease: Factor applied to the rate after each 429
+    """
+
+    def __init__(
+        self,
+        initial_rate: float = 2.0,
+        min_rate: float = 0.2,
+        max_rate: float = 20.0,
+        burst: float = 4.0,
+        additive_increase: float = 0.2,
+        multiplicative_decrease: float = 0.5,
+    ):
+        if not 0 < min_rate <= initial_rate <= max_rate:
+            raise ValueError("Rate limiter rates must satisfy 0 < min_rate <= initial_rate <= max_rate")
+        if burst < 1:
+            raise ValueError("Rate limiter burst must be at least 1")
+        if not 0 < multiplicative_decrease < 1:
+            raise ValueError("Rate limiter multiplicative_decrease must be between 0 and 1")
+
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.additive_increase = additive_increase
+        self.multiplicative_decrease = multiplicative_decrease
+        self._clock = time.monotonic
+        self._tokens = burst
+        self._last_refill = self._clock()
+        self._blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._last_refill = now
+
+    def _try_take_token(self) -> float:
+        """
+        Consume a token if one is available.
+
+        Returns:
+            0 if a token was taken, otherwise the number of seconds to wait before trying again
+        """
+        now = self._clock()
+        self._refill(now)
+        if now >= self._blocked_until and self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return max(self._blocked_until - now, (1 - self._tokens) / self.rate)
+
+    async def acquire(self) -> None:
+        """
+        Wait until a request may be sent upstream, then consume one token.
+        """
+        while True:
+            wait_time = self._try_take_token()
+            if wait_time <= 0:
+                return
+            await asyncio.sleep(wait_time)
+
+    async def try_acquire(self) -> bool:
+        """
+        Consume a token only if one is available right now, without waiting.
+
+        Returns:
+            True if a token was taken
+        """
+        return self._try_take_token() <= 0
+
+    def on_success(self) -> None:
+        """
+        Additively increase the rate after a successful upstream call.
+        """
+        self.rate = min(self.max_rate, self.rate + self.additive_increase)
+
+    async def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        """
+        Multiplicatively decrease the rate after the upstream returned 429.
+
+        Args:
+            retry_after: Seconds the upstream asked us to wait, if it sent a Retry-After header
+        """
+        self._apply_throttle(retry_after)
+        logger.warning(f"Upstream throttled; rate limiter reduced to {self.rate:.2f} req/s (retry_after={retry_after})")
+
+    def _apply_throttle(self, retry_after: Optional[float]) -> None:
+        now = self._clock()
+        self._refill(now)
+        self.rate = max(self.min_rate, self.rate * self.multiplicative_decrease)
+        self._tokens = min(self._tokens, 0.0)
+        if retry_after is not None and retry_after > 0:
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+
+
+class SharedAdaptiveRateLimiter(AdaptiveRateLimiter):
+    """
+    AdaptiveRateLimiter whose bucket and rate live in a SQLite file shared by every worker process.
+
+    Each acquire() and on_throttle() runs in an immediate transaction, so the file's write lock
+    serializes workers and they all draw from one bucket. A 429 seen by one worker slows every
+    worker down. Successes are counted locally and applied with the next acquire(), so the hot
+    path doesn't write to the file on every response. Timestamps use the wall clock because
+    they are compared across processes. If the file can't be used, the limiter falls back
+    to the in-process bucket.
+    """
+
+    def __init__(self, state_path: str, busy_timeout_seconds: float = 5.0, **kwargs):
+        super().__init__(**kwargs)
+        self.state_path = state_path
+        self.busy_timeout_seconds = busy_timeout_seconds
+        self._clock = time.time
+        self._last_refill = self._clock()
+        self._pending_successes = 0
+        # on_success runs on the event loop while _transact takes the count in a worker thread;
+        # this lock is never held across a transaction, so on_success doesn't wait for SQLite
+        self._pending_successes_lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        # The connection is used from asyncio.to_thread workers, one transaction at a time
+        self._connection_lock = threading.Lock()
+
+    async def acquire(self) -> None:
+        while True:
+            wait_time = await asyncio.to_thread(self._transact, self._try_take_token)
+            if wait_time <= 0:
+                return
+            await asyncio.sleep(wait_time)
+
+    async def try_acquire(self) -> bool:
+        return await asyncio.to_thread(self._transact, self._try_take_token) <= 0
+
+    def on_success(self) -> None:
+        with self._pending_successes_lock:
+            self._pending_successes += 1
+
+    async def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        # Off the event loop: the transaction may wait for other workers' write locks
+        await asyncio.to_thread(self._transact, lambda: self._apply_throttle(retry_after))
+        logger.warning(f"Upstream throttled; shared rate limiter reduced to {self.rate:.2f} req/s (retry_after={retry_after})")
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(
+                self.state_path, timeout=self.busy_timeout_seconds, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limiter_state ("
+                "id INTEGER PRIMARY KEY CHECK (id = 1), rate REAL NOT NULL, tokens REAL NOT NULL, "
+                "last_refill REAL NOT NULL, blocked_until REAL NOT NULL)"
+            )
+            connection.execute(
+                "INSERT OR IGNORE INTO rate_limiter_state (id, rate, tokens, last_refill, blocked_until) VALUES (1, ?, ?, ?, ?)",
+                (self.rate, self._tokens, self._last_refill, self._blocked_until),
+            )
+            self._connection = connection
+        return self._connection
+
+    def _transact(self, operation: Callable[[], T]) -> T:
+        """
+        Run operation against the shared state: load it, apply pending successes, run, write back.
+        """
+        with self._connection_lock:
+            with self._pending_successes_lock:
+                pending_successes, self._pending_successes = self._pending_successes, 0
+            try:
+                connection = self._connect()
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    self.rate, self._tokens, self._last_refill, self._blocked_until = connection.execute(
+                        "SELECT rate, tokens, last_refill, blocked_until FROM rate_limiter_state WHERE id = 1"
+                    ).fetchone()
+                    self._apply_successes(pending_successes)
+                    result = operation()
+                    connection.execute(
+                        "UPDATE rate_limiter_state SET rate = ?, tokens = ?, last_refill = ?, blocked_until = ? WHERE id = 1",
+                        (self.rate, self._tokens, self._last_refill, self._blocked_until),
+                    )
+                    connection.execute("COMMIT")
+                except BaseException:
+                    connection.execute("ROLLBACK")
+                    raise
+                return result
+            except sqlite3.Error as e:
+                logger.error(f"Error using shared rate limiter state at {self.state_path}, using in-process state: {str(e)}")
+                self._apply_successes(pending_successes)
+                return operation()
+
+    def _apply_successes(self, count: int) -> None:
+        if count:
+            self.rate = min(self.max_rate, self.rate + count * self.additive_increase)
+
+    def close(self) -> None:
+        """
+        Close this process's connection to the shared state file.
+        """
+        with self._connection_lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header, which is either a number of seconds or an HTTP date.
+
+    Args:
+        value: The raw header value, if any
+
+    Returns:
+        The number of seconds to wait, or None if the header is missing or malformed
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+_shared_rate_limiter: Optional[AdaptiveRateLimiter] = None
+
+def get_shared_rate_limiter() -> AdaptiveRateLimiter:
+    """
+    Returns the process-wide rate limiter used by clients that were not given their own.
+    """
+    global _shared_rate_limiter
+    if _shared_rate_limiter is None:
+        _shared_rate_limiter = AdaptiveRateLimiter()
+    return _shared_rate_limiter
@@ -0,0 +1,226 @@
+"""
+Content-addressed cache for CHAI API responses.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from contextlib import closing
+from typing import Dict, List, Optional, Sequence, Tuple
+from pydantic import BaseModel
+from app.clients.schemas.chai_schemas import CallSite, ResponseCacheStats
+
+logger = logging.getLogger(__name__)
+
+# Rough per-entry bookkeeping overhead counted towards the byte limit
+_ENTRY_OVERHEAD_BYTES = 64
+
+# Call sites that are never cached: a cached character name would hand every new cast the same
+# name, which then clashes with the names already in use
+UNCACHEABLE_CALL_SITES = frozenset({CallSite.CHARACTER_NAME})
+
+def canonical_request_key(
+    prompt: str,
+    bot_name: str,
+    user_name: str,
+    chat_history: List[Dict[str, str]],
+    stop_sequences: Optional[Sequence[str]] = None
+) -> str:
+    """
+    Hash the parts of a CHAI API request that determine its response.
+
+    Args:
+        prompt: The bot's prompt
+        bot_name: The name of the character the model is acting as
+        user_name: The name of the agent interacting with the model
+        chat_history: List of {"sender", "message"} dicts
+        stop_sequences: Sequences the response is cut at, if any
+
+    Returns:
+        A hex digest that is identical for identical requests
+    """
+    request = {
+        "prompt": prompt,
+        "bot_name": bot_name,
+        "user_name": user_name,
+        "chat_history": [[msg["sender"], msg["message"]] for msg in chat_history],
+    }
+    if stop_sequences:
+        # Only present when given, so keys of requests without stop sequences are unchanged
+        request["stop"] = list(stop_sequences)
+    canonical = json.dumps(
+        request,
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CachePolicy(BaseModel):
+    """
+    How responses from one call site are cached.
+
+    Attributes:
+        ttl_seconds: How long a cached response stays valid; None uses the cache's default TTL
+    """
+    ttl_seconds: Optional[float] = None
+
+
+class ResponseCache:
+    """
+    Two-tier cache of CHAI API responses keyed by canonical_request_key.
+
+    The memory tier is an LRU bounded by entry count and total size, with per-entry TTLs.
+    The optional disk tier is a SQLite file consulted on memory misses. Only call sites
+    with a policy are cached, so e.g. backstories can be cached while live dialogue is not.
+    Policies for UNCACHEABLE_CALL_SITES are ignored.
+    """
+
+    def __init__(
+        self,
+        policies: Dict[CallSite, CachePolicy],
+        max_entries: int = 1024,
+        max_bytes: int = 8 * 1024 * 1024,
+        ttl_seconds: float = 3600.0,
+        db_path: Optional[str] = None,
+    ):
+        for call_site in UNCACHEABLE_CALL_SITES & policies.keys():
+            logger.warning(f"Responses for the {call_site.value} call site are never cached; ignoring its cache policy")
+        self.policies = {call_site: policy for call_site, policy in policies.items() if call_site not in UNCACHEABLE_CALL_SITES}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+
+        # key -> (response, expires_at, size in bytes)
+        self._entries: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()
+        self._bytes = 0
+
+        # Stats
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def policy_for(self, call_site: Optional[CallSite]) -> Optional[CachePolicy]:
+        """
+        Returns the caching policy for a call site, or None if its responses aren't cached.
+        """
+        if call_site is None:
+            return None
+        return self.policies.get(call_site)
+
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response, checking memory first and then disk.
+
+        Args:
+            key: The canonical request key
+
+        Returns:
+            The cached response, or None on a miss
+        """
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            response, expires_at, _ = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return response
+            self._remove(key)
+            self.expirations += 1
+
+        if self.db_path:
+            try:
+                disk_entry = await asyncio.to_thread(self._disk_get, key)
+            except sqlite3.Error as e:
+                logger.error(f"Error reading response cache from disk: {str(e)}")
+                disk_entry = None
+            if disk_entry is not None:
+                response, expires_at = disk_entry
+                if expires_at > now:
+                    self._store(key, response, expires_at)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return response
+                self.expirations += 1
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, response: str, policy: CachePolicy) -> None:
+        """
+        Cache a response under the given key.
+
+        Args:
+            key: The canonical request key
+            response: The response to cache
+            policy: The policy of the call site the response came from
+        """
+        ttl_seconds = policy.ttl_seconds if policy.ttl_seconds is not None else self.ttl_seconds
+        expires_at = time.time() + ttl_seconds
+        self._store(key, response, expires_at)
+        if self.db_path:
+            try:
+                await asyncio.to_thread(self._disk_set, key, response, expires_at)
+            except sqlite3.Error as e:
+                logger.error(f"Error writing response cache to disk: {str(e)}")
+
+    def stats(self) -> ResponseCacheStats:
+        """
+        Returns hit/miss/eviction counters and the size of the memory tier.
+        """
+        return ResponseCacheStats(
+            entries=len(self._entries),
+            bytes=self._bytes,
+            hits=self.hits,
+            diskHits=self.disk_hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            expirations=self.expirations,
+        )
+
+    def _store(self, key: str, response: str, expires_at: float) -> None:
+        size = len(response.encode("utf-8")) + len(key) + _ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (response, expires_at, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        return connection
+
+    def _disk_get(self, key: str) -> Optional[Tuple[str, float]]:
+        with closing(self._connect()) as connection, connection:
+            row = connection.execute("SELECT response, expires_at FROM response_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[1] <= time.time():
+                connection.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+        return row
+
+    def _disk_set(self, key: str, response: str, expires_at: float) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO response_cache (key, response, expires_at) VALUES (?, ?, ?)",
+                (key, response, expires_at),
+            )
@@ -0,0 +1,206 @@
+"""
+Latency-aware routing of LLM calls over several backends.
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from app.clients.circuit_breaker import CircuitOpenError
+from app.clients.completion_backend import CompletionBackend
+from app.clients.response_cache import canonical_request_key
+from app.clients.schemas.chai_schemas import CallSite
+from app.clients.single_flight import SingleFlight
+from app.utils.deadline import Deadline, DeadlineExceededError
+from app.utils.metrics import CHAI_BACKEND_REQUESTS_TOTAL
+
+logger = logging.getLogger(__name__)
+
+class BackendStats:
+    """
+    EWMAs of one backend's latency and error rate, and its calls in progress.
+    """
+    __slots__ = ("latency", "error_rate", "in_flight", "smoothing")
+
+    def __init__(self, smoothing: float = 0.2):
+        self.smoothing = smoothing
+        # None until the first successful call
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.in_flight = 0
+
+    def on_success(self, latency: float) -> None:
+        self.latency = latency if self.latency is None else self.latency + self.smoothing * (latency - self.latency)
+        self.error_rate -= self.smoothing * self.error_rate
+
+    def on_error(self) -> None:
+        self.error_rate += self.smoothing * (1.0 - self.error_rate)
+
+    def load(self, error_penalty: float) -> Tuple[float, int]:
+        """
+        Returns the expected cost of sending it one more call; lower is better.
+
+        The expected latency grows with the calls already waiting on it and is inflated by its
+        error rate. A backend without a latency sample yet costs nothing, so it gets tried.
+        """
+        latency = self.latency if self.latency is not None else 0.0
+        return latency * (self.in_flight + 1) * (1.0 + error_penalty * self.error_rate), self.in_flight
+
+
+class LatencyAwareRouter(CompletionBackend):
+    """
+    Spreads calls over several backends (e.g. CHAI endpoints or replicas) with power-of-two-choices.
+
+    For every call two backends are picked at random and the one with the lower load (EWMA
+    latency times calls in progress, inflated by its EWMA error rate) gets it. This needs no
+    global coordination, avoids piling onto the single "best" backend, and steers traffic away
+    from backends that are slow or failing. If the chosen backend's circuit is open, the call is
+    made on the other one instead.
+
+    Concurrent identical invoke_llm calls are coalesced before a backend is picked, so they make
+    one upstream call between them however many backends there are.
+    """
+
+    def __init__(
+        self,
+        backends: Dict[str, CompletionBackend],
+        smoothing: float = 0.2,
+        error_penalty: float = 10.0,
+        rng: Optional[random.Random] = None,
+        coalesce_requests: bool = True
+    ):
+        if not backends:
+            raise ValueError("The router needs at least one backend")
+        self.backends = dict(backends)
+        self.error_penalty = error_penalty
+        self.stats: Dict[str, BackendStats] = {name: BackendStats(smoothing) for name in self.backends}
+        self._names = list(self.backends)
+        self._rng = rng if rng is not None else random.Random()
+        self.coalesce_requests = coalesce_requests
+        self._single_flight = SingleFlight()
+
+    @property
+    def in_flight_requests(self) -> int:
+        return sum(backend.in_flight_requests for backend in self.backends.values())
+
+    def choose(self) -> List[str]:
+        """
+        Returns the names of the backends to try, in order: the less loaded of two random picks first.
+        """
+        if len(self._names) == 1:
+            return list(self._names)
+        candidates = self._rng.sample(self._names, 2)
+        candidates.sort(key=lambda name: self.stats[name].load(self.error_penalty))
+        return candidates
+
+    async def start(self) -> None:
+        for backend in self.backends.values():
+            await backend.start()
+
+    async def aclose(self) -> None:
+        for backend in self.backends.values():
+            await backend.aclose()
+
+    async def drain(self, timeout: float) -> bool:
+        deadline = Deadline(timeout)
+        drained = True
+        for backend in self.backends.values():
+            drained = await backend.drain(deadline.remaining()) and drained
+        return drained
+
+    async def invoke_llm(
+        self,
+        prompt: str,
+        character_1_name: str,
+        character_2_name: str,
+        chat_history: List[Dict[str, str]],
+        call_site: Optional[CallSite] = None,
+        deadline: Optional[Deadline] = None,
+        stop_sequences: Optional[Sequence[str]] = None,
+        session_id: Optional[str] = None
+    ) -> Optional[str]:
+        if not self.coalesce_requests:
+            return await self._invoke_routed(prompt, character_1_name, character_2_name, chat_history, call_site, deadline, stop_sequences, session_id)
+
+        request_key = canonical_request_key(prompt, character_1_name, character_2_name, chat_history, stop_sequences)
+        if self._single_flight.is_pending(request_key):
+            logger.info("Coalescing routed invoke_llm call with an identical request already in flight")
+        return await self._single_flight.run(
+            request_key,
+            lambda: self._invoke_routed(prompt, character_1_name, character_2_name, chat_history, call_site, deadline, stop_sequences, session_id),
+            deadline,
+        )
+
+    async def _invoke_routed(
+        self,
+        prompt: str,
+        character_1_name: str,
+        character_2_name: str,
+        chat_history: List[Dict[str, str]],
+        call_site: Optional[CallSite],
+        deadline: Optional[Deadline],
+        stop_sequences: Optional[Sequence[str]],
+        session_id: Optional[str]
+    ) -> Optional[str]:
+        candidates = self.choose()
+        for attempt, name in enumerate(candidates):
+            stats = self.stats[name]
+            stats.in_flight += 1
+            start = time.perf_counter()
+            try:
+                response = await self.backends[name].invoke_llm(
+                    prompt, character_1_name, character_2_name, chat_history, call_site, deadline, stop_sequences, session_id
+                )
+            except CircuitOpenError:
+                self._record(name, "circuit_open")
+                if attempt + 1 < len(candidates):
+                    logger.warning(f"Circuit for backend {name} is open; routing the call to {candidates[attempt + 1]}")
+                    continue
+                raise
+            except (DeadlineExceededError, asyncio.CancelledError):
+                # The caller ran out of time or went away; that says nothing about the backend
+                raise
+            except Exception:
+                self._record(name, "error")
+                raise
+            finally:
+                stats.in_flight -= 1
+            self._record(name, "success", time.perf_counter() - start)
+            return response
+
+    async def stream_llm(
+        self,
+        prompt: str,
+        character_1_name: str,
+        character_2_name: str,
+        chat_history: List[Dict[str, str]],
+        call_site: Optional[CallSite] = None,
+        deadline: Optional[Deadline] = None,
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        # Nothing has been yielded before the first chunk, so there is no failover once streaming
+        name = self.choose()[0]
+        stats = self.stats[name]
+        stats.in_flight += 1
+        start = time.perf_counter()
+        response_stream = self.backends[name].stream_llm(prompt, character_1_name, character_2_name, chat_history, call_site, deadline, session_id)
+        try:
+            async for text in response_stream:
+                yield text
+        except (DeadlineExceededError, asyncio.CancelledError):
+            raise
+        except Exception:
+            self._record(name, "error")
+            raise
+        else:
+            self._record(name, "success", time.perf_counter() - start)
+        finally:
+            stats.in_flight -= 1
+            await response_stream.aclose()
+
+    def _record(self, name: str, outcome: str, latency: Optional[float] = None) -> None:
+        if outcome == "success":
+            self.stats[name].on_success(latency)
+        else:
+            self.stats[name].on_error()
+        CHAI_BACKEND_REQUESTS_TOTAL.labels(name, outcome).inc()
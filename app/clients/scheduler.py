@@ -0,0 +1,167 @@
+"""
+Fair scheduling of upstream LLM calls between sessions.
+"""
+import asyncio
+import contextlib
+import heapq
+import itertools
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from app.clients.schemas.chai_schemas import CallSite, RequestPriority
+from app.utils.deadline import Deadline
+from app.utils.metrics import CHAI_SCHEDULER_QUEUE_WAIT_SECONDS
+
+# Calls made without a session share one session per priority
+ANONYMOUS_SESSION = "anonymous"
+
+# Share of upstream capacity per session of each class; an interactive session gets four calls to a background session's one
+DEFAULT_PRIORITY_WEIGHTS: Dict[RequestPriority, int] = {
+    RequestPriority.INTERACTIVE: 4,
+    RequestPriority.BACKGROUND: 1,
+}
+
+# Finish tags of sessions that are no longer ahead of the virtual clock are dropped past this many sessions
+_MAX_TRACKED_SESSIONS = 1024
+
+def priority_for(call_site: Optional[CallSite]) -> RequestPriority:
+    """
+    Returns the scheduling class of a call site: character generation is background work,
+    everything else is interactive.
+    """
+    if call_site in (CallSite.CHARACTER_NAME, CallSite.CHARACTER_BACKSTORY):
+        return RequestPriority.BACKGROUND
+    return RequestPriority.INTERACTIVE
+
+
+class _Waiter:
+    __slots__ = ("future", "priority")
+
+    def __init__(self, future: asyncio.Future, priority: RequestPriority):
+        self.future = future
+        self.priority = priority
+
+
+class FairScheduler:
+    """
+    Caps concurrent upstream calls and decides which waiting call gets the next free slot.
+
+    Calls are ordered by start-time fair queuing, a form of weighted fair queuing. Each
+    (session, priority class) pair has a virtual finish tag that every call it makes advances by
+    cost / weight. A call's start tag is the later of that finish tag and the virtual clock (the
+    start tag of the last call let through), and waiting calls go in start tag order. A session
+    with many calls queued (a count=10 /initializeCharacters) is therefore interleaved with every
+    other session instead of going first, a session that has just used a lot of capacity waits
+    behind newcomers, and an interactive session gets `weight` times a background session's share
+    without background work being starved outright.
+    """
+
+    def __init__(self, max_concurrency: int = 16, weights: Optional[Dict[RequestPriority, int]] = None):
+        if max_concurrency < 1:
+            raise ValueError("Scheduler concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.weights = {**DEFAULT_PRIORITY_WEIGHTS, **(weights or {})}
+        if any(weight < 1 for weight in self.weights.values()):
+            raise ValueError("Scheduler weights must be at least 1")
+        self.in_use = 0
+        self._virtual_time = 0.0
+        self._finish_tags: Dict[Tuple[str, RequestPriority], float] = {}
+        # (start tag, arrival order, waiter); waiters that gave up are skipped when popped
+        self._heap: List[Tuple[float, int, _Waiter]] = []
+        self._arrivals = itertools.count()
+        self._queued: Dict[RequestPriority, int] = {priority: 0 for priority in RequestPriority}
+
+    def queued(self, priority: RequestPriority) -> int:
+        """
+        Returns the number of calls of a priority class waiting for a slot.
+        """
+        return self._queued[priority]
+
+    @contextlib.asynccontextmanager
+    async def slot(
+        self,
+        session_id: Optional[str],
+        priority: RequestPriority,
+        cost: float = 1.0,
+        deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[None]:
+        """
+        Hold an upstream slot for the duration of the block.
+
+        Args:
+            session_id: The session the call is made for; None counts as the anonymous session
+            priority: The call's scheduling class
+            cost: Share of capacity the call uses up, relative to one ordinary call
+            deadline: The caller's deadline, if any; waiting for a slot stops when it runs out
+
+        Raises:
+            DeadlineExceededError: If the deadline passes while the call is queued
+        """
+        await self.acquire(session_id, priority, cost, deadline)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(
+        self,
+        session_id: Optional[str],
+        priority: RequestPriority,
+        cost: float = 1.0,
+        deadline: Optional[Deadline] = None
+    ) -> None:
+        """
+        Wait for an upstream slot; see slot(). Every successful acquire must be paired with a release().
+        """
+        start = time.perf_counter()
+        start_tag = self._charge((session_id or ANONYMOUS_SESSION, priority), cost / self.weights[priority])
+        if self.in_use < self.max_concurrency and not any(self._queued.values()):
+            self.in_use += 1
+            self._virtual_time = start_tag
+            CHAI_SCHEDULER_QUEUE_WAIT_SECONDS.labels(priority.value).observe(0.0)
+            return
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), priority)
+        heapq.heappush(self._heap, (start_tag, next(self._arrivals), waiter))
+        self._queued[priority] += 1
+        try:
+            if deadline is not None:
+                await deadline.run(waiter.future)
+            else:
+                await waiter.future
+        except BaseException:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # The slot was handed over just as the caller gave up
+                self.release()
+            else:
+                self._queued[priority] -= 1
+            raise
+        finally:
+            CHAI_SCHEDULER_QUEUE_WAIT_SECONDS.labels(priority.value).observe(time.perf_counter() - start)
+
+    def release(self) -> None:
+        """
+        Give back a slot and hand it to the waiting call with the earliest start tag, if any.
+        """
+        self.in_use -= 1
+        while self.in_use < self.max_concurrency and self._heap:
+            start_tag, _, waiter = heapq.heappop(self._heap)
+            if waiter.future.done():
+                # Cancelled or timed out while queued
+                continue
+            self._virtual_time = start_tag
+            self._queued[waiter.priority] -= 1
+            self.in_use += 1
+            waiter.future.set_result(None)
+
+    def _charge(self, key: Tuple[str, RequestPriority], virtual_cost: float) -> float:
+        """
+        Returns the start tag of a new call by key and advances key's finish tag past it.
+        """
+        start_tag = max(self._virtual_time, self._finish_tags.get(key, 0.0))
+        self._finish_tags[key] = start_tag + virtual_cost
+        if len(self._finish_tags) > _MAX_TRACKED_SESSIONS:
+            # A finish tag the clock has caught up with has no effect, so it can be forgotten
+            self._finish_tags = {
+                tracked_key: finish_tag for tracked_key, finish_tag in self._finish_tags.items() if finish_tag > self._virtual_time
+            }
+        return start_tag
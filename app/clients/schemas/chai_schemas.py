@@ -1,4 +1,5 @@
 from pydantic import BaseModel, Field
+from enum import Enum
 from typing import List, Optional, Dict, Any
 
 class ChatMessage(BaseModel):
@@ -29,3 +30,41 @@ class CHAIAPIRequest(BaseModel):
     user_name: str
     chat_history: List[ChatMessage]
 
+
+class CallSite(str, Enum):
+    """
+    Identifies which part of the app an LLM call is made from,
+    so per-call-site policies (e.g. caching) can be applied.
+    """
+    CHARACTER_NAME = "character_name"
+    CHARACTER_BACKSTORY = "character_backstory"
+    DIALOGUE = "dialogue"
+
+class RequestPriority(str, Enum):
+    """
+    Scheduling class of an LLM call: interactive calls are what a user is waiting on,
+    background calls (character generation, pool refills) can wait.
+    """
+    INTERACTIVE = "interactive"
+    BACKGROUND = "background"
+
+class ResponseCacheStats(BaseModel):
+    """
+    Counters and size of the CHAI API response cache.
+    
+    Attributes:
+        entries: Number of responses held in memory
+        bytes: Approximate size of the in-memory tier
+        hits: Lookups answered from the cache (memory or disk)
+        diskHits: Lookups answered from the on-disk tier
+        misses: Lookups that had to go upstream
+        evictions: Entries dropped to stay within the size limits
+        expirations: Entries dropped because their TTL had passed
+    """
+    entries: int
+    bytes: int
+    hits: int
+    diskHits: int
+    misses: int
+    evictions: int
+    expirations: int
@@ -0,0 +1,48 @@
+"""
+Single-flight coalescing of concurrent identical calls.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from app.utils.deadline import Deadline
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time; callers arriving while it is in progress share it.
+
+    Every caller awaits the same task, errors reach all of them, and cancelling one caller does
+    not cancel the call for the others. The shared call runs under the first caller's deadline;
+    each caller also stops waiting at its own.
+
+    Attributes:
+        pending: The calls in progress, by key
+    """
+
+    def __init__(self):
+        self.pending: Dict[str, asyncio.Task] = {}
+
+    def is_pending(self, key: str) -> bool:
+        return key in self.pending
+
+    async def run(self, key: str, call: Callable[[], Awaitable[T]], deadline: Optional[Deadline] = None) -> T:
+        """
+        Await the call in progress for key, or start one with call() if there is none.
+        """
+        pending_call = self.pending.get(key)
+        if pending_call is None:
+            pending_call = asyncio.ensure_future(call())
+            self.pending[key] = pending_call
+            pending_call.add_done_callback(lambda task: self._on_done(key, task))
+
+        # shield() so that a cancelled caller doesn't cancel the call other callers are waiting on
+        if deadline is not None:
+            return await deadline.run(asyncio.shield(pending_call))
+        return await asyncio.shield(pending_call)
+
+    def _on_done(self, key: str, task: asyncio.Task) -> None:
+        if self.pending.get(key) is task:
+            del self.pending[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every caller was cancelled; callers still get it via shield()
+            task.exception()
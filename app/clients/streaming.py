@@ -0,0 +1,215 @@
+"""
+Helpers for consuming CHAI API responses incrementally.
+
+The CHAI endpoint answers with a single JSON object such as {"model_output": "...", ...},
+which it sends in one piece once generation has finished. These helpers let stream_llm relay
+the generated text as the body is read, and cut it at stop sequences wherever the text comes
+from. Cutting client-side cleans up the output; it can't stop the generation upstream or make
+the response arrive sooner.
+"""
+import codecs
+import json
+import re
+from typing import List, Optional, Sequence, Tuple
+
+_MODEL_OUTPUT_KEY_PATTERN = re.compile(r'"model_output"\s*:\s*"')
+
+_SIMPLE_ESCAPES = {
+    '"': '"',
+    '\\': '\\',
+    '/': '/',
+    'b': '\b',
+    'f': '\f',
+    'n': '\n',
+    'r': '\r',
+    't': '\t',
+}
+
+class ModelOutputDecoder:
+    """
+    Incrementally extracts the "model_output" string from a streamed CHAI API response body.
+
+    Feed raw body bytes as they arrive; each call returns whatever part of the decoded
+    model_output string has become available. JSON escapes (including \\u surrogate pairs)
+    that are split across chunks are handled.
+    """
+
+    def __init__(self):
+        self._utf8_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._preamble = ""  # text seen before the model_output string starts
+        self._in_string = False
+        self._escape_buffer: Optional[str] = None  # pending escape sequence, starting after the backslash
+        self._high_surrogate: Optional[str] = None
+        self.finished = False
+
+    def feed(self, chunk: bytes) -> str:
+        """
+        Consume the next chunk of the response body.
+
+        Args:
+            chunk: Raw bytes of the response body
+
+        Returns:
+            Newly decoded model_output text (possibly empty)
+        """
+        if self.finished:
+            return ""
+        text = self._utf8_decoder.decode(chunk)
+
+        if not self._in_string:
+            self._preamble += text
+            match = _MODEL_OUTPUT_KEY_PATTERN.search(self._preamble)
+            if match is None:
+                return ""
+            text = self._preamble[match.end():]
+            self._in_string = True
+
+        return self._decode_string_content(text)
+
+    def close(self) -> None:
+        """
+        Signal that the body is complete.
+
+        Raises:
+            ValueError: If the body never contained a model_output string
+        """
+        if self._in_string:
+            return
+        # Reproduce the error a full json parse would give for an unexpected body
+        data = json.loads(self._preamble + self._utf8_decoder.decode(b"", final=True))
+        raise ValueError(f"CHAI API response did not contain model_output: {data!r:.200}")
+
+    def _decode_string_content(self, text: str) -> str:
+        output: List[str] = []
+        for char in text:
+            if self.finished:
+                break
+            if self._escape_buffer is not None:
+                self._escape_buffer += char
+                decoded = self._resolve_escape()
+                if decoded is not None:
+                    output.append(decoded)
+                continue
+            if char == '\\':
+                self._escape_buffer = ""
+            elif char == '"':
+                output.append(self._flush_surrogate())
+                self.finished = True
+            else:
+                output.append(self._flush_surrogate() + char)
+        return "".join(output)
+
+    def _resolve_escape(self) -> Optional[str]:
+        escape = self._escape_buffer
+        if escape[0] != 'u':
+            self._escape_buffer = None
+            return self._flush_surrogate() + _SIMPLE_ESCAPES.get(escape, escape)
+        if len(escape) < 5:
+            return None  # wait for the rest of the \uXXXX sequence
+        self._escape_buffer = None
+        code_point = chr(int(escape[1:], 16))
+        if 0xD800 <= ord(code_point) <= 0xDBFF:
+            pending = self._flush_surrogate()
+            self._high_surrogate = code_point
+            return pending or None
+        if 0xDC00 <= ord(code_point) <= 0xDFFF and self._high_surrogate is not None:
+            pair = self._high_surrogate + code_point
+            self._high_surrogate = None
+            return pair.encode("utf-16", "surrogatepass").decode("utf-16")
+        return self._flush_surrogate() + code_point
+
+    def _flush_surrogate(self) -> str:
+        if self._high_surrogate is None:
+            return ""
+        # An unpaired high surrogate; emit it as-is like json.loads would
+        orphan = self._high_surrogate
+        self._high_surrogate = None
+        return orphan
+
+
+class WhitespaceTrimmer:
+    """
+    Streaming equivalent of str.strip(): drops leading whitespace and holds back
+    trailing whitespace until more non-whitespace text arrives.
+    """
+
+    def __init__(self):
+        self._started = False
+        self._pending_whitespace = ""
+
+    def feed(self, text: str) -> str:
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return ""
+            self._started = True
+        stripped = text.rstrip()
+        if not stripped:
+            self._pending_whitespace += text
+            return ""
+        emitted = self._pending_whitespace + stripped
+        self._pending_whitespace = text[len(stripped):]
+        return emitted
+
+
+class StopSequenceScanner:
+    """
+    Finds the earliest occurrence of any stop sequence in text that arrives in chunks.
+
+    Text is released as soon as it can no longer be part of a stop sequence; a suffix that
+    could be the start of one is held back until the next chunk decides it. Used on a whole
+    response too, by feeding it as a single chunk.
+    """
+
+    def __init__(self, stop_sequences: Sequence[str]):
+        self.stop_sequences = [stop for stop in stop_sequences if stop]
+        self._pending = ""
+        self.stopped = False
+
+    def feed(self, text: str) -> Tuple[str, bool]:
+        """
+        Consume the next piece of text.
+
+        Args:
+            text: The next chunk of generated text
+
+        Returns:
+            A tuple of (text that is safe to emit, whether a stop sequence was found)
+        """
+        if self.stopped:
+            return "", True
+        combined = self._pending + text
+        stop_index = self._find_earliest_stop(combined)
+        if stop_index is not None:
+            self._pending = ""
+            self.stopped = True
+            return combined[:stop_index], True
+
+        hold_back = self._longest_partial_stop_suffix(combined)
+        self._pending = combined[len(combined) - hold_back:] if hold_back else ""
+        return combined[:len(combined) - hold_back], False
+
+    def flush(self) -> str:
+        """
+        Release any held-back text once the input is complete.
+        """
+        pending = self._pending
+        self._pending = ""
+        return pending
+
+    def _find_earliest_stop(self, text: str) -> Optional[int]:
+        earliest = None
+        for stop in self.stop_sequences:
+            index = text.find(stop)
+            if index != -1 and (earliest is None or index < earliest):
+                earliest = index
+        return earliest
+
+    def _longest_partial_stop_suffix(self, text: str) -> int:
+        longest = 0
+        for stop in self.stop_sequences:
+            for length in range(min(len(stop) - 1, len(text)), longest, -1):
+                if text.endswith(stop[:length]):
+                    longest = length
+                    break
+        return longest
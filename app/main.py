@@ -1,28 +1,238 @@
+import json
+import math
 import os
-import signal
-from fastapi import FastAPI, HTTPException, Depends
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-from app.schemas import ContinueConversationRequest, InitalizeCharactersRequest, Participant, Conversation
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from app.schemas import ContinueConversationRequest, InitalizeCharactersRequest, Participant, Conversation, AutoplayConversationRequest, CharacterPoolStats, ContinueSessionRequest, ContinueSessionResponse, ConversationTurnsPage
 from app.services.character_sandbox_service import CharacterSandboxService
+from app.services.character_pool import CharacterPool
+from app.services.compact_conversation import ConversationFormatError, parse_continue_conversation_request
+from app.services.conversation_store import ConversationStore
+from app.services.conversation_session_store import ConversationSessionStore, SessionConflictError, SessionNotFoundError
+from app.services.name_registry import NameRegistry
+from app.services.context_window import ContextWindowManager, extractive_summary
+from app.clients.chai_api_client import CHAIAPIClient
+from app.clients.completion_backend import CompletionBackend
+from app.clients.fake_backend import FakeCompletionBackend
+from app.clients.router import LatencyAwareRouter
+from app.clients.rate_limiter import AdaptiveRateLimiter, SharedAdaptiveRateLimiter
+from app.clients.response_cache import CachePolicy, ResponseCache
+from app.clients.hedging import RequestHedger
+from app.clients.circuit_breaker import CircuitOpenError
+from app.clients.scheduler import FairScheduler
+from app.clients.schemas.chai_schemas import CallSite, RequestPriority, ResponseCacheStats
+from app.utils.env_validator import get_env_int, get_env_float, get_env_bool
+from app.utils.sse import SSE_HEADERS, SSE_MEDIA_TYPE, format_sse_event
+from app.utils.deadline import Deadline, DeadlineExceededError
+from app.utils.responses import PydanticJSONResponse
+from app.utils.structured_logging import setup_logging
+from app.utils.static_files import InMemoryPage, PrecompressedStaticFiles
+from app.utils.admission import ARRIVED_AT_SCOPE_KEY, AdmissionControlMiddleware, AdmissionController
+from app.utils.metrics import ADMISSION_IN_FLIGHT_REQUESTS, ADMISSION_QUEUED_REQUESTS, CHAI_BACKEND_ERROR_RATE, CHAI_BACKEND_LATENCY_SECONDS, CHAI_REQUESTS_IN_FLIGHT, CHAI_SCHEDULER_QUEUED_REQUESTS, CONTENT_TYPE_LATEST, REGISTRY, MetricsMiddleware, generate_latest
 from dotenv import load_dotenv
 import logging
-from typing import List
+from typing import AsyncIterator, List, Optional
 
-# Load environment variables and setup logger
+# Load environment variables and route logging through a background writer thread
 load_dotenv()
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+setup_logging(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    json_format=os.getenv("LOG_FORMAT", "json").lower() != "text",
+    max_field_chars=get_env_int("LOG_MAX_FIELD_CHARS", 2000),
+)
 logger = logging.getLogger(__name__)
 
 def create_app() -> FastAPI:
     """Create and configure the FastAPI app."""
 
-    app = FastAPI(title="CHAI Agent Playground")
-    
+    # Process-wide limiter shared by every upstream CHAI call; adapts its rate to observed 429s
+    rate_limiter_settings = dict(
+        initial_rate=get_env_float("CHAI_RATE_LIMIT_INITIAL_RPS", 2.0),
+        min_rate=get_env_float("CHAI_RATE_LIMIT_MIN_RPS", 0.2),
+        max_rate=get_env_float("CHAI_RATE_LIMIT_MAX_RPS", 20.0),
+        burst=get_env_float("CHAI_RATE_LIMIT_BURST", 4.0),
+    )
+    # With several worker processes, the limiter's state is shared through a SQLite file so workers don't multiply 429s
+    rate_limit_state_path = os.getenv("CHAI_RATE_LIMIT_STATE_PATH")
+    rate_limiters = []
+
+    def make_rate_limiter(state_path_suffix: str = "") -> AdaptiveRateLimiter:
+        if rate_limit_state_path:
+            limiter = SharedAdaptiveRateLimiter(state_path=rate_limit_state_path + state_path_suffix, **rate_limiter_settings)
+        else:
+            limiter = AdaptiveRateLimiter(**rate_limiter_settings)
+        rate_limiters.append(limiter)
+        return limiter
+
+    # Opt-in cache of CHAI responses for the call sites listed in RESPONSE_CACHE_CALL_SITES
+    response_cache = None
+    if get_env_bool("RESPONSE_CACHE_ENABLED", False):
+        cached_call_sites = os.getenv("RESPONSE_CACHE_CALL_SITES", "")
+        response_cache = ResponseCache(
+            policies={CallSite(name.strip()): CachePolicy() for name in cached_call_sites.split(",") if name.strip()},
+            max_entries=get_env_int("RESPONSE_CACHE_MAX_ENTRIES", 1024),
+            max_bytes=get_env_int("RESPONSE_CACHE_MAX_BYTES", 8 * 1024 * 1024),
+            ttl_seconds=get_env_float("RESPONSE_CACHE_TTL_SECONDS", 3600.0),
+            db_path=os.getenv("RESPONSE_CACHE_DB_PATH") or None,
+        )
+
+    # Opt-in hedging: calls slower than the CHAI_HEDGE_PERCENTILE of recent calls are raced against a duplicate
+    hedger = None
+    if get_env_bool("CHAI_HEDGE_ENABLED", False):
+        hedger = RequestHedger(
+            percentile=get_env_float("CHAI_HEDGE_PERCENTILE", 0.95),
+            budget_ratio=get_env_float("CHAI_HEDGE_BUDGET_RATIO", 0.1),
+        )
+
+    # Upstream slots are shared fairly between sessions, and dialogue goes ahead of character generation
+    scheduler_concurrency = get_env_int("CHAI_SCHEDULER_MAX_CONCURRENCY", 16)
+    scheduler = None
+    if scheduler_concurrency > 0:
+        scheduler = FairScheduler(
+            max_concurrency=scheduler_concurrency,
+            weights={
+                RequestPriority.INTERACTIVE: get_env_int("CHAI_SCHEDULER_INTERACTIVE_WEIGHT", 4),
+                RequestPriority.BACKGROUND: get_env_int("CHAI_SCHEDULER_BACKGROUND_WEIGHT", 1),
+            },
+        )
+        for priority in RequestPriority:
+            CHAI_SCHEDULER_QUEUED_REQUESTS.labels(priority.value).set_function(lambda priority=priority: scheduler.queued(priority))
+
+    # Initialize a CHAI API client per endpoint. Each owns one connection pool for the lifetime of the app.
+    def make_chai_client(base_url: Optional[str], rate_limiter: AdaptiveRateLimiter) -> CHAIAPIClient:
+        return CHAIAPIClient(
+            base_url=base_url,
+            hedger=hedger,
+            circuit_breaker_failure_threshold=get_env_int("CHAI_CIRCUIT_BREAKER_FAILURE_THRESHOLD", 5) or None,
+            circuit_breaker_recovery_timeout=get_env_float("CHAI_CIRCUIT_BREAKER_RECOVERY_SECONDS", 30.0),
+            rate_limiter=rate_limiter,
+            response_cache=response_cache,
+            max_connections=get_env_int("CHAI_HTTP_MAX_CONNECTIONS", 100),
+            max_keepalive_connections=get_env_int("CHAI_HTTP_MAX_KEEPALIVE_CONNECTIONS", 20),
+            keepalive_expiry=get_env_float("CHAI_HTTP_KEEPALIVE_EXPIRY_SECONDS", 30.0),
+            max_connections_per_host=get_env_int("CHAI_HTTP_MAX_CONNECTIONS_PER_HOST", 0) or None,
+            http2=get_env_bool("CHAI_HTTP2_ENABLED", False),
+            upstream_stop_sequences=get_env_bool("CHAI_API_STOP_SEQUENCES_SUPPORTED", False),
+            scheduler=scheduler,
+        )
+
+    # The backend generating text: the CHAI API, several CHAI endpoints behind a latency-aware router,
+    # or an in-process fake for offline benchmarks
+    backend_name = os.getenv("CHAI_BACKEND", "chai").lower()
+    base_urls = [url.strip() for url in os.getenv("CHAI_API_BASE_URLS", "").split(",") if url.strip()]
+    if backend_name == "fake":
+        completion_backend: CompletionBackend = FakeCompletionBackend(latency=get_env_float("FAKE_BACKEND_LATENCY_SECONDS", 0.5))
+        logger.warning("Using the fake completion backend; responses are made up in-process")
+    elif backend_name != "chai":
+        raise ValueError(f"Unknown CHAI_BACKEND {backend_name!r}; expected 'chai' or 'fake'")
+    elif len(base_urls) > 1:
+        # Each endpoint is throttled separately, so each gets its own rate limiter
+        router = LatencyAwareRouter({url: make_chai_client(url, make_rate_limiter(f".{index}")) for index, url in enumerate(base_urls)})
+        for url, stats in router.stats.items():
+            CHAI_BACKEND_LATENCY_SECONDS.labels(url).set_function(lambda stats=stats: stats.latency or 0.0)
+            CHAI_BACKEND_ERROR_RATE.labels(url).set_function(lambda stats=stats: stats.error_rate)
+        completion_backend = router
+    else:
+        base_url = base_urls[0] if base_urls else os.getenv("CHAI_API_BASE_URL") or None
+        completion_backend = make_chai_client(base_url, make_rate_limiter())
+
+    # Read at scrape time so the hot path doesn't pay for a second counter
+    CHAI_REQUESTS_IN_FLIGHT.set_function(lambda: completion_backend.in_flight_requests)
+
     # Initialize the character sandbox service
-    character_sandbox_service = CharacterSandboxService()
+    character_sandbox_service = CharacterSandboxService(chai_client=completion_backend)
+
+    # Server-side sessions for clients that send conversation deltas instead of the full state
+    character_sandbox_service.session_store = ConversationSessionStore(
+        max_sessions=get_env_int("SESSION_STORE_MAX_SESSIONS", 1000),
+        ttl_seconds=get_env_float("SESSION_TTL_SECONDS", 3600.0),
+    )
+
+    # Recently generated names, used to seed name generation; bounded so it doesn't grow with every cast
+    character_sandbox_service.generated_character_names = NameRegistry(
+        capacity=get_env_int("CHARACTER_NAME_REGISTRY_CAPACITY", 1024),
+    )
+
+    # Budget for the chat history sent upstream; evicted middle turns are replaced by a rolling summary
+    character_sandbox_service.context_window = ContextWindowManager(
+        max_chars=get_env_int("CONTEXT_WINDOW_MAX_CHARS", 16000),
+        min_recent_turns=get_env_int("CONTEXT_WINDOW_MIN_RECENT_TURNS", 4),
+        summarizer=extractive_summary if get_env_bool("CONTEXT_WINDOW_SUMMARIZE", True) else None,
+    )
+
+    # Pre-generated characters so /initializeCharacters doesn't wait on the CHAI API
+    character_pool_size = get_env_int("CHARACTER_POOL_SIZE", 4)
+    character_pool = None
+    if character_pool_size > 0:
+        character_pool = CharacterPool(
+            character_sandbox_service,
+            capacity=character_pool_size,
+            db_path=os.getenv("CHARACTER_POOL_DB_PATH") or None,
+        )
+        character_sandbox_service.character_pool = character_pool
+
+    # Optional SQLite store that session conversations are written to in the background
+    conversation_db_path = os.getenv("CONVERSATION_DB_PATH")
+    conversation_store = None
+    if conversation_db_path:
+        conversation_store = ConversationStore(
+            conversation_db_path,
+            batch_size=get_env_int("CONVERSATION_STORE_BATCH_SIZE", 500),
+            flush_interval=get_env_float("CONVERSATION_STORE_FLUSH_SECONDS", 0.5),
+        )
+        character_sandbox_service.conversation_store = conversation_store
+
+    # Time each request may spend end to end, passed down to every CHAI call it makes
+    request_deadline_seconds = get_env_float("REQUEST_DEADLINE_SECONDS", 60.0)
+    autoplay_deadline_seconds = get_env_float("AUTOPLAY_DEADLINE_SECONDS", 300.0)
+
+    # Per-route concurrency and queue limits; requests that would wait past their deadline get a 503 straight away
+    admission_controllers = {}
+    admission_limits = [
+        ("CONVERSATION", ["/continueConversation", "/continueSession", "/continueConversationStream"], 64, 128, request_deadline_seconds),
+        ("AUTOPLAY", ["/autoplayConversation", "/autoplayConversationStream"], 8, 16, autoplay_deadline_seconds),
+        ("CHARACTERS", ["/initializeCharacters"], 16, 32, request_deadline_seconds),
+    ]
+    for group, routes, default_concurrency, default_queue, deadline_seconds in admission_limits:
+        max_concurrency = get_env_int(f"ADMISSION_{group}_MAX_CONCURRENCY", default_concurrency)
+        if max_concurrency <= 0:
+            continue
+        max_queue = get_env_int(f"ADMISSION_{group}_MAX_QUEUE", default_queue)
+        for route in routes:
+            controller = AdmissionController(route, max_concurrency, max_queue, deadline_seconds)
+            admission_controllers[route] = controller
+            ADMISSION_IN_FLIGHT_REQUESTS.labels(route).set_function(lambda controller=controller: controller.in_flight)
+            ADMISSION_QUEUED_REQUESTS.labels(route).set_function(lambda controller=controller: controller.queued)
+
+    # Uvicorn stops accepting connections and waits for open requests before running lifespan shutdown;
+    # this bounds how long shutdown then waits for CHAI calls not tied to a request (e.g. pool refills).
+    shutdown_drain_seconds = get_env_float("SHUTDOWN_DRAIN_SECONDS", 30.0)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await completion_backend.start()
+        if character_pool is not None:
+            await character_pool.start()
+        if conversation_store is not None:
+            await conversation_store.start()
+        yield
+        if character_pool is not None:
+            await character_pool.stop()
+        await completion_backend.drain(shutdown_drain_seconds)
+        await completion_backend.aclose()
+        if conversation_store is not None:
+            await conversation_store.stop()
+        for rate_limiter in rate_limiters:
+            if isinstance(rate_limiter, SharedAdaptiveRateLimiter):
+                rate_limiter.close()
+
+    app = FastAPI(title="CHAI Agent Playground", lifespan=lifespan)
+
+    # Admission control runs inside CORS, so 503s carry CORS headers too
+    if admission_controllers:
+        app.add_middleware(AdmissionControlMiddleware, controllers=admission_controllers)
 
     # CORS Middleware
     app.add_middleware(
@@ -33,31 +243,119 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
-    # Static file serving
+    # Latency, in-flight and payload size metrics for every route, exposed on /metrics
+    app.add_middleware(MetricsMiddleware)
+
+    # Static file serving; precompressed variants are generated at startup and index.html is kept in memory
     static_dir = "app/frontend/build/static"
     if not os.path.exists(static_dir):
         raise FileNotFoundError(f"Static directory '{static_dir}' does not exist.")
-    app.mount("/static", StaticFiles(directory=static_dir), name="static")
+    app.mount("/static", PrecompressedStaticFiles(directory=static_dir), name="static")
+    index_page = InMemoryPage("app/frontend/build/index.html")
+
+    # Upstream failures that aren't the request's fault
+    @app.exception_handler(DeadlineExceededError)
+    async def deadline_exceeded_handler(request: Request, exc: DeadlineExceededError) -> JSONResponse:
+        logger.error(f"Request to {request.url.path} ran out of time: {str(exc)}")
+        return JSONResponse(status_code=504, content={"detail": "Timed out waiting for the CHAI API"})
 
-    # Signal handlers for graceful shutdown
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+    @app.exception_handler(CircuitOpenError)
+    async def circuit_open_handler(request: Request, exc: CircuitOpenError) -> JSONResponse:
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "The CHAI API is unavailable; try again later"},
+            headers={"Retry-After": str(math.ceil(exc.retry_after))},
+        )
+
+    def stream_error_event(e: Exception, detail: str) -> str:
+        if isinstance(e, DeadlineExceededError):
+            detail = "Timed out waiting for the CHAI API"
+        elif isinstance(e, CircuitOpenError):
+            detail = "The CHAI API is unavailable; try again later"
+        return format_sse_event("error", raw_data=json.dumps({"detail": detail}))
+
+    def request_deadline(request: Request, seconds: float) -> Deadline:
+        # Counted from when the request arrived, so time spent in the admission queue comes out of the budget
+        return Deadline(seconds, started_at=request.scope.get(ARRIVED_AT_SCOPE_KEY))
+
+    def scheduling_session(request: Request) -> Optional[str]:
+        # Stateless routes have no session of their own; clients may name one, otherwise their address stands in
+        return request.headers.get("x-session-id") or (request.client.host if request.client else None)
 
     # Routes
-    @app.post("/initializeCharacters")
-    async def initialize_characters(request: InitalizeCharactersRequest) -> List[Participant]:
+    @app.post("/initializeCharacters", response_model=List[Participant])
+    async def initialize_characters(request: InitalizeCharactersRequest, http_request: Request) -> Response:
         """
           This API is invoked at the start of a conversation, to generate a cast of AI agents. 
         """
         try:
-            characters = await character_sandbox_service.initialize_characters(request)
-            return characters
+            characters = await character_sandbox_service.initialize_characters(request, request_deadline(http_request, request_deadline_seconds), scheduling_session(http_request))
+            return PydanticJSONResponse(characters)
+        except (DeadlineExceededError, CircuitOpenError):
+            raise
         except Exception as e:
             logger.error(f"Error initializing characters: {str(e)}")
             raise HTTPException(status_code=500, detail="Error initializing characters")
 
-    @app.post("/continueConversation")
-    async def continue_conversation(request: ContinueConversationRequest) -> Conversation:
+    @app.get("/characterPoolStats")
+    async def character_pool_stats() -> CharacterPoolStats:
+        """
+          Reports the depth and refill rate of the pre-generated character pool.
+        """
+        if character_pool is None:
+            raise HTTPException(status_code=404, detail="Character pool is disabled")
+        return character_pool.stats()
+
+    @app.get("/conversations/{conversation_id}/turns")
+    async def conversation_turns(
+        conversation_id: str,
+        before: Optional[int] = Query(default=None, ge=0, description="Return turns before this ordinal; omit for the most recent turns"),
+        limit: int = Query(default=50, ge=1, le=500),
+    ) -> ConversationTurnsPage:
+        """
+          Pages backwards through a stored session conversation, most recent turns first.
+          Session conversations are stored when CONVERSATION_DB_PATH is set; conversationId is the session ID.
+          Pass the returned nextBefore as `before` to load the preceding page.
+        """
+        if conversation_store is None:
+            raise HTTPException(status_code=404, detail="Conversation store is disabled")
+        page = await conversation_store.get_turns(conversation_id, before=before, limit=limit)
+        if page is None:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+        participants, turn_count, dialog_turns = page
+        first_ordinal = dialog_turns[0].ordinal if dialog_turns else 0
+        return ConversationTurnsPage(
+            conversationId=conversation_id,
+            participants=participants,
+            turnCount=turn_count,
+            dialogTurns=dialog_turns,
+            nextBefore=first_ordinal if first_ordinal > 0 else None,
+        )
+
+    @app.get("/responseCacheStats")
+    async def response_cache_stats() -> ResponseCacheStats:
+        """
+          Reports hit/miss/eviction counters of the CHAI API response cache.
+        """
+        if response_cache is None:
+            raise HTTPException(status_code=404, detail="Response cache is disabled")
+        return response_cache.stats()
+
+    @app.get("/metrics")
+    async def metrics() -> Response:
+        """
+          Exposes request latencies, CHAI API call latencies by call site, 429/retry/fallback counters
+          and in-flight gauges in the Prometheus text format.
+        """
+        return Response(content=generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
+    # The body is parsed by hand into a CompactConversation, so its schema is documented explicitly
+    @app.post(
+        "/continueConversation",
+        response_model=Conversation,
+        openapi_extra={"requestBody": {"required": True, "content": {"application/json": {"schema": {"$ref": "#/components/schemas/ContinueConversationRequest"}}}}},
+    )
+    async def continue_conversation(request: Request) -> Response:
         """
           At a high level, this simply takes in a <Conversation> (see section "data model" below) and returns an 
           updated <Conversation> containing additional <DialogTurns> that encode the AI's response to the most recent <DialogTurn>. 
@@ -67,23 +365,102 @@ def create_app() -> FastAPI:
           See readme.md section "Conversation flow" for more.
         """
         try:
-            updated_conversation = await character_sandbox_service.continue_conversation(request)
-            return updated_conversation
+            conversation = parse_continue_conversation_request(await request.body())
+        except ConversationFormatError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        try:
+            updated_conversation = await character_sandbox_service.continue_compact_conversation(conversation, request_deadline(request, request_deadline_seconds), scheduling_session(request))
+            return Response(content=updated_conversation.to_json_bytes(), media_type="application/json")
+        except (DeadlineExceededError, CircuitOpenError):
+            raise
         except Exception as e:
             logger.error(f"Error continuing conversation: {str(e)}")
             raise HTTPException(status_code=500, detail="Error continuing conversation")
 
-    @app.get("/")
-    def serve_root():
-        return FileResponse("app/frontend/build/index.html")
+    @app.post("/continueSession", response_model=ContinueSessionResponse)
+    async def continue_session(request: ContinueSessionRequest, http_request: Request) -> Response:
+        """
+          Delta-protocol variant of /continueConversation. The conversation is kept on the server in a session,
+          so clients send only their new <DialogTurns> and receive only the appended ones.
+          Send a full <Conversation> to start a new session. If the session has expired this returns
+          404 and the client should resend the full <Conversation>; 409 means the client's turns are out of sync.
+        """
+        try:
+            session_response = await character_sandbox_service.continue_session(request, request_deadline(http_request, request_deadline_seconds))
+            return PydanticJSONResponse(session_response)
+        except (DeadlineExceededError, CircuitOpenError):
+            raise
+        except SessionNotFoundError:
+            raise HTTPException(status_code=404, detail="Session not found; resend the full conversation")
+        except SessionConflictError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except Exception as e:
+            logger.error(f"Error continuing session: {str(e)}")
+            raise HTTPException(status_code=500, detail="Error continuing conversation")
 
-    return app
+    @app.post("/continueConversationStream")
+    async def continue_conversation_stream(request: ContinueConversationRequest, http_request: Request) -> StreamingResponse:
+        """
+          Streaming variant of /continueConversation, sent as Server-Sent Events.
+          Emits a "turn" event naming the next speaker, "delta" events carrying pieces of the new
+          <DialogTurn> content as they are generated, and a final "done" event with the updated <Conversation>.
+          If generation fails part way through, an "error" event is sent instead of "done".
+        """
+        deadline = request_deadline(http_request, request_deadline_seconds)
+        session_id = scheduling_session(http_request)
+
+        async def event_stream() -> AsyncIterator[str]:
+            try:
+                async for event, data in character_sandbox_service.continue_conversation_stream(request, deadline, session_id):
+                    yield format_sse_event(event, data)
+            except Exception as e:
+                logger.error(f"Error streaming conversation: {str(e)}")
+                yield stream_error_event(e, "Error continuing conversation")
+
+        return StreamingResponse(event_stream(), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
+
+    @app.post("/autoplayConversation", response_model=Conversation)
+    async def autoplay_conversation(request: AutoplayConversationRequest, http_request: Request) -> Response:
+        """
+          Generates `turns` consecutive AI <DialogTurns> in one request, running speaker selection and generation
+          on the server instead of round tripping the growing <Conversation> through the client for every turn.
+          Returns the updated <Conversation>.
+        """
+        try:
+            updated_conversation = await character_sandbox_service.autoplay_conversation(request, request_deadline(http_request, autoplay_deadline_seconds), scheduling_session(http_request))
+            return PydanticJSONResponse(updated_conversation)
+        except (DeadlineExceededError, CircuitOpenError):
+            raise
+        except Exception as e:
+            logger.error(f"Error autoplaying conversation: {str(e)}")
+            raise HTTPException(status_code=500, detail="Error autoplaying conversation")
+
+    @app.post("/autoplayConversationStream")
+    async def autoplay_conversation_stream(request: AutoplayConversationRequest, http_request: Request) -> StreamingResponse:
+        """
+          Streaming variant of /autoplayConversation, sent as Server-Sent Events.
+          Emits a "turn" event with each <DialogTurn> as soon as it is generated, then a "done" event with the
+          updated <Conversation>. If generation fails part way through, an "error" event is sent instead of "done".
+        """
+        deadline = request_deadline(http_request, autoplay_deadline_seconds)
+        session_id = scheduling_session(http_request)
 
+        async def event_stream() -> AsyncIterator[str]:
+            try:
+                async for dialog_turn in character_sandbox_service.autoplay_conversation_turns(request, deadline, session_id):
+                    yield format_sse_event("turn", dialog_turn)
+                yield format_sse_event("done", request.conversation)
+            except Exception as e:
+                logger.error(f"Error streaming autoplay conversation: {str(e)}")
+                yield stream_error_event(e, "Error autoplaying conversation")
 
-def signal_handler(sig, frame):
-    """Handle termination signals for graceful shutdown."""
-    logger.info("Signal received. Shutting down...")
-    os._exit(0)  # Exit the application gracefully
+        return StreamingResponse(event_stream(), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
+
+    @app.get("/")
+    def serve_root(request: Request) -> Response:
+        return index_page.response(request)
+
+    return app
 
 
 # Create the app instance
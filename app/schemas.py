@@ -1,6 +1,6 @@
 # schemas.py
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from pydantic import Field
 
 class InitalizeCharactersRequest(BaseModel):
@@ -37,4 +37,64 @@ class ContinueConversationRequest(BaseModel):
     """
     Updates the conversation state with a new dialog turn.
     """
-    conversation: Conversation
\ No newline at end of file
+    conversation: Conversation
+
+class AutoplayConversationRequest(BaseModel):
+    """
+    Generates several consecutive AI dialog turns on the server in a single request.
+    """
+    conversation: Conversation
+    turns: int = Field(ge=1, le=20, description="The number of AI dialog turns to generate")
+
+
+class CharacterPoolStats(BaseModel):
+    """
+    Depth and refill statistics for the pre-generated character pool.
+    """
+    depth: int
+    capacity: int
+    hits: int
+    misses: int
+    generatedTotal: int
+    failedTotal: int
+    refillRatePerMinute: float
+
+
+class ContinueSessionRequest(BaseModel):
+    """
+    Delta variant of ContinueConversationRequest for server-side sessions.
+    Clients send only the dialog turns added since their last request. The full conversation is
+    only sent to start a session, or again if the server reports the session as missing.
+    """
+    sessionId: Optional[str] = None
+    knownTurnCount: Optional[int] = Field(default=None, ge=0, description="Number of dialog turns the client held before newDialogTurns")
+    newDialogTurns: List[DialogTurn] = []
+    conversation: Optional[Conversation] = None
+
+class ContinueSessionResponse(BaseModel):
+    """
+    The dialog turns appended to a session's conversation.
+    The client replaces its dialog turns from index `offset` onwards with `dialogTurns`.
+    """
+    sessionId: str
+    offset: int
+    dialogTurns: List[DialogTurn]
+    turnCount: int
+
+
+class StoredDialogTurn(DialogTurn):
+    """
+    A dialog turn read back from the conversation store, with its position in the conversation.
+    """
+    ordinal: int
+
+class ConversationTurnsPage(BaseModel):
+    """
+    A page of a stored conversation's dialog turns, in conversation order.
+    To read further back, request the page before `nextBefore`; it is None once the first turn has been returned.
+    """
+    conversationId: str
+    participants: List[Participant]
+    turnCount: int
+    dialogTurns: List[StoredDialogTurn]
+    nextBefore: Optional[int] = None
@@ -0,0 +1,73 @@
+"""
+Entrypoint for serving the app from several worker processes.
+
+On SIGINT/SIGTERM, uvicorn stops accepting connections and gives open requests up to
+--graceful-shutdown-seconds to finish. Each worker's lifespan shutdown then drains any
+remaining CHAI API calls (see SHUTDOWN_DRAIN_SECONDS). With more than one worker, the CHAI
+rate limiter's state is shared through a SQLite file, so all workers back off together on 429s.
+
+Usage:
+    python -m app.serve --workers 4 --port 8000
+"""
+import argparse
+import logging
+import os
+import tempfile
+import uvicorn
+from dotenv import load_dotenv
+from app.utils.env_validator import get_env_float, get_env_int
+from app.utils.structured_logging import setup_logging
+
+logger = logging.getLogger(__name__)
+
+def main() -> None:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=get_env_int("PORT", 8000))
+    parser.add_argument("--workers", type=int, default=get_env_int("WEB_CONCURRENCY", 1), help="number of worker processes")
+    parser.add_argument(
+        "--graceful-shutdown-seconds",
+        type=float,
+        default=get_env_float("GRACEFUL_SHUTDOWN_SECONDS", 30.0),
+        help="how long open requests get to finish after a shutdown signal",
+    )
+    args = parser.parse_args()
+
+    temporary_state_path = None
+    if args.workers > 1 and not os.getenv("CHAI_RATE_LIMIT_STATE_PATH"):
+        # Workers inherit the environment, so they all find the same file
+        temporary_state_path = os.path.join(tempfile.gettempdir(), f"chai-rate-limiter-{os.getpid()}.sqlite3")
+        os.environ["CHAI_RATE_LIMIT_STATE_PATH"] = temporary_state_path
+    if os.getenv("CHAI_RATE_LIMIT_STATE_PATH"):
+        logger.info(f"Sharing CHAI rate limiter state between workers through {os.environ['CHAI_RATE_LIMIT_STATE_PATH']}")
+
+    try:
+        uvicorn.run(
+            "app.main:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            timeout_graceful_shutdown=args.graceful_shutdown_seconds,
+        )
+    finally:
+        if temporary_state_path is not None:
+            remove_sqlite_files(temporary_state_path)
+
+
+def remove_sqlite_files(path: str) -> None:
+    """
+    Delete a SQLite database file along with its WAL and shared-memory files, if they exist.
+    """
+    for file_path in (path, f"{path}-wal", f"{path}-shm"):
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove {file_path}: {str(e)}")
+
+
+if __name__ == "__main__":
+    setup_logging(os.getenv("LOG_LEVEL", "INFO"), json_format=os.getenv("LOG_FORMAT", "json").lower() != "text")
+    main()
@@ -0,0 +1,197 @@
+"""
+Pre-warmed pool of generated AI characters.
+"""
+import asyncio
+import logging
+import sqlite3
+import time
+from collections import deque
+from contextlib import closing
+from typing import TYPE_CHECKING, Collection, Deque, List, Optional, Tuple
+from app.schemas import CharacterPoolStats, Participant
+from app.services.name_registry import normalize_name
+
+if TYPE_CHECKING:
+    from app.services.character_sandbox_service import CharacterSandboxService
+
+logger = logging.getLogger(__name__)
+
+# Refill calls are scheduled as one session of background work, taking turns with live requests
+CHARACTER_POOL_SESSION = "character_pool"
+
+class CharacterPool:
+    """
+    Bounded pool of ready-made AI Participants, refilled in the background.
+
+    A producer task started with start() generates characters with the service's
+    _generate_character while the CHAI client is otherwise idle, until the pool is full.
+    initialize_characters pops from the pool and only generates live when it is empty.
+    If db_path is given, the pool is persisted to a SQLite file so it survives restarts.
+    """
+
+    def __init__(
+        self,
+        character_sandbox_service: "CharacterSandboxService",
+        capacity: int = 4,
+        db_path: Optional[str] = None,
+        idle_poll_interval: float = 1.0,
+        failure_backoff_seconds: float = 30.0,
+        refill_rate_window_seconds: float = 300.0,
+    ):
+        if capacity < 1:
+            raise ValueError("Character pool capacity must be at least 1")
+        self.character_sandbox_service = character_sandbox_service
+        self.capacity = capacity
+        self.db_path = db_path
+        self.idle_poll_interval = idle_poll_interval
+        self.failure_backoff_seconds = failure_backoff_seconds
+        self.refill_rate_window_seconds = refill_rate_window_seconds
+
+        # Each entry is (sqlite row id or None, participant)
+        self._participants: Deque[Tuple[Optional[int], Participant]] = deque()
+        self._space_available = asyncio.Event()
+        self._producer_task: Optional[asyncio.Task] = None
+        self._refill_timestamps: Deque[float] = deque()
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.generated_total = 0
+        self.failed_total = 0
+
+    def __len__(self) -> int:
+        return len(self._participants)
+
+    async def start(self) -> None:
+        """
+        Load any persisted characters and start the background producer.
+        """
+        if self._producer_task is not None:
+            return
+        if self.db_path:
+            persisted = await asyncio.to_thread(self._load_persisted)
+            self._participants.extend(persisted)
+            logger.info(f"Loaded {len(self._participants)} pooled characters from {self.db_path}")
+        self._space_available.set()
+        self._producer_task = asyncio.create_task(self._produce())
+        logger.info(f"Character pool started with capacity {self.capacity}")
+
+    async def stop(self) -> None:
+        """
+        Stop the background producer. Pooled characters stay persisted if a db_path was given.
+        """
+        if self._producer_task is None:
+            return
+        self._producer_task.cancel()
+        try:
+            await self._producer_task
+        except asyncio.CancelledError:
+            pass
+        self._producer_task = None
+        logger.info("Character pool stopped")
+
+    async def pop(self, excluded_names: Collection[str] = ()) -> Optional[Participant]:
+        """
+        Take a ready character out of the pool.
+
+        Args:
+            excluded_names: Normalized names already in use; characters with one of these names
+                are left in the pool for another cast
+
+        Returns:
+            The oldest pooled Participant whose name isn't excluded, or None if there is none
+        """
+        for index, (row_id, participant) in enumerate(self._participants):
+            if normalize_name(participant.name) not in excluded_names:
+                break
+        else:
+            self.misses += 1
+            return None
+        del self._participants[index]
+        self.hits += 1
+        self._space_available.set()
+        if row_id is not None:
+            try:
+                await asyncio.to_thread(self._delete_persisted, row_id)
+            except sqlite3.Error as e:
+                # The character is already out of the pool; at worst it is served again after a restart
+                logger.error(f"Error deleting pooled character {participant.name} from the pool file: {str(e)}")
+        return participant
+
+    def stats(self) -> CharacterPoolStats:
+        """
+        Returns the current pool depth and refill statistics.
+        """
+        self._trim_refill_timestamps(time.monotonic())
+        window_minutes = self.refill_rate_window_seconds / 60
+        return CharacterPoolStats(
+            depth=len(self._participants),
+            capacity=self.capacity,
+            hits=self.hits,
+            misses=self.misses,
+            generatedTotal=self.generated_total,
+            failedTotal=self.failed_total,
+            refillRatePerMinute=len(self._refill_timestamps) / window_minutes,
+        )
+
+    async def _produce(self) -> None:
+        index = 0
+        while True:
+            if len(self._participants) >= self.capacity:
+                self._space_available.clear()
+                await self._space_available.wait()
+                continue
+
+            # Only refill while no live requests are waiting on the CHAI API
+            if self.character_sandbox_service.chai_client.in_flight_requests > 0:
+                await asyncio.sleep(self.idle_poll_interval)
+                continue
+
+            participant, _ = await self.character_sandbox_service._generate_character(index, session_id=CHARACTER_POOL_SESSION)
+            index += 1
+            if self.character_sandbox_service.is_fallback_character(participant):
+                # Generation failed; don't pool placeholder characters
+                self.failed_total += 1
+                await asyncio.sleep(self.failure_backoff_seconds)
+                continue
+
+            try:
+                row_id = await asyncio.to_thread(self._persist, participant) if self.db_path else None
+            except sqlite3.Error as e:
+                logger.error(f"Error persisting pooled character {participant.name}: {str(e)}")
+                row_id = None
+            self._participants.append((row_id, participant))
+            self.generated_total += 1
+            now = time.monotonic()
+            self._refill_timestamps.append(now)
+            self._trim_refill_timestamps(now)
+            logger.info(f"Character pool refilled with {participant.name} ({len(self._participants)}/{self.capacity})")
+
+    def _trim_refill_timestamps(self, now: float) -> None:
+        while self._refill_timestamps and now - self._refill_timestamps[0] > self.refill_rate_window_seconds:
+            self._refill_timestamps.popleft()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS pooled_characters ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, backstory TEXT NOT NULL)"
+        )
+        return connection
+
+    def _load_persisted(self) -> List[Tuple[Optional[int], Participant]]:
+        with closing(self._connect()) as connection, connection:
+            rows = connection.execute("SELECT id, name, backstory FROM pooled_characters ORDER BY id").fetchall()
+        return [(row_id, Participant(type="AI", name=name, backstory=backstory)) for row_id, name, backstory in rows]
+
+    def _persist(self, participant: Participant) -> int:
+        with closing(self._connect()) as connection, connection:
+            cursor = connection.execute(
+                "INSERT INTO pooled_characters (name, backstory) VALUES (?, ?)",
+                (participant.name, participant.backstory),
+            )
+            return cursor.lastrowid
+
+    def _delete_persisted(self, row_id: int) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM pooled_characters WHERE id = ?", (row_id,))
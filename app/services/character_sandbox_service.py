@@ -1,23 +1,63 @@
 import logging
 import asyncio
+import contextlib
 import re
-from typing import List, Tuple
-from app.schemas import ContinueConversationRequest, Participant, Conversation, InitalizeCharactersRequest, DialogTurn
+from typing import TYPE_CHECKING, AsyncIterator, List, Optional, Set, Tuple, Union
+from pydantic import BaseModel
+from app.schemas import ContinueConversationRequest, Participant, Conversation, InitalizeCharactersRequest, DialogTurn, AutoplayConversationRequest, ContinueSessionRequest, ContinueSessionResponse
+from app.services.context_window import BACKSTORY_MESSAGE_PREFIX, ContextWindowManager
+from app.services.compact_conversation import CompactConversation
+from app.services.mention_index import get_mention_index
+from app.services.name_registry import NameRegistry, normalize_name
+from app.services.conversation_store import ConversationStore
+from app.services.conversation_session_store import ConversationSessionStore, SessionConflictError, SessionNotFoundError
 from app.utils.env_validator import validate_chai_api_key
+from app.utils.metrics import FALLBACK_CHARACTERS_TOTAL
+from app.utils.deadline import Deadline
+from app.utils.structured_logging import truncate_for_log
 from app.clients.chai_api_client import CHAIAPIClient
+from app.clients.completion_backend import CompletionBackend
+from app.clients.schemas.chai_schemas import CallSite
+from app.clients.streaming import StopSequenceScanner
+
+if TYPE_CHECKING:
+    from app.services.character_pool import CharacterPool
 
 logger = logging.getLogger(__name__)
 
+# Backstory given to placeholder characters when generation fails
+FALLBACK_CHARACTER_BACKSTORY = "A mysterious character from a fantasy world."
+
+# Name generations tried before a name already in the cast is made unique with a number
+MAX_NAME_ATTEMPTS = 3
+
+# Generated names are cut at the first of these; see post_process_character_name_generation_response
+CHARACTER_NAME_STOP_SEQUENCES = [".", "*", "Jason", "<", " "]
+
+# Generated dialogue is cut at the first of these; see post_process_continue_conversation_response
+CONTINUE_CONVERSATION_STOP_SEQUENCES = ["USER", ":"]
+
+# The service's continuation logic works on either representation
+AnyConversation = Union[Conversation, CompactConversation]
+
 class CharacterSandboxService:
     """
     Service for handling character sandbox operations.
     """
     
-    def __init__(self):
+    def __init__(self, chai_client: Optional[CompletionBackend] = None):
         self.api_key = validate_chai_api_key()
-        self.chai_client = CHAIAPIClient()
-        self.REQUEST_STAGGER_TIME_SECONDS = 5
-        self.generated_character_names: List[str] = []
+        self.chai_client = chai_client if chai_client is not None else CHAIAPIClient()
+        # Recently generated names; bounded, so it doesn't grow with every cast the process generates
+        self.generated_character_names = NameRegistry()
+        # Optional pool of pre-generated characters, attached by create_app
+        self.character_pool: Optional["CharacterPool"] = None
+        # Server-side conversation sessions for clients using the delta protocol
+        self.session_store = ConversationSessionStore()
+        # Optional persistent store that session conversations are written to, attached by create_app
+        self.conversation_store: Optional[ConversationStore] = None
+        # Keeps the chat history sent upstream within a budget
+        self.context_window: Optional[ContextWindowManager] = ContextWindowManager()
     
     def post_process_character_name_generation_response(self, response: str) -> str:
         """
@@ -32,7 +72,7 @@ class CharacterSandboxService:
         character_name = re.split(r'\.|\*|Jason|<| ', response)[0]  # Extract the name before any additional text
         character_name = character_name.replace('"', '').replace("'", "") # make sure it's not wrapped in quotes
         
-        self.generated_character_names.append(character_name)
+        self.generated_character_names.add(character_name)
         return character_name
     
     def post_process_continue_conversation_response(self, response: str) -> str:
@@ -51,37 +91,58 @@ class CharacterSandboxService:
             response = re.split(':', response)[0]
         return response
     
-    async def _generate_character(self, index: int) -> Tuple[Participant, int]:
+    async def _generate_character(
+        self,
+        index: int,
+        deadline: Optional[Deadline] = None,
+        cast_names: Optional[Set[str]] = None,
+        session_id: Optional[str] = None,
+        cast_lock: Optional[asyncio.Lock] = None
+    ) -> Tuple[Participant, int]:
         """
         Generate a complete character (name and backstory) using the CHAI API.
-        The API uses a staggered approach to avoid 429 errors due to rate limits.
-        The stagger time was set to 5 seconds, but this can be adjusted if we can reduce the throttling
+        Pacing against the API's rate limits is handled by the CHAI client's shared rate limiter,
+        so characters are generated as fast as the upstream allows.
         
         Args:
             index: The index of the character being generated
+            deadline: The request's deadline, if any; a placeholder character is returned if it runs out
+            cast_names: Normalized names already in the cast; a name in it is regenerated, and the new name is added
+            session_id: The session the request belongs to, for fair scheduling of upstream calls
+            cast_lock: Held while generating the name, so the cast's names are generated one at a time,
+                each seeded with the one before; other casts and pool refills aren't held up
             
         Returns:
             A tuple containing the generated Participant and the original index
         """
         try:
-            if index > 0:
-              await asyncio.sleep(self.REQUEST_STAGGER_TIME_SECONDS * index)
-              
             # Generate character name
-            response_from_charAI_link1 = await self.chai_client.invoke_llm(
-                prompt="An engaging texting conversation between Jason and Brian, an author and his cowriter. Jason is working on a new fantasy novel, and he comes to Brian when he needs help coming up with character names.",
-                character_1_name="Brian",
-                character_2_name="Jason",
-                chat_history=[
-                  {"sender": "Jason", "message": "Hey Brian, I need your help coming up with some characters for my new novel. Can you make up new character's name? Just the name, please."},
-                  {"sender": "Brian", "message": self.generated_character_names[-1] if self.generated_character_names else "Seraphina Vale."}, # hack to prevent the same name from being generated twice (LLM temperature/top_p is not a parameter which can be set via API). This amounts to a RANDOM_SEED in the LLM input.
-                  {"sender": "Jason", "message": "Perfect! One more... just the first name and last name, please."},
-                ]
-            )
-
-            character_name = self.post_process_character_name_generation_response(response_from_charAI_link1)
+            async with cast_lock if cast_lock is not None else contextlib.nullcontext():
+                for _ in range(MAX_NAME_ATTEMPTS):
+                    response_from_charAI_link1 = await self.chai_client.invoke_llm(
+                        prompt="An engaging texting conversation between Jason and Brian, an author and his cowriter. Jason is working on a new fantasy novel, and he comes to Brian when he needs help coming up with character names.",
+                        character_1_name="Brian",
+                        character_2_name="Jason",
+                        chat_history=[
+                          {"sender": "Jason", "message": "Hey Brian, I need your help coming up with some characters for my new novel. Can you make up new character's name? Just the name, please."},
+                          {"sender": "Brian", "message": self.generated_character_names.last() or "Seraphina Vale."}, # hack to prevent the same name from being generated twice (LLM temperature/top_p is not a parameter which can be set via API). This amounts to a RANDOM_SEED in the LLM input.
+                          {"sender": "Jason", "message": "Perfect! One more... just the first name and last name, please."},
+                        ],
+                        call_site=CallSite.CHARACTER_NAME,
+                        deadline=deadline,
+                        stop_sequences=CHARACTER_NAME_STOP_SEQUENCES,
+                        session_id=session_id
+                    )
 
-            await asyncio.sleep(self.REQUEST_STAGGER_TIME_SECONDS * 2)
+                    character_name = self.post_process_character_name_generation_response(response_from_charAI_link1)
+                    if cast_names is None or normalize_name(character_name) not in cast_names:
+                        break
+                    # The duplicate is now the seed, so the next attempt sends a different request
+                    logger.info(f"Regenerating character name {character_name}, already taken in this cast")
+                else:
+                    character_name = f"{character_name} {index + 1}"
+                if cast_names is not None:
+                    cast_names.add(normalize_name(character_name))
 
             # Generate character backstory
             response_from_charAI_link2 = await self.chai_client.invoke_llm(
@@ -92,7 +153,10 @@ class CharacterSandboxService:
                   {"sender": "Jason", "message": "Hey Brian, I need your help coming up with a backstory for a new character in my fantasy novel. Name: Seraphina Vale. Make up this character's backstory, and key attributes!"},
                   {"sender": "Brian", "message": "Seraphina is a half-angel, half-human warrior born in the celestial realm of Valoria. She was exiled from Valoria at a young age due to her rebellious nature and powerful magic which threatened the angelic rulers there."},
                   {"sender": "Jason", "message": f"Amazing!, Ok, now one more. Name: {character_name}."}
-                ]
+                ],
+                call_site=CallSite.CHARACTER_BACKSTORY,
+                deadline=deadline,
+                session_id=session_id
             )
             
             logger.info(f"Generated character backstory for {character_name}")
@@ -107,17 +171,24 @@ class CharacterSandboxService:
             )
         except Exception as e:
             logger.error(f"Error generating character {index+1}: {str(e)}")
+            FALLBACK_CHARACTERS_TOTAL.inc()
             # Return a default character in case of error
             return (
                 Participant(
                     type="AI",
                     name=f"Character{index+1}",
-                    backstory=f"A mysterious character from a fantasy world."
+                    backstory=FALLBACK_CHARACTER_BACKSTORY
                 ),
                 index
             )
     
-    async def initialize_characters(self, request: InitalizeCharactersRequest) -> List[Participant]:
+    def is_fallback_character(self, participant: Participant) -> bool:
+        """
+        Whether the participant is the placeholder returned by _generate_character when generation failed.
+        """
+        return participant.backstory == FALLBACK_CHARACTER_BACKSTORY
+    
+    async def initialize_characters(self, request: InitalizeCharactersRequest, deadline: Optional[Deadline] = None, session_id: Optional[str] = None) -> List[Participant]:
         logger.info(f"Initializing {request.count} characters with userEngagement={request.userEngagementEnabled}")
         
         participants = []
@@ -131,10 +202,26 @@ class CharacterSandboxService:
                 )
             )
         
-        # Create tasks for generating characters with a 1-second delay between each
+        # Names must be unique within the cast; speakers are told apart by name
+        cast_names = {normalize_name(participant.name) for participant in participants}
+
+        # Take ready-made characters from the pool first
+        pooled_count = 0
+        if self.character_pool is not None:
+            while pooled_count < request.count:
+                participant = await self.character_pool.pop(excluded_names=cast_names)
+                if participant is None:
+                    break
+                cast_names.add(normalize_name(participant.name))
+                participants.append(participant)
+                pooled_count += 1
+            logger.info(f"Took {pooled_count} of {request.count} characters from the character pool")
+        
+        # Create tasks for generating the remaining characters; the CHAI client's rate limiter paces the upstream calls
+        cast_lock = asyncio.Lock()
         character_tasks = []
-        for i in range(request.count):
-            task = asyncio.create_task(self._generate_character(i))
+        for i in range(pooled_count, request.count):
+            task = asyncio.create_task(self._generate_character(i, deadline, cast_names, session_id, cast_lock))
             character_tasks.append(task)
         
         # Wait for all character generation tasks to complete
@@ -150,7 +237,7 @@ class CharacterSandboxService:
         logger.info(f"service initialize_characters returning {len(participants)} participants")
         return participants
     
-    def _determine_next_speaker(self, conversation: Conversation) -> Participant:
+    def _determine_next_speaker(self, conversation: AnyConversation) -> Participant:
         """
         Determine which character should speak next in the conversation.
         
@@ -180,8 +267,12 @@ class CharacterSandboxService:
         most_recent_turn = conversation.dialogTurns[-1]
         most_recent_speaker_name = most_recent_turn.participant
         
+        # One matcher per cast, scanning each message for every name in a single pass
+        mention_index = get_mention_index(frozenset(p.name for p in ai_participants))
+        
         # Check if the most recent message mentions or addresses another character
         # This is a simple implementation - just check if any character's name is in the message
+        most_recent_mentions = mention_index.mentions(most_recent_turn.content)
         mentioned_participants = []
         for participant in ai_participants:
             # Skip the most recent speaker
@@ -189,7 +280,7 @@ class CharacterSandboxService:
                 continue
                 
             # Check if this participant's name is mentioned in the most recent message
-            if participant.name in most_recent_turn.content:
+            if participant.name in most_recent_mentions:
                 mentioned_participants.append(participant)
         
         # If any characters were mentioned, choose one of them
@@ -207,9 +298,7 @@ class CharacterSandboxService:
             recently_mentioned_names.add(turn.participant)
             
             # Check for mentions of other characters in the content
-            for participant in ai_participants:
-                if participant.name in turn.content:
-                    recently_mentioned_names.add(participant.name)
+            recently_mentioned_names.update(mention_index.mentions(turn.content))
         
         # Find characters who haven't been mentioned recently
         not_recently_mentioned = [p for p in ai_participants if p.name not in recently_mentioned_names]
@@ -227,7 +316,7 @@ class CharacterSandboxService:
             
         return random.choice(available_speakers) if available_speakers else random.choice(ai_participants)
     
-    def _format_chat_history(self, conversation: Conversation) -> list:
+    def _format_chat_history(self, conversation: AnyConversation) -> list:
         """
         Format the conversation's dialog turns into the format expected by the CHAI API.
         
@@ -237,6 +326,9 @@ class CharacterSandboxService:
         Returns:
             A list of dictionaries with 'sender' and 'message' keys
         """
+        if isinstance(conversation, CompactConversation):
+            return conversation.chat_history()
+        
         chat_history = []
         
         for turn in conversation.dialogTurns:
@@ -247,7 +339,7 @@ class CharacterSandboxService:
             
         return chat_history
     
-    def _generate_prompt(self, conversation: Conversation) -> str:
+    def _generate_prompt(self, conversation: AnyConversation) -> str:
         """
         Generate a prompt for the CHAI API based on the participants in the conversation.
         
@@ -269,12 +361,20 @@ class CharacterSandboxService:
             characters_str = ", ".join(character_names[:-1]) + " and " + character_names[-1] if len(character_names) > 1 else character_names[0]
             return f"A dialogue amongst fantasy characters in a magical realm. {characters_str}."
     
-    def _get_most_recent_speaker(self, conversation: Conversation) -> str:        
+    def _get_most_recent_speaker(self, conversation: AnyConversation) -> str:        
         return conversation.dialogTurns[-1].participant
     
-    async def continue_conversation(self, request: ContinueConversationRequest) -> Conversation:
-        conversation = request.conversation
+    def _prepare_continuation(self, conversation: AnyConversation) -> Tuple[Participant, str, str, List[dict]]:
+        """
+        Work out everything needed to ask the CHAI API for the next dialog turn.
+        On the first turns of a conversation this also bootstraps the backstory dialog turns.
         
+        Args:
+            conversation: The current conversation state (updated in place with any bootstrap turns)
+            
+        Returns:
+            A tuple of (next speaker, prompt, most recent speaker name, chat history)
+        """
         # 1. Determine who should speak next. This will end up as the character_1_name in the CHAI API client request.
         next_speaker = self._determine_next_speaker(conversation)
         
@@ -289,7 +389,7 @@ class CharacterSandboxService:
             
             for participant in ai_participants:
                 # Create a message where the character acknowledges their backstory
-                backstory_message = f"This is what I know about myself: {participant.backstory}.. Allow me to introduce myself."
+                backstory_message = f"{BACKSTORY_MESSAGE_PREFIX} {participant.backstory}.. Allow me to introduce myself."
                 
                 # Add it to the chat history
                 chat_history.insert(0, {
@@ -310,34 +410,236 @@ class CharacterSandboxService:
               # Add a dialogue turn where the user introduces themselves.
               chat_history.insert(0, {
                   "sender": "Stranger",
-                  "message": "This is what I know about myself: Nothing is known about me. I'm a stranger"
+                  "message": f"{BACKSTORY_MESSAGE_PREFIX} Nothing is known about me. I'm a stranger"
               })
         
+        # Keep long conversations within the context budget (backstories and recent turns are always kept)
+        if self.context_window is not None:
+            chat_history = self.context_window.fit(chat_history)
+        
         # 3. Generate an appropriate prompt
         prompt = self._generate_prompt(conversation)
         
         # 4. Determine the most recent speaker (for CHAI API parameters)
         most_recent_speaker = self._get_most_recent_speaker(conversation)
         
-        logger.info(f"Continuing conversation with next speaker: {next_speaker.name}")
-        logger.info(f"Chat history: {chat_history}")
+        logger.info("Continuing conversation", extra={"next_speaker": next_speaker.name, "chat_history_turns": len(chat_history)})
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Chat history", extra={"chat_history": truncate_for_log(chat_history)})
+        
+        return next_speaker, prompt, most_recent_speaker, chat_history
+    
+    async def continue_conversation(self, request: ContinueConversationRequest, deadline: Optional[Deadline] = None, session_id: Optional[str] = None) -> Conversation:
+        conversation = request.conversation
+        
+        await self._continue_once(conversation, deadline, session_id)
+        
+        return conversation
+    
+    async def continue_compact_conversation(self, conversation: CompactConversation, deadline: Optional[Deadline] = None, session_id: Optional[str] = None) -> CompactConversation:
+        """
+        Variant of continue_conversation for a conversation parsed straight from the request body,
+        which skips building a pydantic model per dialog turn.
+        
+        Args:
+            conversation: The current conversation state (updated in place)
+            deadline: The request's deadline, if any
+            session_id: The session the request belongs to, for fair scheduling of upstream calls
+            
+        Returns:
+            The updated conversation
+        """
+        await self._continue_once(conversation, deadline, session_id)
+        
+        return conversation
+    
+    async def continue_session(self, request: ContinueSessionRequest, deadline: Optional[Deadline] = None) -> ContinueSessionResponse:
+        """
+        Delta-protocol variant of continue_conversation backed by a server-side session.
+        
+        The client's new dialog turns are appended to the stored conversation, the next turn is
+        generated, and only the turns the client doesn't have yet are returned.
+        
+        Args:
+            request: The session ID and new dialog turns, or a full conversation to start a new session from
+            deadline: The request's deadline, if any
+            
+        Returns:
+            The session ID and the appended dialog turns
+            
+        Raises:
+            SessionNotFoundError: If the session is missing and no full conversation was sent
+            SessionConflictError: If knownTurnCount doesn't match the stored conversation
+        """
+        if request.conversation is not None:
+            # A full conversation (re)starts the session from the client's state
+            session = self.session_store.create(request.conversation)
+            logger.info(f"Started conversation session {session.session_id}")
+        elif request.sessionId is not None:
+            session = self.session_store.get(request.sessionId)
+        else:
+            raise SessionNotFoundError(None)
+        
+        if deadline is not None:
+            await deadline.run(session.lock.acquire())
+        else:
+            await session.lock.acquire()
+        try:
+            dialog_turns = session.conversation.dialogTurns
+            if request.knownTurnCount is not None and request.conversation is None and request.knownTurnCount != len(dialog_turns):
+                raise SessionConflictError(
+                    f"Client has {request.knownTurnCount} dialog turns but session {session.session_id} has {len(dialog_turns)}"
+                )
+            previous_dialog_turns = list(dialog_turns)
+            dialog_turns.extend(request.newDialogTurns)
+            
+            turn_count_before = len(dialog_turns)
+            try:
+                await self._continue_once(session.conversation, deadline, session.session_id)
+            except Exception:
+                # Leave the session as it was so the client can simply retry the same delta
+                session.conversation.dialogTurns = previous_dialog_turns
+                raise
+            
+            # Backstory bootstrap turns are inserted at the front, in which case the client needs everything
+            bootstrapped = len(dialog_turns) - turn_count_before > 1
+            offset = 0 if bootstrapped else turn_count_before
+            
+            if self.conversation_store is not None:
+                # The client's new turns are stored too; a new session stores the whole conversation
+                stored_from = 0 if bootstrapped or request.conversation is not None else len(previous_dialog_turns)
+                self.conversation_store.record(session.session_id, session.conversation, stored_from)
+            
+            return ContinueSessionResponse(
+                sessionId=session.session_id,
+                offset=offset,
+                dialogTurns=dialog_turns[offset:],
+                turnCount=len(dialog_turns)
+            )
+        finally:
+            session.lock.release()
+    
+    async def autoplay_conversation_turns(self, request: AutoplayConversationRequest, deadline: Optional[Deadline] = None, session_id: Optional[str] = None) -> AsyncIterator[DialogTurn]:
+        """
+        Generate request.turns consecutive AI dialog turns, yielding each one as soon as it is complete.
+        The conversation is updated in place, so later turns see the earlier ones without another
+        round trip through the client.
+        
+        Args:
+            request: The request containing the conversation and the number of turns to generate
+            deadline: The deadline for the whole request, if any
+            session_id: The session the request belongs to, for fair scheduling of upstream calls
+            
+        Yields:
+            Each newly generated dialog turn, in order
+        """
+        conversation = request.conversation
+        
+        for turn_number in range(request.turns):
+            logger.info(f"Autoplay generating turn {turn_number + 1}/{request.turns}")
+            yield await self._continue_once(conversation, deadline, session_id)
+    
+    async def autoplay_conversation(self, request: AutoplayConversationRequest, deadline: Optional[Deadline] = None, session_id: Optional[str] = None) -> Conversation:
+        """
+        Generate request.turns consecutive AI dialog turns and return the updated conversation.
+        """
+        async for _ in self.autoplay_conversation_turns(request, deadline, session_id):
+            pass
+        
+        return request.conversation
+    
+    async def _continue_once(self, conversation: AnyConversation, deadline: Optional[Deadline] = None, session_id: Optional[str] = None) -> DialogTurn:
+        """
+        Generate the next dialog turn and append it to the conversation.
+        
+        Args:
+            conversation: The current conversation state (updated in place)
+            deadline: The request's deadline, if any
+            session_id: The session the request belongs to, for fair scheduling of upstream calls
+            
+        Returns:
+            The newly generated dialog turn
+        """
+        next_speaker, prompt, most_recent_speaker, chat_history = self._prepare_continuation(conversation)
         
         # 5. Call the CHAI API to generate a response
         response_from_charAI = await self.chai_client.invoke_llm(
             prompt=prompt,
             character_1_name=next_speaker.name, # this should be the participant we want to speak next
             character_2_name=most_recent_speaker, # this should be the last participant in the chat history
-            chat_history=chat_history
+            chat_history=chat_history,
+            call_site=CallSite.DIALOGUE,
+            deadline=deadline,
+            stop_sequences=CONTINUE_CONVERSATION_STOP_SEQUENCES,
+            session_id=session_id
         )
 
         response_from_charAI = self.post_process_continue_conversation_response(response_from_charAI)
         
         # 6. Add the response to the conversation
+        new_turn = DialogTurn(
+            participant=next_speaker.name,
+            content=response_from_charAI
+        )
+        conversation.dialogTurns.append(new_turn)
+        
+        return new_turn
+    
+    async def continue_conversation_stream(self, request: ContinueConversationRequest, deadline: Optional[Deadline] = None, session_id: Optional[str] = None) -> AsyncIterator[Tuple[str, BaseModel]]:
+        """
+        Streaming variant of continue_conversation.
+        
+        The same cut rules as post_process_continue_conversation_response are applied while the
+        response streams in, and the upstream call is closed as soon as a cut point is found.
+        
+        Args:
+            request: The request containing the current conversation state
+            deadline: The request's deadline, if any
+            session_id: The session the request belongs to, for fair scheduling of upstream calls
+            
+        Yields:
+            ("turn", DialogTurn) announcing the next speaker with empty content,
+            ("delta", DialogTurn) for each new piece of that speaker's content, and finally
+            ("done", Conversation) with the completed dialog turn appended
+        """
+        conversation = request.conversation
+        
+        next_speaker, prompt, most_recent_speaker, chat_history = self._prepare_continuation(conversation)
+        yield "turn", DialogTurn(participant=next_speaker.name, content="")
+        
+        scanner = StopSequenceScanner(CONTINUE_CONVERSATION_STOP_SEQUENCES)
+        content_parts = []
+        response_stream = self.chai_client.stream_llm(
+            prompt=prompt,
+            character_1_name=next_speaker.name,
+            character_2_name=most_recent_speaker,
+            chat_history=chat_history,
+            call_site=CallSite.DIALOGUE,
+            deadline=deadline,
+            session_id=session_id
+        )
+        try:
+            async for chunk in response_stream:
+                text, stopped = scanner.feed(chunk)
+                if text:
+                    content_parts.append(text)
+                    yield "delta", DialogTurn(participant=next_speaker.name, content=text)
+                if stopped:
+                    break
+            else:
+                text = scanner.flush()
+                if text:
+                    content_parts.append(text)
+                    yield "delta", DialogTurn(participant=next_speaker.name, content=text)
+        finally:
+            # Closes the upstream connection if we stopped early
+            await response_stream.aclose()
+        
         conversation.dialogTurns.append(
             DialogTurn(
                 participant=next_speaker.name,
-                content=response_from_charAI
+                content="".join(content_parts)
             )
         )
         
-        return conversation
+        yield "done", conversation
@@ -0,0 +1,161 @@
+"""
+Compact in-memory conversation used on the /continueConversation hot path.
+"""
+from typing import Any, Dict, Iterator, List, Union
+import orjson
+from pydantic import ValidationError
+from app.schemas import Conversation, DialogTurn, Participant
+
+class ConversationFormatError(ValueError):
+    """
+    Raised when a request body doesn't hold a valid conversation.
+    """
+
+
+class CompactDialogTurns:
+    """
+    Dialog turns kept as the {"participant", "content"} dicts parsed from the request body,
+    instead of one validated pydantic model per turn.
+
+    The parsed dicts are validated in place and reused as-is when the conversation is
+    serialized again, so their content strings are never copied. Speaker names are interned,
+    so a 10k turn conversation between three characters holds three name strings, not 10k.
+    Indexing builds a DialogTurn (without re-validating it) only for the turns that are
+    actually read, so code written against Conversation.dialogTurns keeps working.
+    """
+    __slots__ = ("_turns", "_names")
+
+    def __init__(self):
+        self._turns: List[Dict[str, str]] = []
+        self._names: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[DialogTurn, List[DialogTurn]]:
+        if isinstance(index, slice):
+            return [self._to_model(turn) for turn in self._turns[index]]
+        return self._to_model(self._turns[index])
+
+    def __iter__(self) -> Iterator[DialogTurn]:
+        return map(self._to_model, self._turns)
+
+    @staticmethod
+    def _to_model(turn: Dict[str, str]) -> DialogTurn:
+        return DialogTurn.model_construct(participant=turn["participant"], content=turn["content"])
+
+    def _entry(self, participant: str, content: str) -> Dict[str, str]:
+        return {"participant": self._names.setdefault(participant, participant), "content": content}
+
+    def add_parsed(self, turn: Dict[str, str]) -> None:
+        """
+        Take ownership of a parsed {"participant", "content"} dict whose values were checked to be strings.
+        """
+        participant = turn["participant"]
+        if len(turn) != 2:
+            # Unknown keys are dropped, as the Conversation model would
+            turn = self._entry(participant, turn["content"])
+        else:
+            turn["participant"] = self._names.setdefault(participant, participant)
+        self._turns.append(turn)
+
+    def append(self, turn: DialogTurn) -> None:
+        self._turns.append(self._entry(turn.participant, turn.content))
+
+    def insert(self, index: int, turn: DialogTurn) -> None:
+        self._turns.insert(index, self._entry(turn.participant, turn.content))
+
+    def chat_history(self) -> List[Dict[str, str]]:
+        """
+        Returns the turns as {"sender", "message"} dicts for the CHAI API, sharing the content strings.
+        """
+        return [{"sender": turn["participant"], "message": turn["content"]} for turn in self._turns]
+
+    def to_json_list(self) -> List[Dict[str, str]]:
+        """
+        Returns the turns in the DialogTurn JSON shape. The list is the one held internally; don't modify it.
+        """
+        return self._turns
+
+
+class CompactConversation:
+    """
+    Drop-in stand-in for Conversation in the service layer, built straight from the parsed
+    request JSON and serialized straight back to bytes.
+
+    Attributes:
+        participants: The conversation's participants (few, so kept as models)
+        dialogTurns: The dialog turns, stored compactly
+    """
+    __slots__ = ("participants", "dialogTurns")
+
+    def __init__(self, participants: List[Participant], dialog_turns: CompactDialogTurns):
+        self.participants = participants
+        self.dialogTurns = dialog_turns
+
+    @classmethod
+    def from_json(cls, data: Any, location: str = "conversation") -> "CompactConversation":
+        """
+        Build a conversation from parsed JSON, checking it has the shape of a Conversation.
+
+        Raises:
+            ConversationFormatError: If it doesn't
+        """
+        if not isinstance(data, dict):
+            raise ConversationFormatError(f"{location} must be an object")
+        participants = data.get("participants")
+        dialog_turns = data.get("dialogTurns")
+        if not isinstance(participants, list):
+            raise ConversationFormatError(f"{location}.participants must be a list")
+        if not isinstance(dialog_turns, list):
+            raise ConversationFormatError(f"{location}.dialogTurns must be a list")
+
+        try:
+            parsed_participants = [Participant.model_validate(participant) for participant in participants]
+        except ValidationError as e:
+            raise ConversationFormatError(f"{location}.participants: {e.errors()[0]['msg']}") from None
+
+        turns = CompactDialogTurns()
+        for index, turn in enumerate(dialog_turns):
+            if type(turn) is not dict or type(turn.get("participant")) is not str or type(turn.get("content")) is not str:
+                raise ConversationFormatError(f"{location}.dialogTurns[{index}] must be an object with string participant and content")
+            turns.add_parsed(turn)
+        return cls(parsed_participants, turns)
+
+    @classmethod
+    def from_conversation(cls, conversation: Conversation) -> "CompactConversation":
+        turns = CompactDialogTurns()
+        for turn in conversation.dialogTurns:
+            turns.append(turn)
+        return cls(list(conversation.participants), turns)
+
+    def chat_history(self) -> List[Dict[str, str]]:
+        return self.dialogTurns.chat_history()
+
+    def to_conversation(self) -> Conversation:
+        return Conversation(participants=self.participants, dialogTurns=list(self.dialogTurns))
+
+    def to_json_bytes(self) -> bytes:
+        """
+        Returns the conversation serialized like Conversation.model_dump_json().
+        """
+        return orjson.dumps({
+            "participants": [participant.model_dump() for participant in self.participants],
+            "dialogTurns": self.dialogTurns.to_json_list(),
+        })
+
+
+def parse_continue_conversation_request(body: bytes) -> CompactConversation:
+    """
+    Parse a ContinueConversationRequest body straight into a CompactConversation.
+
+    Raises:
+        ConversationFormatError: If the body isn't valid JSON or doesn't hold a conversation
+    """
+    try:
+        data = orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        raise ConversationFormatError(f"Invalid JSON: {str(e)}") from None
+    if not isinstance(data, dict):
+        raise ConversationFormatError("Request body must be an object")
+    return CompactConversation.from_json(data.get("conversation"))
@@ -0,0 +1,172 @@
+"""
+Budgeted context window for the chat history sent to the CHAI API.
+"""
+import hashlib
+import logging
+import re
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bootstrap turns that carry a character's backstory start with this; they are always kept
+BACKSTORY_MESSAGE_PREFIX = "This is what I know about myself:"
+
+# Approximate per-message overhead (sender, separators) counted against the budget
+_MESSAGE_OVERHEAD_CHARS = 8
+
+_FIRST_SENTENCE_PATTERN = re.compile(r"^(.+?[.!?])(\s|$)", re.DOTALL)
+
+Summarizer = Callable[[Optional[str], List[Dict[str, str]]], str]
+
+def extractive_summary(previous_summary: Optional[str], messages: List[Dict[str, str]], max_chars: int = 1500, max_line_chars: int = 160) -> str:
+    """
+    Cheap rolling summary: the first sentence of each evicted message, appended to the previous summary.
+    When the summary grows past max_chars, its oldest lines are dropped.
+
+    Args:
+        previous_summary: The summary of the messages evicted before these, if any
+        messages: Newly evicted {"sender", "message"} dicts, oldest first
+        max_chars: Upper bound on the summary length
+        max_line_chars: Upper bound on the length of each message's line
+
+    Returns:
+        The updated summary
+    """
+    lines = previous_summary.split("\n") if previous_summary else []
+    for msg in messages:
+        match = _FIRST_SENTENCE_PATTERN.match(msg["message"].strip())
+        sentence = match.group(1) if match else msg["message"].strip()
+        if len(sentence) > max_line_chars:
+            sentence = sentence[:max_line_chars - 3] + "..."
+        lines.append(f"{msg['sender']}: {sentence}")
+
+    total = sum(len(line) + 1 for line in lines)
+    start = 0
+    while total > max_chars and start < len(lines) - 1:
+        total -= len(lines[start]) + 1
+        start += 1
+    return "\n".join(lines[start:])
+
+
+class ContextWindowManager:
+    """
+    Keeps the chat history sent upstream within a character budget, so per-turn latency stays
+    flat as conversations grow.
+
+    Leading backstory turns and the most recent turns are always kept. When the history is over
+    budget the middle is dropped, and optionally replaced with a rolling summary message. Summaries
+    are cached by a hash chain over the evicted messages, so each request only summarizes the
+    messages evicted since the previous one.
+    """
+
+    def __init__(
+        self,
+        max_chars: Optional[int] = 16000,
+        max_tokens: Optional[int] = None,
+        chars_per_token: float = 4.0,
+        min_recent_turns: int = 4,
+        summarizer: Optional[Summarizer] = extractive_summary,
+        summary_max_chars: int = 1500,
+        summary_sender: str = "Narrator",
+        summary_cache_size: int = 1024,
+    ):
+        if max_tokens is not None:
+            max_chars = int(max_tokens * chars_per_token)
+        if max_chars is None or max_chars <= 0:
+            raise ValueError("Context window budget must be positive")
+        self.max_chars = max_chars
+        self.min_recent_turns = min_recent_turns
+        self.summarizer = summarizer
+        self.summary_max_chars = summary_max_chars
+        self.summary_sender = summary_sender
+        self.summary_cache_size = summary_cache_size
+        # hash of an evicted span -> summary of that span
+        self._summary_cache: "OrderedDict[bytes, str]" = OrderedDict()
+
+    @staticmethod
+    def _cost(msg: Dict[str, str]) -> int:
+        return len(msg["sender"]) + len(msg["message"]) + _MESSAGE_OVERHEAD_CHARS
+
+    def fit(self, chat_history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Trim a chat history to the budget.
+
+        Args:
+            chat_history: The full list of {"sender", "message"} dicts, oldest first
+
+        Returns:
+            The history to send upstream; the original list if it already fits
+        """
+        costs = [self._cost(msg) for msg in chat_history]
+        if sum(costs) <= self.max_chars:
+            return chat_history
+
+        pinned_count = 0
+        while pinned_count < len(chat_history) and chat_history[pinned_count]["message"].startswith(BACKSTORY_MESSAGE_PREFIX):
+            pinned_count += 1
+
+        budget = self.max_chars - sum(costs[:pinned_count])
+        if self.summarizer is not None:
+            budget -= self.summary_max_chars + len(self.summary_sender) + _MESSAGE_OVERHEAD_CHARS
+
+        # Walk back from the most recent turn while the budget allows, always keeping min_recent_turns
+        tail_start = len(chat_history)
+        while tail_start > pinned_count:
+            cost = costs[tail_start - 1]
+            kept = len(chat_history) - tail_start
+            if kept >= self.min_recent_turns and cost > budget:
+                break
+            budget -= cost
+            tail_start -= 1
+
+        evicted = chat_history[pinned_count:tail_start]
+        if not evicted:
+            return chat_history
+
+        fitted = chat_history[:pinned_count]
+        if self.summarizer is not None:
+            summary = self._summarize(evicted)
+            fitted.append({
+                "sender": self.summary_sender,
+                "message": f"Summary of the earlier conversation:\n{summary}"
+            })
+        fitted.extend(chat_history[tail_start:])
+
+        logger.info(f"Context window dropped {len(evicted)} of {len(chat_history)} turns to fit {self.max_chars} chars")
+        return fitted
+
+    def _summarize(self, evicted: List[Dict[str, str]]) -> str:
+        # Hash chain over the evicted span: span_hashes[i] identifies evicted[:i + 1]
+        span_hashes = []
+        running = hashlib.sha1()
+        for msg in evicted:
+            running.update(msg["sender"].encode("utf-8"))
+            running.update(b"\x00")
+            running.update(msg["message"].encode("utf-8"))
+            running.update(b"\x01")
+            span_hashes.append(running.digest())
+
+        # Reuse the summary of the longest already-summarized prefix
+        previous_summary = None
+        summarized_count = 0
+        for index in range(len(evicted) - 1, -1, -1):
+            cached = self._summary_cache.get(span_hashes[index])
+            if cached is not None:
+                self._summary_cache.move_to_end(span_hashes[index])
+                previous_summary = cached
+                summarized_count = index + 1
+                break
+
+        if summarized_count == len(evicted):
+            return previous_summary
+
+        summary = self.summarizer(previous_summary, evicted[summarized_count:])
+        if len(summary) > self.summary_max_chars:
+            # Drop the oldest whole lines that don't fit
+            cut = summary.find("\n", len(summary) - self.summary_max_chars)
+            summary = summary[cut + 1:] if cut != -1 else summary[-self.summary_max_chars:]
+        self._summary_cache[span_hashes[-1]] = summary
+        while len(self._summary_cache) > self.summary_cache_size:
+            self._summary_cache.popitem(last=False)
+        return summary
@@ -0,0 +1,94 @@
+"""
+Bounded in-memory store of server-side conversation sessions.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from app.schemas import Conversation
+
+logger = logging.getLogger(__name__)
+
+class SessionNotFoundError(KeyError):
+    """
+    Raised when a session ID is unknown or its session has been evicted.
+    """
+
+
+class SessionConflictError(ValueError):
+    """
+    Raised when a client's view of a session's dialog turns no longer matches the server's.
+    """
+
+
+class ConversationSession:
+    """
+    A conversation held on the server between requests.
+
+    Attributes:
+        session_id: The ID clients use to refer to the session
+        conversation: The full conversation state
+        lock: Serializes requests against this session so turns don't interleave
+        last_access: time.monotonic() of the last time the session was used
+    """
+
+    def __init__(self, session_id: str, conversation: Conversation):
+        self.session_id = session_id
+        self.conversation = conversation
+        self.lock = asyncio.Lock()
+        self.last_access = time.monotonic()
+
+
+class ConversationSessionStore:
+    """
+    Keeps up to max_sessions conversations, evicting the least recently used session when
+    full and any session that hasn't been used for ttl_seconds.
+    """
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 3600.0):
+        if max_sessions < 1:
+            raise ValueError("Session store must hold at least one session")
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, ConversationSession]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def create(self, conversation: Conversation) -> ConversationSession:
+        """
+        Start a new session holding the given conversation.
+        """
+        self._evict_expired(time.monotonic())
+        session = ConversationSession(uuid.uuid4().hex, conversation)
+        self._sessions[session.session_id] = session
+        while len(self._sessions) > self.max_sessions:
+            evicted_id, _ = self._sessions.popitem(last=False)
+            logger.info(f"Evicted least recently used conversation session {evicted_id}")
+        return session
+
+    def get(self, session_id: str) -> ConversationSession:
+        """
+        Look up a session and mark it as recently used.
+
+        Raises:
+            SessionNotFoundError: If the session doesn't exist or has expired
+        """
+        now = time.monotonic()
+        self._evict_expired(now)
+        session = self._sessions.get(session_id)
+        if session is None:
+            raise SessionNotFoundError(session_id)
+        session.last_access = now
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def _evict_expired(self, now: float) -> None:
+        # Sessions are ordered by last access, so expired ones are always at the front
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_access <= self.ttl_seconds:
+                break
+            self._sessions.popitem(last=False)
+            logger.info(f"Expired conversation session {oldest.session_id}")
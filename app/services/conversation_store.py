@@ -0,0 +1,247 @@
+"""
+SQLite-backed persistent store of conversations and their dialog turns.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+import orjson
+from sqlalchemy import Column, Float, Integer, MetaData, PrimaryKeyConstraint, String, Table, Text, create_engine, event, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from app.schemas import Conversation, DialogTurn, Participant, StoredDialogTurn
+
+logger = logging.getLogger(__name__)
+
+metadata = MetaData()
+
+conversations_table = Table(
+    "conversations",
+    metadata,
+    Column("id", String, primary_key=True),
+    Column("participants", Text, nullable=False),
+    Column("turn_count", Integer, nullable=False),
+    Column("created_at", Float, nullable=False),
+    Column("updated_at", Float, nullable=False),
+)
+
+# The (conversation_id, ordinal) primary key is the index every read uses: a conversation's
+# turns are stored contiguously and a page is a range scan from one ordinal backwards
+dialog_turns_table = Table(
+    "dialog_turns",
+    metadata,
+    Column("conversation_id", String, nullable=False),
+    Column("ordinal", Integer, nullable=False),
+    Column("participant", String, nullable=False),
+    Column("content", Text, nullable=False),
+    PrimaryKeyConstraint("conversation_id", "ordinal"),
+    sqlite_with_rowid=False,
+)
+
+
+@dataclass
+class _PendingWrite:
+    conversation_id: str
+    participants: List[Participant]
+    start_ordinal: int
+    dialog_turns: List[DialogTurn]
+    turn_count: int
+    recorded_at: float
+
+
+class ConversationStore:
+    """
+    Persists conversations to SQLite without blocking the requests that produce them.
+
+    record() only snapshots the new turns and puts them on a queue. A writer task collects
+    queued writes for up to flush_interval seconds (or batch_size writes) and commits them in
+    one transaction on a worker thread. The database runs in WAL mode, so paginated reads from
+    get_turns are not blocked by the writer. Writes still queued when the process dies are lost,
+    and reads only see writes that have been flushed.
+    """
+
+    def __init__(self, db_path: str, batch_size: int = 500, flush_interval: float = 0.5, max_pending: int = 10000):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.engine = self._create_engine(db_path)
+        metadata.create_all(self.engine)
+        self._queue: "asyncio.Queue[_PendingWrite]" = asyncio.Queue(maxsize=max_pending)
+        self._writer_task: Optional[asyncio.Task] = None
+
+        # Stats
+        self.written_turns = 0
+        self.dropped_writes = 0
+
+    @staticmethod
+    def _create_engine(db_path: str) -> Engine:
+        engine = create_engine(f"sqlite:///{db_path}")
+
+        @event.listens_for(engine, "connect")
+        def _configure_connection(dbapi_connection, _):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute("PRAGMA busy_timeout=5000")
+            cursor.close()
+
+        return engine
+
+    async def start(self) -> None:
+        """
+        Start the background writer.
+        """
+        if self._writer_task is None:
+            self._writer_task = asyncio.create_task(self._write_loop())
+            logger.info(f"Conversation store writing to {self.db_path}")
+
+    async def stop(self) -> None:
+        """
+        Write everything still queued, stop the writer and close the database.
+        """
+        if self._writer_task is None:
+            return
+        await self.flush()
+        self._writer_task.cancel()
+        try:
+            await self._writer_task
+        except asyncio.CancelledError:
+            pass
+        self._writer_task = None
+        self.engine.dispose()
+        logger.info("Conversation store stopped")
+
+    async def flush(self) -> None:
+        """
+        Wait until every write queued so far has been committed.
+        """
+        await self._queue.join()
+
+    def record(self, conversation_id: str, conversation: Conversation, start_ordinal: int = 0) -> None:
+        """
+        Queue a conversation's participants and its dialog turns from start_ordinal on to be written.
+
+        Turns already stored at those ordinals are overwritten. Never blocks: if the queue is
+        full the write is dropped and counted.
+
+        Args:
+            conversation_id: ID the conversation is stored under
+            conversation: The conversation's current state
+            start_ordinal: Index of the first dialog turn that is new or changed
+        """
+        pending = _PendingWrite(
+            conversation_id=conversation_id,
+            participants=list(conversation.participants),
+            start_ordinal=start_ordinal,
+            dialog_turns=conversation.dialogTurns[start_ordinal:],
+            turn_count=len(conversation.dialogTurns),
+            recorded_at=time.time(),
+        )
+        try:
+            self._queue.put_nowait(pending)
+        except asyncio.QueueFull:
+            self.dropped_writes += 1
+            logger.warning(f"Conversation store queue full; dropped {len(pending.dialog_turns)} turns of {conversation_id}")
+
+    async def get_turns(self, conversation_id: str, before: Optional[int] = None, limit: int = 50) -> Optional[Tuple[List[Participant], int, List[StoredDialogTurn]]]:
+        """
+        Read a page of a stored conversation's dialog turns, ending just before `before`.
+
+        Args:
+            conversation_id: The stored conversation's ID
+            before: Only return turns with a lower ordinal; None for the most recent turns
+            limit: Maximum number of turns to return
+
+        Returns:
+            (participants, total turn count, turns in ordinal order), or None if the conversation isn't stored
+        """
+        return await asyncio.to_thread(self._read_turns, conversation_id, before, limit)
+
+    async def _write_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            flush_at = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = flush_at - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+            except SQLAlchemyError as e:
+                self.dropped_writes += len(batch)
+                logger.error(f"Error writing {len(batch)} conversation updates: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch: List[_PendingWrite]) -> None:
+        conversation_rows = {}
+        turn_rows = {}
+        for pending in batch:
+            previous_row = conversation_rows.get(pending.conversation_id)
+            conversation_rows[pending.conversation_id] = {
+                "id": pending.conversation_id,
+                "participants": orjson.dumps([participant.model_dump() for participant in pending.participants]).decode("utf-8"),
+                "turn_count": pending.turn_count,
+                # Only used when the conversation is first inserted
+                "created_at": previous_row["created_at"] if previous_row else pending.recorded_at,
+                "updated_at": pending.recorded_at,
+            }
+            for ordinal, turn in enumerate(pending.dialog_turns, start=pending.start_ordinal):
+                # Later writes of the same turn in the batch win
+                turn_rows[(pending.conversation_id, ordinal)] = {
+                    "conversation_id": pending.conversation_id,
+                    "ordinal": ordinal,
+                    "participant": turn.participant,
+                    "content": turn.content,
+                }
+
+        conversation_insert = sqlite_insert(conversations_table)
+        conversation_upsert = conversation_insert.on_conflict_do_update(
+            index_elements=["id"],
+            set_={
+                "participants": conversation_insert.excluded.participants,
+                "turn_count": conversation_insert.excluded.turn_count,
+                "updated_at": conversation_insert.excluded.updated_at,
+            },
+        )
+        turn_insert = sqlite_insert(dialog_turns_table)
+        turn_upsert = turn_insert.on_conflict_do_update(
+            index_elements=["conversation_id", "ordinal"],
+            set_={"participant": turn_insert.excluded.participant, "content": turn_insert.excluded.content},
+        )
+        with self.engine.begin() as connection:
+            connection.execute(conversation_upsert, list(conversation_rows.values()))
+            if turn_rows:
+                connection.execute(turn_upsert, list(turn_rows.values()))
+        self.written_turns += len(turn_rows)
+
+    def _read_turns(self, conversation_id: str, before: Optional[int], limit: int) -> Optional[Tuple[List[Participant], int, List[StoredDialogTurn]]]:
+        with self.engine.connect() as connection:
+            conversation_row = connection.execute(
+                select(conversations_table.c.participants, conversations_table.c.turn_count)
+                .where(conversations_table.c.id == conversation_id)
+            ).first()
+            if conversation_row is None:
+                return None
+
+            query = (
+                select(dialog_turns_table.c.ordinal, dialog_turns_table.c.participant, dialog_turns_table.c.content)
+                .where(dialog_turns_table.c.conversation_id == conversation_id)
+                .order_by(dialog_turns_table.c.ordinal.desc())
+                .limit(limit)
+            )
+            if before is not None:
+                query = query.where(dialog_turns_table.c.ordinal < before)
+            rows = connection.execute(query).all()
+
+        participants = [Participant(**participant) for participant in orjson.loads(conversation_row.participants)]
+        turns = [StoredDialogTurn(ordinal=row.ordinal, participant=row.participant, content=row.content) for row in reversed(rows)]
+        return participants, conversation_row.turn_count, turns
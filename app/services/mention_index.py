@@ -0,0 +1,58 @@
+"""
+Indexed detection of which characters a dialog turn mentions.
+"""
+import re
+from functools import lru_cache
+from typing import FrozenSet, Iterable
+
+class MentionIndex:
+    """
+    Finds which of a fixed set of names occur as substrings of a message, in a single pass.
+
+    All names are compiled into one alternation regex, wrapped in a lookahead so that
+    overlapping occurrences are found too. Longer names are tried first at each position,
+    and a name that contains shorter names implies them, so the result matches
+    `{name for name in names if name in content}` exactly. Results aren't memoized: keying a
+    memo by the content would cost a pass over it as well, and the scan is only one pass.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        names = frozenset(names)
+        # The empty string is a substring of every message
+        self._always_mentioned = frozenset(name for name in names if not name)
+        searchable = sorted((name for name in names if name), key=len, reverse=True)
+        self._pattern = re.compile("(?=(" + "|".join(re.escape(name) for name in searchable) + "))") if searchable else None
+        # name -> every name that occurs inside it, itself included
+        self._implied = {name: frozenset(other for other in searchable if other in name) for name in searchable}
+
+    def mentions(self, content: str) -> FrozenSet[str]:
+        """
+        Returns the names that occur in a message.
+
+        Args:
+            content: The message to scan
+
+        Returns:
+            The subset of the indexed names that are substrings of content
+        """
+        found = set(self._always_mentioned)
+        if self._pattern is not None:
+            for match in self._pattern.finditer(content):
+                name = match.group(1)
+                if name not in found:
+                    found.update(self._implied[name])
+        return frozenset(found)
+
+
+@lru_cache(maxsize=32)
+def get_mention_index(names: FrozenSet[str]) -> MentionIndex:
+    """
+    Returns the MentionIndex for a cast of characters, building it on first use.
+
+    Args:
+        names: The names of the characters
+
+    Returns:
+        A MentionIndex shared by every conversation with the same set of names
+    """
+    return MentionIndex(names)
@@ -0,0 +1,56 @@
+"""
+Bounded registry of recently generated character names.
+"""
+from collections import deque
+from typing import Deque, Dict, Iterator, Optional
+
+def normalize_name(name: str) -> str:
+    """
+    Key used to compare names, so "Elara" and "elara " count as the same name.
+    """
+    return name.strip().casefold()
+
+
+class NameRegistry:
+    """
+    Remembers the last `capacity` generated names.
+
+    A ring buffer keeps them in generation order and a dict counts how many times each
+    normalized name appears in it, so adding a name, checking for a duplicate and evicting the
+    oldest name are all O(1) and memory stays flat however many names are generated.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        if capacity < 1:
+            raise ValueError("Name registry capacity must be at least 1")
+        self.capacity = capacity
+        self._names: Deque[str] = deque()
+        self._counts: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and normalize_name(name) in self._counts
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def add(self, name: str) -> None:
+        """
+        Record a generated name, evicting the oldest one if the registry is full.
+        """
+        if len(self._names) >= self.capacity:
+            evicted = normalize_name(self._names.popleft())
+            self._counts[evicted] -= 1
+            if self._counts[evicted] == 0:
+                del self._counts[evicted]
+        self._names.append(name)
+        key = normalize_name(name)
+        self._counts[key] = self._counts.get(key, 0) + 1
+
+    def last(self) -> Optional[str]:
+        """
+        Returns the most recently generated name, or None if none has been generated yet.
+        """
+        return self._names[-1] if self._names else None
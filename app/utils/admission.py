@@ -0,0 +1,176 @@
+"""
+Admission control: per-route concurrency and queue limits, with early 503s under load.
+"""
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+from starlette.responses import JSONResponse
+from app.utils.metrics import ADMISSION_QUEUE_WAIT_SECONDS, ADMISSION_REJECTIONS_TOTAL
+
+logger = logging.getLogger(__name__)
+
+# ASGI scope key holding time.monotonic() at which an admission-controlled request arrived,
+# so its deadline can count the time it spent queued
+ARRIVED_AT_SCOPE_KEY = "admission.arrived_at"
+
+class AdmissionRejectedError(Exception):
+    """
+    Raised when a request is turned away instead of being queued.
+
+    Attributes:
+        route: The route the request was for
+        reason: "queue_full", or "deadline" if it would (or did) wait longer than its deadline
+        retry_after: Seconds the client should wait before retrying
+    """
+
+    def __init__(self, route: str, reason: str, retry_after: float):
+        super().__init__(f"Request to {route} rejected ({reason}); retry in {retry_after:.1f}s")
+        self.route = route
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Limits how many requests to one route are handled at once and how many may wait for a turn.
+
+    Requests beyond max_concurrency wait in a FIFO queue of at most max_queue requests. A request
+    is rejected straight away if the queue is full, or if its estimated wait is longer than the
+    route's deadline, since by then the answer would come too late anyway; a queued request that
+    runs out of time is rejected too. The estimated wait is the number of requests ahead of it per
+    slot, times an EWMA of how long recent requests took.
+    """
+
+    def __init__(self, route: str, max_concurrency: int, max_queue: int, deadline_seconds: float, smoothing: float = 0.2):
+        if max_concurrency < 1:
+            raise ValueError("Admission concurrency must be at least 1")
+        self.route = route
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.deadline_seconds = deadline_seconds
+        self.smoothing = smoothing
+        self.in_flight = 0
+        # EWMA of admitted requests' durations; None until one has finished
+        self.average_duration: Optional[float] = None
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def estimated_wait(self) -> float:
+        """
+        Returns the estimated seconds a request arriving now would wait for a slot.
+        """
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            return 0.0
+        if self.average_duration is None:
+            return 0.0
+        return (len(self._waiters) + 1) / self.max_concurrency * self.average_duration
+
+    def _retry_after(self, estimated_wait: float) -> float:
+        return max(1.0, estimated_wait)
+
+    async def acquire(self) -> None:
+        """
+        Wait for a slot to handle a request in.
+
+        Raises:
+            AdmissionRejectedError: If the queue is full or the wait would outlast the deadline
+        """
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            return
+        estimated_wait = self.estimated_wait()
+        if len(self._waiters) >= self.max_queue:
+            raise AdmissionRejectedError(self.route, "queue_full", self._retry_after(estimated_wait))
+        if estimated_wait > self.deadline_seconds:
+            raise AdmissionRejectedError(self.route, "deadline", self._retry_after(estimated_wait))
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, timeout=self.deadline_seconds)
+        except asyncio.TimeoutError:
+            self._remove_waiter(waiter)
+            raise AdmissionRejectedError(self.route, "deadline", self._retry_after(self.estimated_wait())) from None
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # Admitted just as the client went away
+                self.release()
+            else:
+                self._remove_waiter(waiter)
+            raise
+        finally:
+            ADMISSION_QUEUE_WAIT_SECONDS.labels(self.route).observe(time.perf_counter() - start)
+
+    def release(self, duration: Optional[float] = None) -> None:
+        """
+        Free a slot, admitting the next queued request.
+
+        Args:
+            duration: How long the finished request took, to update the wait estimate
+        """
+        if duration is not None:
+            if self.average_duration is None:
+                self.average_duration = duration
+            else:
+                self.average_duration += self.smoothing * (duration - self.average_duration)
+        self.in_flight -= 1
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+                break
+
+    def _remove_waiter(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware applying an AdmissionController to the POST routes it is given.
+
+    Rejected requests get a 503 with a Retry-After header before their body is read, so an
+    overloaded server sheds load without buffering more conversations. Requests hold their slot
+    until the response (including a streamed one) has been sent. The arrival time is recorded in
+    the scope under ARRIVED_AT_SCOPE_KEY, so the route's deadline includes the time spent queued.
+    """
+
+    def __init__(self, app, controllers: Dict[str, AdmissionController]):
+        self.app = app
+        self.controllers = controllers
+
+    async def __call__(self, scope, receive, send):
+        controller = self.controllers.get(scope["path"]) if scope["type"] == "http" and scope["method"] == "POST" else None
+        if controller is None:
+            await self.app(scope, receive, send)
+            return
+
+        scope[ARRIVED_AT_SCOPE_KEY] = time.monotonic()
+        try:
+            await controller.acquire()
+        except AdmissionRejectedError as e:
+            ADMISSION_REJECTIONS_TOTAL.labels(e.route, e.reason).inc()
+            logger.warning(str(e))
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "The server is busy; try again later"},
+                headers={"Retry-After": str(math.ceil(e.retry_after))},
+            )
+            await response(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(time.perf_counter() - start)
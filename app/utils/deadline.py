@@ -0,0 +1,74 @@
+"""
+End-to-end request deadlines.
+"""
+import asyncio
+import time
+from typing import Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+class DeadlineExceededError(TimeoutError):
+    """
+    Raised when a request's deadline passes before its work is done.
+    """
+
+
+class Deadline:
+    """
+    A point in time by which a request must be answered.
+
+    Created once per request at the route level and passed down explicitly, so every wait
+    along the way (rate limiting, retries, upstream timeouts) is capped by the time the client
+    has left, rather than each layer applying its own full timeout.
+
+    Args:
+        seconds: The request's time budget
+        started_at: time.monotonic() when the request arrived, if it waited before being handled;
+            defaults to now
+    """
+
+    def __init__(self, seconds: float, started_at: Optional[float] = None):
+        self.seconds = seconds
+        self.expires_at = (started_at if started_at is not None else time.monotonic()) + seconds
+
+    def remaining(self) -> float:
+        """
+        Returns the seconds left before the deadline, never less than 0.
+        """
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self) -> None:
+        """
+        Raises:
+            DeadlineExceededError: If the deadline has passed
+        """
+        if self.expired():
+            raise DeadlineExceededError(f"Request deadline of {self.seconds}s exceeded")
+
+    def cap(self, timeout: float) -> float:
+        """
+        Returns timeout, shortened to the time left before the deadline.
+        """
+        return min(timeout, self.remaining())
+
+    async def run(self, awaitable: Awaitable[T]) -> T:
+        """
+        Await something, giving up when the deadline passes.
+
+        Raises:
+            DeadlineExceededError: If the deadline passes first
+        """
+        try:
+            return await asyncio.wait_for(awaitable, timeout=self.remaining())
+        except asyncio.TimeoutError:
+            raise DeadlineExceededError(f"Request deadline of {self.seconds}s exceeded") from None
+
+
+def cap_timeout(timeout: float, deadline: Optional[Deadline]) -> float:
+    """
+    Returns timeout, shortened to the deadline's remaining time if there is a deadline.
+    """
+    return deadline.cap(timeout) if deadline is not None else timeout
@@ -50,3 +50,78 @@ def validate_chai_api_key() -> str:
     """
     env_vars = validate_env_vars(["CHAI_API_BEARER_TOKEN"])
     return env_vars["CHAI_API_BEARER_TOKEN"]
+
+def get_env_int(var_name: str, default: int) -> int:
+    """
+    Reads an optional integer setting from the environment.
+    
+    Args:
+        var_name: The environment variable name
+        default: The value to use when the variable is unset or empty
+        
+    Returns:
+        The parsed integer value
+        
+    Raises:
+        ValueError: If the variable is set but is not a valid integer
+    """
+    value = os.getenv(var_name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        error_msg = f"Environment variable {var_name} must be an integer, got {value!r}"
+        logger.error(error_msg)
+        raise ValueError(error_msg)
+
+def get_env_float(var_name: str, default: float) -> float:
+    """
+    Reads an optional float setting from the environment.
+    
+    Args:
+        var_name: The environment variable name
+        default: The value to use when the variable is unset or empty
+        
+    Returns:
+        The parsed float value
+        
+    Raises:
+        ValueError: If the variable is set but is not a valid number
+    """
+    value = os.getenv(var_name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        error_msg = f"Environment variable {var_name} must be a number, got {value!r}"
+        logger.error(error_msg)
+        raise ValueError(error_msg)
+
+def get_env_bool(var_name: str, default: bool) -> bool:
+    """
+    Reads an optional boolean setting from the environment.
+    Accepts 1/0, true/false, yes/no and on/off (case insensitive).
+    
+    Args:
+        var_name: The environment variable name
+        default: The value to use when the variable is unset or empty
+        
+    Returns:
+        The parsed boolean value
+        
+    Raises:
+        ValueError: If the variable is set but is not a recognised boolean
+    """
+    value = os.getenv(var_name)
+    if value is None or value.strip() == "":
+        return default
+    normalized = value.strip().lower()
+    if normalized in ("1", "true", "yes", "on"):
+        return True
+    if normalized in ("0", "false", "no", "off"):
+        return False
+    error_msg = f"Environment variable {var_name} must be a boolean, got {value!r}"
+    logger.error(error_msg)
+    raise ValueError(error_msg)
@@ -0,0 +1,125 @@
+"""
+Prometheus metrics recorded by the app, and the ASGI middleware recording HTTP metrics.
+
+The metrics live in prometheus_client's default registry, which the /metrics endpoint renders.
+It is per process: under app/serve.py with several workers, each scrape is answered by
+whichever worker accepted the connection and covers that worker's requests only.
+"""
+import time
+from typing import Any, Dict
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, disable_created_metrics, generate_latest
+
+# The *_created series only say when each process started; leave them out of every scrape
+disable_created_metrics()
+
+# Upstream LLM calls take seconds, so the latency buckets reach well past the default 10s
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+DEFAULT_SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, in-flight count and payload sizes of every HTTP request.
+
+    Requests are labelled by the path template of the route that handled them, not the raw
+    path, so the number of label values stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths: Dict[Any, str] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_bytes = 0
+        response_bytes = 0
+        status_code = 500
+
+        async def receive_wrapper():
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal response_bytes, status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = self._route_path(scope)
+            # Endpoints that never read the body still have it counted via Content-Length
+            for header_name, header_value in scope["headers"]:
+                if header_name == b"content-length" and header_value.isdigit():
+                    request_bytes = max(request_bytes, int(header_value))
+                    break
+            HTTP_REQUEST_DURATION_SECONDS.labels(scope["method"], route, str(status_code)).observe(duration)
+            HTTP_REQUEST_SIZE_BYTES.labels(route).observe(request_bytes)
+            HTTP_RESPONSE_SIZE_BYTES.labels(route).observe(response_bytes)
+
+    def _route_path(self, scope) -> str:
+        # The router records the matched endpoint in the scope
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            for route in getattr(scope.get("app"), "routes", ()):
+                route_endpoint = getattr(route, "endpoint", None) or getattr(route, "app", None)
+                self._route_paths[route_endpoint] = route.path
+            path = self._route_paths.get(endpoint, "unmatched")
+        return path
+
+
+# Metrics recorded by the app
+HTTP_REQUEST_DURATION_SECONDS = Histogram(
+    "http_request_duration_seconds", "Latency of HTTP requests by route", ["method", "route", "status"], buckets=DEFAULT_LATENCY_BUCKETS
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being handled")
+HTTP_REQUEST_SIZE_BYTES = Histogram(
+    "http_request_size_bytes", "Size of HTTP request bodies by route", ["route"], buckets=DEFAULT_SIZE_BUCKETS
+)
+HTTP_RESPONSE_SIZE_BYTES = Histogram(
+    "http_response_size_bytes", "Size of HTTP response bodies by route", ["route"], buckets=DEFAULT_SIZE_BUCKETS
+)
+CHAI_LLM_DURATION_SECONDS = Histogram(
+    "chai_llm_duration_seconds", "Latency of CHAI API calls by call site, including retries and cache hits", ["call_site", "outcome"],
+    buckets=DEFAULT_LATENCY_BUCKETS,
+)
+CHAI_RESPONSE_SIZE_BYTES = Histogram(
+    "chai_response_size_bytes", "Size of CHAI API response bodies", buckets=DEFAULT_SIZE_BUCKETS
+)
+CHAI_REQUESTS_IN_FLIGHT = Gauge("chai_requests_in_flight", "CHAI API calls currently in progress")
+CHAI_THROTTLED_TOTAL = Counter("chai_throttled_total", "429 Too Many Requests responses from the CHAI API")
+CHAI_RETRIES_TOTAL = Counter("chai_retries_total", "CHAI API requests retried after a 429")
+CHAI_STOP_SEQUENCE_CUTS_TOTAL = Counter("chai_stop_sequence_cuts_total", "CHAI API responses cut client-side at a stop sequence", ["call_site"])
+FALLBACK_CHARACTERS_TOTAL = Counter("fallback_characters_total", "Placeholder characters returned because generation failed")
+CHAI_HEDGES_TOTAL = Counter("chai_hedges_total", "Hedged (duplicate) CHAI API requests sent for slow calls", ["call_site"])
+CHAI_HEDGE_WINS_TOTAL = Counter("chai_hedge_wins_total", "Hedged CHAI API requests that answered before the original", ["call_site"])
+CHAI_SCHEDULER_QUEUE_WAIT_SECONDS = Histogram(
+    "chai_scheduler_queue_wait_seconds", "Time CHAI API calls waited for an upstream slot, by priority class", ["priority"],
+    buckets=DEFAULT_LATENCY_BUCKETS,
+)
+CHAI_SCHEDULER_QUEUED_REQUESTS = Gauge("chai_scheduler_queued_requests", "CHAI API calls waiting for an upstream slot, by priority class", ["priority"])
+CHAI_BACKEND_REQUESTS_TOTAL = Counter("chai_backend_requests_total", "LLM calls routed to each backend, by outcome", ["backend", "outcome"])
+CHAI_BACKEND_LATENCY_SECONDS = Gauge("chai_backend_latency_seconds", "EWMA latency of successful calls to each routed backend", ["backend"])
+CHAI_BACKEND_ERROR_RATE = Gauge("chai_backend_error_rate", "EWMA error rate of each routed backend", ["backend"])
+ADMISSION_IN_FLIGHT_REQUESTS = Gauge("admission_in_flight_requests", "Requests being handled, by admission-controlled route", ["route"])
+ADMISSION_QUEUED_REQUESTS = Gauge("admission_queued_requests", "Requests waiting to be admitted, by route", ["route"])
+ADMISSION_QUEUE_WAIT_SECONDS = Histogram(
+    "admission_queue_wait_seconds", "Time queued requests waited to be admitted, by route", ["route"], buckets=DEFAULT_LATENCY_BUCKETS
+)
+ADMISSION_REJECTIONS_TOTAL = Counter("admission_rejections_total", "Requests turned away with a 503 by admission control", ["route", "reason"])
@@ -0,0 +1,24 @@
+"""
+Fast JSON responses for pydantic models.
+"""
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+class PydanticJSONResponse(JSONResponse):
+    """
+    JSON response that serializes pydantic models straight to bytes.
+
+    FastAPI's default path runs a returned model through jsonable_encoder (building a tree of
+    plain dicts) and then json.dumps. For a long <Conversation> that is an order of magnitude
+    slower than pydantic's own Rust serializer, which this response uses instead. Routes that
+    return it should keep response_model in their decorator so the OpenAPI schema is unchanged.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        if isinstance(content, list) and all(isinstance(item, BaseModel) for item in content):
+            return b"[" + b",".join(item.__pydantic_serializer__.to_json(item) for item in content) + b"]"
+        return orjson.dumps(content)
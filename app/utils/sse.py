@@ -0,0 +1,28 @@
+"""
+Utility module for formatting Server-Sent Events.
+"""
+from typing import Optional
+from pydantic import BaseModel
+
+SSE_MEDIA_TYPE = "text/event-stream"
+
+# Headers that stop proxies from buffering the event stream
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+def format_sse_event(event: str, data: Optional[BaseModel] = None, raw_data: Optional[str] = None) -> str:
+    """
+    Format a single Server-Sent Event.
+    
+    Args:
+        event: The event name
+        data: A pydantic model to send as the JSON event payload
+        raw_data: An already serialized JSON payload, used when data is not given
+        
+    Returns:
+        The event encoded in the text/event-stream wire format
+    """
+    payload = data.model_dump_json() if data is not None else (raw_data or "{}")
+    return f"event: {event}\ndata: {payload}\n\n"
@@ -0,0 +1,216 @@
+"""
+Static file serving for the React build, with precompressed variants and cache headers.
+"""
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it only gzip variants are made
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Files worth compressing; images and fonts are already compressed
+COMPRESSIBLE_EXTENSIONS = {".js", ".css", ".html", ".json", ".map", ".svg", ".txt", ".xml", ".ico"}
+MIN_COMPRESS_BYTES = 256
+
+# Content-hashed file names from the React build, e.g. main.3f2a1b9c.js or 453.e8f1a0c2.chunk.css
+HASHED_NAME_PATTERN = re.compile(r"\.[0-9a-f]{8,}\.")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Content-Encoding -> file suffix, in order of preference
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _available_encodings() -> List[str]:
+    return [encoding for encoding in ENCODING_SUFFIXES if encoding != "br" or brotli is not None]
+
+
+def choose_encoding(accept_encoding: str, available: List[str]) -> Optional[str]:
+    """
+    Pick the preferred encoding out of available that the client accepts, or None for identity.
+
+    Args:
+        accept_encoding: The request's Accept-Encoding header
+        available: Encodings there is a variant for, in order of preference
+
+    Returns:
+        The encoding to serve, or None to serve the uncompressed file
+    """
+    # coding -> q-value; an explicit entry for a coding takes precedence over "*"
+    qualities = {}
+    for part in accept_encoding.lower().split(","):
+        coding, *params = part.split(";")
+        quality = 1.0
+        for param in params:
+            param = param.replace(" ", "")
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if coding.strip():
+            qualities[coding.strip()] = quality
+    for encoding in available:
+        if qualities.get(encoding, qualities.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Returns whether an If-None-Match header matches the ETag of the representation being served.
+    """
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+@dataclass
+class StaticAsset:
+    """
+    One file of the build with its precompressed variants.
+
+    Attributes:
+        path: The uncompressed file
+        media_type: Content-Type to serve every variant with
+        digest: Hash of the uncompressed content; the strong ETag of each variant is derived from it
+        cache_control: Cache-Control header; hashed names are immutable
+        variants: Content-Encoding -> path of the precompressed file
+    """
+    path: str
+    media_type: str
+    digest: str
+    cache_control: str
+    variants: Dict[str, str] = field(default_factory=dict)
+
+    def etag(self, encoding: Optional[str]) -> str:
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves .br/.gz variants, strong ETags and long-lived cache headers.
+
+    The directory is indexed once at startup. Compressible files get .gz (and .br, when the
+    brotli package is installed) variants written next to them if they are missing or older
+    than the file. Requests are answered from the index without touching the disk until the
+    body is sent. Files with a content hash in their name are cached as immutable. Anything
+    not in the index (e.g. added after startup) falls back to plain StaticFiles.
+    """
+
+    def __init__(self, *, directory: str, generate_missing: bool = True, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self.generate_missing = generate_missing
+        self.assets: Dict[str, StaticAsset] = {}
+        self._build_index()
+
+    def _build_index(self) -> None:
+        encodings = _available_encodings()
+        suffixes = tuple(ENCODING_SUFFIXES.values())
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(suffixes):
+                    continue
+                path = os.path.join(root, name)
+                with open(path, "rb") as f:
+                    content = f.read()
+                asset = StaticAsset(
+                    path=path,
+                    media_type=mimetypes.guess_type(name)[0] or "application/octet-stream",
+                    digest=hashlib.sha256(content).hexdigest()[:32],
+                    cache_control=IMMUTABLE_CACHE_CONTROL if HASHED_NAME_PATTERN.search(name) else REVALIDATE_CACHE_CONTROL,
+                )
+                if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS and len(content) >= MIN_COMPRESS_BYTES:
+                    for encoding in encodings:
+                        variant_path = self._ensure_variant(path, content, encoding)
+                        if variant_path is not None:
+                            asset.variants[encoding] = variant_path
+                self.assets[os.path.relpath(path, self.directory)] = asset
+        logger.info(f"Indexed {len(self.assets)} static files in {self.directory}")
+
+    def _ensure_variant(self, path: str, content: bytes, encoding: str) -> Optional[str]:
+        variant_path = path + ENCODING_SUFFIXES[encoding]
+        if os.path.exists(variant_path) and os.path.getmtime(variant_path) >= os.path.getmtime(path):
+            return variant_path
+        if not self.generate_missing:
+            return None
+        compressed = _compress(content, encoding)
+        if len(compressed) >= len(content):
+            return None
+        try:
+            with open(variant_path, "wb") as f:
+                f.write(compressed)
+        except OSError as e:
+            logger.warning(f"Could not write {variant_path}: {str(e)}")
+            return None
+        return variant_path
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        asset = self.assets.get(path)
+        if asset is None or scope["method"] not in ("GET", "HEAD"):
+            return await super().get_response(path, scope)
+
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""), list(asset.variants))
+        headers = {"etag": asset.etag(encoding), "cache-control": asset.cache_control}
+        if asset.variants:
+            headers["vary"] = "Accept-Encoding"
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, headers["etag"]):
+            return NotModifiedResponse(Headers(headers))
+        if encoding is not None:
+            headers["content-encoding"] = encoding
+            return FileResponse(asset.variants[encoding], media_type=asset.media_type, headers=headers)
+        return FileResponse(asset.path, media_type=asset.media_type, headers=headers)
+
+
+class InMemoryPage:
+    """
+    A small HTML page (the app's index.html) held in memory with its compressed variants.
+
+    The page isn't content-hashed, so it is served with no-cache and a strong ETag: browsers
+    revalidate on every load and usually get a 304.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.content = f.read()
+        self.digest = hashlib.sha256(self.content).hexdigest()[:32]
+        self.variants = {}
+        for encoding in _available_encodings():
+            compressed = _compress(self.content, encoding)
+            if len(compressed) < len(self.content):
+                self.variants[encoding] = compressed
+
+    def _etag(self, encoding: Optional[str]) -> str:
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+    def response(self, request: Request) -> Response:
+        encoding = choose_encoding(request.headers.get("accept-encoding", ""), list(self.variants))
+        headers = {"etag": self._etag(encoding), "cache-control": REVALIDATE_CACHE_CONTROL, "vary": "Accept-Encoding"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, headers["etag"]):
+            return NotModifiedResponse(Headers(headers))
+        if encoding is not None:
+            headers["content-encoding"] = encoding
+            return Response(self.variants[encoding], media_type="text/html", headers=headers)
+        return Response(self.content, media_type="text/html", headers=headers)
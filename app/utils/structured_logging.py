@@ -0,0 +1,151 @@
+"""
+Queue-based structured logging.
+
+Log calls on the event loop only build a LogRecord and put it on a queue. A QueueListener
+thread formats the records (as JSON lines by default) and writes them, so slow log I/O and
+formatting never add latency to request handling.
+
+Structured fields are passed with `extra=...` and show up as keys of the JSON record. Large
+values are shortened by truncate_for_log, both at the call site (for mutable values like
+chat histories, which must not be read from another thread) and again by JSONFormatter for
+anything that slipped through.
+"""
+import atexit
+import logging
+import queue
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+import orjson
+
+DEFAULT_MAX_FIELD_CHARS = 2000
+DEFAULT_MAX_ITEMS = 20
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else on a record came from `extra`
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+def truncate_for_log(value: Any, max_chars: int = DEFAULT_MAX_FIELD_CHARS, max_items: int = DEFAULT_MAX_ITEMS) -> Any:
+    """
+    Shorten a value so it is cheap to format and write.
+
+    Strings are cut to max_chars. Lists and tuples keep their first and last max_items // 2
+    items with a marker for the ones left out. Dicts are shortened value by value.
+
+    Args:
+        value: The value to shorten
+        max_chars: Longest string kept in full
+        max_items: Most list items kept
+
+    Returns:
+        A shortened copy made of plain JSON types, safe to hand to another thread
+    """
+    if isinstance(value, str):
+        if len(value) <= max_chars:
+            return value
+        return f"{value[:max_chars]}... ({len(value) - max_chars} more chars)"
+    if isinstance(value, (list, tuple)):
+        if len(value) <= max_items:
+            return [truncate_for_log(item, max_chars, max_items) for item in value]
+        head = max_items // 2
+        tail = max_items - head
+        return (
+            [truncate_for_log(item, max_chars, max_items) for item in value[:head]]
+            + [f"... ({len(value) - max_items} more items)"]
+            + [truncate_for_log(item, max_chars, max_items) for item in value[-tail:]]
+        )
+    if isinstance(value, dict):
+        return {str(key): truncate_for_log(item, max_chars, max_items) for key, item in value.items()}
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return truncate_for_log(str(value), max_chars, max_items)
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line, including any `extra` fields.
+    """
+
+    def __init__(self, max_field_chars: int = DEFAULT_MAX_FIELD_CHARS):
+        super().__init__()
+        self.max_field_chars = max_field_chars
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": truncate_for_log(record.getMessage(), self.max_field_chars),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = truncate_for_log(value, self.max_field_chars)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return orjson.dumps(entry).decode("utf-8")
+
+
+class _StructuredQueueHandler(QueueHandler):
+    """
+    QueueHandler that keeps a record's extra fields and exception apart from its message.
+
+    The stock handler merges the traceback into the message, which would put it in the JSON
+    "message" field. The message itself is still rendered here, in the calling thread,
+    because its args may be mutated once the call returns.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener: Optional[QueueListener] = None
+
+def setup_logging(level: str = "INFO", json_format: bool = True, max_field_chars: int = DEFAULT_MAX_FIELD_CHARS) -> QueueListener:
+    """
+    Route all logging through a queue to a background writer thread.
+
+    Replaces the root logger's handlers. Calling it again replaces the previous setup.
+
+    Args:
+        level: Root log level name
+        json_format: Write JSON lines; otherwise the plain text format
+        max_field_chars: Longest string field written in full by the JSON formatter
+
+    Returns:
+        The started QueueListener; it is stopped (flushing queued records) at exit
+    """
+    global _listener
+    _stop_listener()
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(JSONFormatter(max_field_chars) if json_format else logging.Formatter(TEXT_FORMAT))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_StructuredQueueHandler(log_queue))
+    root.setLevel(level.upper())
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def _stop_listener() -> None:
+    global _listener
+    # The listener may already have been stopped by whoever setup_logging returned it to
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+    _listener = None
+
+
+atexit.register(_stop_listener)
@@ -0,0 +1,88 @@
+"""
+CPU time and peak memory of one /continueConversation request's conversation handling.
+
+Runs everything /continueConversation does with the conversation apart from the CHAI call:
+parse the request body, build the chat history, serialize the CHAI request body, append
+the new turn and serialize the response. It runs once with pydantic models, the previous
+path, and once with CompactConversation, on a conversation of --turns turns.
+
+Usage:
+    python -m benchmarks.compact_conversation_benchmark --turns 10000 --iterations 20
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+import orjson
+from app.clients.chai_api_client import CHAIAPIClient
+from app.schemas import ContinueConversationRequest, DialogTurn
+from app.services.compact_conversation import parse_continue_conversation_request
+from app.utils.responses import PydanticJSONResponse
+
+def build_request_body(turns: int) -> bytes:
+    names = ["Elara Moonwhisper", "Thorne Blackwood", "Zephyr Stormrider"]
+    return orjson.dumps({
+        "conversation": {
+            "participants": [{"type": "AI", "name": name, "backstory": f"{name} grew up in a lighthouse. " * 8} for name in names],
+            "dialogTurns": [
+                {"participant": names[i % 3], "content": f"Turn {i}: the storm is getting closer, we should move before the tide turns. " * 2}
+                for i in range(turns)
+            ],
+        }
+    })
+
+
+def pydantic_path(body: bytes) -> bytes:
+    conversation = ContinueConversationRequest.model_validate_json(body).conversation
+    chat_history = [{"sender": turn.participant, "message": turn.content} for turn in conversation.dialogTurns]
+    orjson.dumps(CHAIAPIClient._build_request_data("prompt", "Elara Moonwhisper", "Zephyr Stormrider", chat_history))
+    conversation.dialogTurns.append(DialogTurn(participant="Elara Moonwhisper", content="We leave at dawn."))
+    return PydanticJSONResponse(conversation).body
+
+
+def compact_path(body: bytes) -> bytes:
+    conversation = parse_continue_conversation_request(body)
+    chat_history = conversation.chat_history()
+    orjson.dumps(CHAIAPIClient._build_request_data("prompt", "Elara Moonwhisper", "Zephyr Stormrider", chat_history))
+    conversation.dialogTurns.append(DialogTurn(participant="Elara Moonwhisper", content="We leave at dawn."))
+    return conversation.to_json_bytes()
+
+
+def measure(path: Callable[[bytes], bytes], body: bytes, iterations: int) -> Tuple[float, int]:
+    """
+    Returns the median CPU seconds per call and the peak bytes allocated during one call.
+    """
+    samples: List[float] = []
+    for _ in range(iterations):
+        start = time.process_time()
+        path(body)
+        samples.append(time.process_time() - start)
+
+    tracemalloc.start()
+    path(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(samples), peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=10000, help="dialog turns in the benchmarked conversation")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    body = build_request_body(args.turns)
+    assert orjson.loads(pydantic_path(body)) == orjson.loads(compact_path(body))
+
+    results: Dict[str, Tuple[float, int]] = {
+        "pydantic": measure(pydantic_path, body, args.iterations),
+        "compact": measure(compact_path, body, args.iterations),
+    }
+    print(f"{args.turns} turns, {len(body) / 1e6:.1f}MB request body, {args.iterations} iterations")
+    for name, (cpu_seconds, peak_bytes) in results.items():
+        print(f"{name:<10} cpu {cpu_seconds * 1000:>8.2f}ms  peak memory {peak_bytes / 1e6:>7.2f}MB")
+
+
+if __name__ == "__main__":
+    main()
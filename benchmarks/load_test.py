@@ -0,0 +1,234 @@
+"""
+End-to-end load test for the playground back end.
+
+Starts simulated conversations at a steady rate. Each one calls /initializeCharacters and then
+/continueConversation once per turn, feeding every response into the next request like the
+front end does. Conversations are started so that the overall request rate matches --rps.
+Latency percentiles, throughput and error rates per endpoint are printed and written to a
+JSON file, so runs can be compared between commits.
+
+Usage (against a back end pointed at benchmarks/mock_chai_server.py):
+    python -m benchmarks.load_test --base-url http://localhost:8000 --rps 20 --duration 60 --turns 10 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import platform
+import subprocess
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+import httpx
+
+class LoadTestRecorder:
+    """
+    Collects the latency and outcome of every request, grouped by endpoint.
+    """
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.conversations_started = 0
+        self.conversations_completed = 0
+
+    def record(self, endpoint: str, latency: float, error: Optional[str] = None) -> None:
+        if error is None:
+            self.latencies[endpoint].append(latency)
+        else:
+            self.errors[endpoint][error] += 1
+
+    def summary(self, elapsed_seconds: float) -> Dict[str, Any]:
+        """
+        Returns per-endpoint and overall statistics for a run that took elapsed_seconds.
+        """
+        endpoints = {}
+        for endpoint in sorted(set(self.latencies) | set(self.errors)):
+            endpoints[endpoint] = summarize_endpoint(self.latencies[endpoint], dict(self.errors[endpoint]), elapsed_seconds)
+        all_latencies = [latency for latencies in self.latencies.values() for latency in latencies]
+        all_errors: Dict[str, int] = defaultdict(int)
+        for errors in self.errors.values():
+            for error, count in errors.items():
+                all_errors[error] += count
+        return {
+            "overall": summarize_endpoint(all_latencies, dict(all_errors), elapsed_seconds),
+            "endpoints": endpoints,
+            "conversations_started": self.conversations_started,
+            "conversations_completed": self.conversations_completed,
+        }
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """
+    Nearest-rank percentile of an already sorted list, or None if it is empty.
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize_endpoint(latencies: List[float], errors: Dict[str, int], elapsed_seconds: float) -> Dict[str, Any]:
+    latencies = sorted(latencies)
+    error_count = sum(errors.values())
+    total = len(latencies) + error_count
+    return {
+        "requests": total,
+        "successes": len(latencies),
+        "errors": errors,
+        "error_rate": error_count / total if total else 0.0,
+        "throughput_rps": len(latencies) / elapsed_seconds if elapsed_seconds > 0 else 0.0,
+        "latency_seconds": {
+            "mean": sum(latencies) / len(latencies) if latencies else None,
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": latencies[-1] if latencies else None,
+        },
+    }
+
+
+async def timed_post(client: httpx.AsyncClient, recorder: LoadTestRecorder, endpoint: str, payload: Dict[str, Any]) -> Optional[Any]:
+    """
+    POST a request and record its latency, returning the decoded JSON body or None on failure.
+    """
+    start = time.perf_counter()
+    try:
+        response = await client.post(endpoint, json=payload)
+    except httpx.HTTPError as e:
+        recorder.record(endpoint, time.perf_counter() - start, error=type(e).__name__)
+        return None
+    latency = time.perf_counter() - start
+    if response.status_code != 200:
+        recorder.record(endpoint, latency, error=f"HTTP {response.status_code}")
+        return None
+    recorder.record(endpoint, latency)
+    return response.json()
+
+
+async def run_conversation(client: httpx.AsyncClient, recorder: LoadTestRecorder, cast_size: int, turns: int) -> None:
+    """
+    Play one conversation: generate a cast, then continue the conversation turn by turn.
+    """
+    recorder.conversations_started += 1
+    participants = await timed_post(
+        client, recorder, "/initializeCharacters", {"count": cast_size, "userEngagementEnabled": False}
+    )
+    if participants is None:
+        return
+
+    conversation = {"participants": participants, "dialogTurns": []}
+    for _ in range(turns):
+        updated_conversation = await timed_post(client, recorder, "/continueConversation", {"conversation": conversation})
+        if updated_conversation is None:
+            return
+        conversation = updated_conversation
+    recorder.conversations_completed += 1
+
+
+async def run_load_test(
+    base_url: str,
+    rps: float,
+    duration: float,
+    turns: int,
+    cast_size: int,
+    timeout: float,
+    max_connections: int,
+) -> Dict[str, Any]:
+    """
+    Drive the back end at the target request rate for duration seconds, then wait for the
+    conversations already started to finish.
+
+    Returns:
+        The run's configuration and results
+    """
+    recorder = LoadTestRecorder()
+    requests_per_conversation = 1 + turns
+    conversation_interval = requests_per_conversation / rps
+
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        tasks = []
+        start = time.perf_counter()
+        next_start = start
+        # Open loop: conversations start on schedule regardless of how slow earlier ones are
+        while next_start - start < duration:
+            tasks.append(asyncio.create_task(run_conversation(client, recorder, cast_size, turns)))
+            next_start += conversation_interval
+            await asyncio.sleep(max(0.0, next_start - time.perf_counter()))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "config": {
+            "base_url": base_url,
+            "target_rps": rps,
+            "duration_seconds": duration,
+            "turns_per_conversation": turns,
+            "cast_size": cast_size,
+            "timeout_seconds": timeout,
+        },
+        "environment": {
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "elapsed_seconds": elapsed,
+        "results": recorder.summary(elapsed),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _format_latency(value: Optional[float]) -> str:
+    return f"{value * 1000:.0f}ms" if value is not None else "-"
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    results = report["results"]
+    print(f"Ran for {report['elapsed_seconds']:.1f}s; {results['conversations_completed']}/{results['conversations_started']} conversations completed")
+    rows = [("overall", results["overall"])] + list(results["endpoints"].items())
+    for name, stats in rows:
+        latency = stats["latency_seconds"]
+        print(
+            f"{name:<24} {stats['requests']:>6} req  {stats['throughput_rps']:>7.2f} rps  "
+            f"errors {stats['error_rate']:>6.1%}  p50 {_format_latency(latency['p50']):>7}  "
+            f"p95 {_format_latency(latency['p95']):>7}  p99 {_format_latency(latency['p99']):>7}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000", help="URL of the playground back end")
+    parser.add_argument("--rps", type=float, default=10.0, help="target requests per second across all endpoints")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to keep starting new conversations")
+    parser.add_argument("--turns", type=int, default=10, help="/continueConversation calls per conversation")
+    parser.add_argument("--cast-size", type=int, default=3, help="characters requested from /initializeCharacters")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout in seconds")
+    parser.add_argument("--max-connections", type=int, default=200)
+    parser.add_argument("--output", default="load_test_results.json", help="JSON file the results are written to")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load_test(
+        base_url=args.base_url,
+        rps=args.rps,
+        duration=args.duration,
+        turns=args.turns,
+        cast_size=args.cast_size,
+        timeout=args.timeout,
+        max_connections=args.max_connections,
+    ))
+    print_report(report)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Local stand-in for the CHAI chat endpoint, for load testing without hitting the real API.
+
+Answers the same request shape as the guanaco endpoint with {"model_output": "..."}, after a
+simulated generation latency, and returns 429s at a configurable rate. Responses look like
+what the playground's three call sites get back: a name, a backstory, or a line of dialogue
+(optionally followed by the "USER: ..." tail the real model tends to add). A "stop" list in
+the request cuts the response before the first stop sequence, for CHAI_API_STOP_SEQUENCES_SUPPORTED.
+
+Usage:
+    python -m benchmarks.mock_chai_server --port 8001 --latency-median 0.8 --rate-limit-probability 0.05
+    CHAI_API_BASE_URL=http://localhost:8001/chat uvicorn app.main:app --port 8000
+"""
+import argparse
+import asyncio
+import math
+import random
+from typing import Any, Dict, List, Optional
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from app.clients.fake_backend import FIRST_NAMES, LAST_NAMES, WORDS
+
+class MockChaiSettings(BaseModel):
+    """
+    Behaviour of the mock endpoint.
+
+    Attributes:
+        latency_distribution: "lognormal", "uniform" or "fixed"
+        latency_median: Median generation latency in seconds
+        latency_sigma: Spread of the lognormal distribution (or +/- range for uniform, in seconds)
+        rate_limit_probability: Fraction of requests answered with 429 Too Many Requests
+        retry_after: Retry-After header sent with 429s, in seconds; None to omit it
+        dialogue_words: Mean number of words in a dialogue response
+        user_tail_probability: Fraction of dialogue responses followed by a "USER: ..." tail
+        seed: Seed for the random generator, for reproducible runs
+    """
+    latency_distribution: str = "lognormal"
+    latency_median: float = 0.5
+    latency_sigma: float = 0.5
+    rate_limit_probability: float = 0.0
+    retry_after: Optional[float] = 1.0
+    dialogue_words: int = 30
+    user_tail_probability: float = 0.3
+    seed: Optional[int] = None
+
+
+def _sample_latency(settings: MockChaiSettings, rng: random.Random) -> float:
+    if settings.latency_distribution == "fixed":
+        return settings.latency_median
+    if settings.latency_distribution == "uniform":
+        return max(0.0, rng.uniform(settings.latency_median - settings.latency_sigma, settings.latency_median + settings.latency_sigma))
+    if settings.latency_distribution == "lognormal":
+        return rng.lognormvariate(math.log(max(settings.latency_median, 1e-6)), settings.latency_sigma)
+    raise ValueError(f"Unknown latency distribution: {settings.latency_distribution}")
+
+
+def _sentence(rng: random.Random, word_count: int) -> str:
+    words = [rng.choice(WORDS) for _ in range(max(1, word_count))]
+    return " ".join(words).capitalize() + "."
+
+
+def generate_model_output(payload: Dict[str, Any], settings: MockChaiSettings, rng: random.Random) -> str:
+    """
+    Make up a response shaped like what the real endpoint returns for the request's call site.
+
+    Args:
+        payload: The CHAI API request body
+        settings: The mock's settings
+        rng: Random generator to draw from
+
+    Returns:
+        The model_output string
+    """
+    chat_history: List[Dict[str, str]] = payload.get("chat_history") or []
+    last_message = chat_history[-1]["message"] if chat_history else ""
+
+    if "first name and last name" in last_message:
+        return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}."
+    if "Name:" in last_message:
+        return " ".join(_sentence(rng, rng.randint(12, 24)) for _ in range(3))
+
+    word_count = max(1, int(rng.expovariate(1 / settings.dialogue_words)))
+    output = _sentence(rng, word_count)
+    if rng.random() < settings.user_tail_probability:
+        output += f"\nUSER: {_sentence(rng, 6)}"
+    return output
+
+
+def _cut_at_stop(output: str, stop_sequences: List[str]) -> str:
+    cut = len(output)
+    for stop in stop_sequences:
+        index = output.find(stop) if stop else -1
+        if index != -1:
+            cut = min(cut, index)
+    return output[:cut]
+
+
+def create_mock_chai_app(settings: Optional[MockChaiSettings] = None) -> FastAPI:
+    """Create the mock CHAI endpoint app."""
+    settings = settings if settings is not None else MockChaiSettings()
+    rng = random.Random(settings.seed)
+    app = FastAPI(title="Mock CHAI endpoint")
+
+    @app.post("/chat")
+    async def chat(payload: Dict[str, Any]):
+        if rng.random() < settings.rate_limit_probability:
+            headers = {"Retry-After": str(settings.retry_after)} if settings.retry_after is not None else None
+            return JSONResponse(status_code=429, content={"detail": "Too Many Requests"}, headers=headers)
+
+        await asyncio.sleep(_sample_latency(settings, rng))
+        return {"model_output": _cut_at_stop(generate_model_output(payload, settings, rng), payload.get("stop") or [])}
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-distribution", choices=["lognormal", "uniform", "fixed"], default="lognormal")
+    parser.add_argument("--latency-median", type=float, default=0.5, help="median generation latency in seconds")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="lognormal sigma, or +/- seconds for uniform")
+    parser.add_argument("--rate-limit-probability", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s; negative to omit")
+    parser.add_argument("--dialogue-words", type=int, default=30, help="mean words per dialogue response")
+    parser.add_argument("--user-tail-probability", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    settings = MockChaiSettings(
+        latency_distribution=args.latency_distribution,
+        latency_median=args.latency_median,
+        latency_sigma=args.latency_sigma,
+        rate_limit_probability=args.rate_limit_probability,
+        retry_after=args.retry_after if args.retry_after >= 0 else None,
+        dialogue_words=args.dialogue_words,
+        user_tail_probability=args.user_tail_probability,
+        seed=args.seed,
+    )
+    uvicorn.run(create_mock_chai_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Micro-benchmark of the JSON serialization done per /continueConversation request.
+
+Compares the previous path against the current one for a conversation of --turns turns:
+    - CHAI request body: ChatMessage/CHAIAPIRequest validation, model_dump() and json.dumps
+      (what httpx's json= did) versus a plain dict serialized once with orjson
+    - Route response: jsonable_encoder and json.dumps (FastAPI's default for a returned model)
+      versus PydanticJSONResponse
+
+Usage:
+    python -m benchmarks.serialization_benchmark --turns 1000 --iterations 200
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.clients.chai_api_client import CHAIAPIClient
+from app.clients.schemas.chai_schemas import CHAIAPIRequest, ChatMessage
+from app.schemas import Conversation, DialogTurn, Participant
+from app.utils.responses import PydanticJSONResponse
+
+def build_conversation(turns: int) -> Conversation:
+    participants = [
+        Participant(type="AI", name=f"Character {i}", backstory=f"Character {i} grew up in a lighthouse. " * 8)
+        for i in range(3)
+    ]
+    dialog_turns = [
+        DialogTurn(participant=participants[i % 3].name, content=f"Turn {i}: the storm is getting closer, we should move. " * 3)
+        for i in range(turns)
+    ]
+    return Conversation(participants=participants, dialogTurns=dialog_turns)
+
+
+def build_chat_history(conversation: Conversation) -> List[Dict[str, str]]:
+    return [{"sender": turn.participant, "message": turn.content} for turn in conversation.dialogTurns]
+
+
+def old_request_body(chat_history: List[Dict[str, str]]) -> bytes:
+    request_data = CHAIAPIRequest(
+        memory="",
+        prompt="You are Character 0.",
+        bot_name="Character 0",
+        user_name="Character 1",
+        chat_history=[ChatMessage(sender=msg["sender"], message=msg["message"]) for msg in chat_history],
+    )
+    request_data.model_dump()  # logged
+    return json.dumps(request_data.model_dump()).encode("utf-8")
+
+
+def new_request_body(chat_history: List[Dict[str, str]]) -> bytes:
+    return orjson.dumps(CHAIAPIClient._build_request_data("You are Character 0.", "Character 0", "Character 1", chat_history))
+
+
+def old_response_body(conversation: Conversation) -> bytes:
+    return JSONResponse(jsonable_encoder(conversation)).body
+
+
+def new_response_body(conversation: Conversation) -> bytes:
+    return PydanticJSONResponse(conversation).body
+
+
+def time_call(function: Callable[[], Any], iterations: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return {"mean": statistics.mean(samples), "median": statistics.median(samples)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=1000, help="dialog turns in the benchmarked conversation")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    conversation = build_conversation(args.turns)
+    chat_history = build_chat_history(conversation)
+
+    assert json.loads(old_request_body(chat_history)) == json.loads(new_request_body(chat_history))
+    assert json.loads(old_response_body(conversation)) == json.loads(new_response_body(conversation))
+
+    cases = [
+        ("CHAI request body", lambda: old_request_body(chat_history), lambda: new_request_body(chat_history)),
+        ("route response", lambda: old_response_body(conversation), lambda: new_response_body(conversation)),
+    ]
+    print(f"{args.turns} turns, {args.iterations} iterations (median)")
+    for name, old, new in cases:
+        old_time = time_call(old, args.iterations)["median"]
+        new_time = time_call(new, args.iterations)["median"]
+        print(f"{name:<20} old {old_time * 1000:>8.3f}ms  new {new_time * 1000:>8.3f}ms  {old_time / new_time:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Unit tests for the CHAIAPIClient class.
+"""
+import asyncio
+import json
+import time
+import pytest
+import httpx
+from app.clients.chai_api_client import CHAIAPIClient
+from app.clients.rate_limiter import AdaptiveRateLimiter
+from app.utils.deadline import Deadline, DeadlineExceededError
+from benchmarks.mock_chai_server import MockChaiSettings, create_mock_chai_app
+
+class TestCHAIAPIClient:
+    """Test cases for the CHAIAPIClient class."""
+
+    @pytest.mark.asyncio
+    async def test_invoke_llm_reuses_pooled_http_client(self, mock_chai_api_key):
+        """Test that consecutive calls share one connection pool instead of building a client per call."""
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json={"model_output": "  Hello there.  "})
+
+        client = CHAIAPIClient(transport=httpx.MockTransport(handler))
+        await client.start()
+        pooled_client = client._http_client
+
+        assert await client.invoke_llm("prompt", "Bot", "User", []) == "Hello there."
+        assert await client.invoke_llm("prompt", "Bot", "User", []) == "Hello there."
+        assert client._http_client is pooled_client
+
+        await client.aclose()
+        assert client._http_client is None
+        assert pooled_client.is_closed
+
+    @pytest.mark.asyncio
+    async def test_invoke_llm_sends_chat_history_as_json(self, mock_chai_api_key):
+        """Test that the request body is built from the chat history dicts in the CHAI request format."""
+        bodies = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            assert request.headers["content-type"] == "application/json"
+            bodies.append(json.loads(request.content))
+            return httpx.Response(200, json={"model_output": "Hi"})
+
+        client = CHAIAPIClient(transport=httpx.MockTransport(handler))
+        chat_history = [{"sender": "User", "message": "Hello \u00e9"}]
+        assert await client.invoke_llm("prompt", "Bot", "User", chat_history) == "Hi"
+        await client.aclose()
+
+        assert bodies == [{
+            "memory": "",
+            "prompt": "prompt",
+            "bot_name": "Bot",
+            "user_name": "User",
+            "chat_history": chat_history,
+        }]
+
+    @pytest.mark.asyncio
+    async def test_invoke_llm_starts_pool_lazily(self, mock_chai_api_key):
+        """Test that the pool is created on first use when start() was never called."""
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, json={"model_output": "Hi"})
+
+        client = CHAIAPIClient(transport=httpx.MockTransport(handler), max_connections_per_host=2)
+        assert client._http_client is None
+
+        assert await client.invoke_llm("prompt", "Bot", "User", []) == "Hi"
+        assert client._http_client is not None
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_drain_waits_for_in_flight_calls(self, mock_chai_api_key):
+        """Test that drain() returns once in-flight calls finish, or reports them at the deadline."""
+        release = asyncio.Event()
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            await release.wait()
+            return httpx.Response(200, json={"model_output": "Done"})
+
+        client = CHAIAPIClient(transport=httpx.MockTransport(handler), rate_limiter=AdaptiveRateLimiter(initial_rate=100.0, max_rate=100.0))
+        assert await client.drain(timeout=0.01)
+
+        call = asyncio.create_task(client.invoke_llm("prompt", "Bot", "User", []))
+        await asyncio.sleep(0.01)
+        assert not await client.drain(timeout=0.01)
+
+        asyncio.get_running_loop().call_later(0.01, release.set)
+        assert await client.drain(timeout=1.0)
+        assert await call == "Done"
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_deadline_caps_retries_and_timeouts(self, mock_chai_api_key):
+        """Test that a deadline stops 429 retries and slow responses instead of waiting them out."""
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(429, headers={"Retry-After": "30"})
+
+        rate_limiter = AdaptiveRateLimiter(initial_rate=100.0, min_rate=50.0, max_rate=100.0)
+        client = CHAIAPIClient(transport=httpx.MockTransport(handler), rate_limiter=rate_limiter)
+        with pytest.raises(DeadlineExceededError):
+            await client.invoke_llm("prompt", "Bot", "User", [], deadline=Deadline(1.0))
+
+        async def slow(request: httpx.Request) -> httpx.Response:
+            await asyncio.sleep(5)
+            return httpx.Response(200, json={"model_output": "Too late"})
+
+        slow_client = CHAIAPIClient(transport=httpx.MockTransport(slow), rate_limiter=AdaptiveRateLimiter(initial_rate=100.0, max_rate=100.0))
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceededError):
+            await slow_client.invoke_llm("prompt", "Bot", "User", [], deadline=Deadline(0.1))
+        assert time.monotonic() - start < 1.0
+        await client.aclose()
+        await slow_client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_base_url_points_at_mock_server(self, mock_chai_api_key):
+        """Test that the client can be pointed at the bundled mock CHAI server."""
+        settings = MockChaiSettings(latency_distribution="fixed", latency_median=0, user_tail_probability=1.0, seed=0)
+        transport = httpx.ASGITransport(app=create_mock_chai_app(settings))
+        client = CHAIAPIClient(transport=transport, base_url="http://mock-chai/chat")
+
+        response = await client.invoke_llm("prompt", "Bot", "User", [{"sender": "User", "message": "Hello"}])
+        assert "\nUSER: " in response
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_invoke_llm_retries_429_on_same_pool(self, mock_chai_api_key):
+        """Test that 429 responses are retried with backoff through the shared pool."""
+        responses = [
+            httpx.Response(429, json={"detail": "Too many requests"}),
+            httpx.Response(200, json={"model_output": "Recovered"}),
+        ]
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return responses.pop(0)
+
+        rate_limiter = AdaptiveRateLimiter(initial_rate=100.0, min_rate=50.0, max_rate=200.0)
+        client = CHAIAPIClient(initial_backoff=0, transport=httpx.MockTransport(handler), rate_limiter=rate_limiter)
+        assert await client.invoke_llm("prompt", "Bot", "User", []) == "Recovered"
+        assert responses == []
+        # The 429 halved the rate and the success nudged it back up
+        assert rate_limiter.rate == pytest.approx(50.2)
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_identical_concurrent_calls_are_coalesced(self, mock_chai_api_key):
+        """Test that concurrent identical requests share one upstream call, and cancelling one caller doesn't affect the others."""
+        release_response = asyncio.Event()
+        upstream_calls = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            upstream_calls.append(request)
+            await release_response.wait()
+            return httpx.Response(200, json={"model_output": "Shared reply"})
+
+        rate_limiter = AdaptiveRateLimiter(initial_rate=100.0, max_rate=100.0, burst=10)
+        client = CHAIAPIClient(transport=httpx.MockTransport(handler), rate_limiter=rate_limiter)
+        history = [{"sender": "User", "message": "Hello"}]
+
+        callers = [asyncio.create_task(client.invoke_llm("prompt", "Bot", "User", history)) for _ in range(3)]
+        different_request = asyncio.create_task(client.invoke_llm("prompt", "Bot", "User", []))
+        await asyncio.sleep(0.01)
+
+        callers[0].cancel()
+        release_response.set()
+        results = await asyncio.gather(*callers[1:], different_request)
+
+        assert results == ["Shared reply"] * 3
+        assert callers[0].cancelled()
+        assert len(upstream_calls) == 2
+        assert client._single_flight.pending == {}
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_coalesced_callers_all_receive_the_error(self, mock_chai_api_key):
+        """Test that an upstream failure is raised to every coalesced caller."""
+        upstream_calls = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            upstream_calls.append(request)
+            await asyncio.sleep(0.01)
+            return httpx.Response(500, json={"detail": "boom"})
+
+        rate_limiter = AdaptiveRateLimiter(initial_rate=100.0, max_rate=100.0, burst=10)
+        client = CHAIAPIClient(transport=httpx.MockTransport(handler), rate_limiter=rate_limiter)
+
+        results = await asyncio.gather(
+            *[client.invoke_llm("prompt", "Bot", "User", []) for _ in range(3)],
+            return_exceptions=True
+        )
+
+        assert len(upstream_calls) == 1
+        assert all(isinstance(result, httpx.HTTPStatusError) for result in results)
+        await client.aclose()
@@ -0,0 +1,64 @@
+"""
+Unit tests for the CircuitBreaker class.
+"""
+import httpx
+import pytest
+from app.clients.chai_api_client import CHAIAPIClient
+from app.clients.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+from app.clients.rate_limiter import AdaptiveRateLimiter
+
+class TestCircuitBreaker:
+    """Test cases for the CircuitBreaker class."""
+
+    def test_state_transitions(self):
+        """Test closed -> open -> half-open -> closed, and reopening on a failed trial."""
+        breaker = CircuitBreaker("upstream", failure_threshold=2, recovery_timeout=0.0)
+        breaker.before_call()
+        breaker.on_failure()
+        assert breaker.state == CircuitState.CLOSED
+        breaker.on_failure()
+        assert breaker.state == CircuitState.OPEN
+
+        # Recovery timeout elapsed: one trial call is allowed, a second concurrent one is not
+        breaker.before_call()
+        assert breaker.state == CircuitState.HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        breaker.on_failure()
+        assert breaker.state == CircuitState.OPEN
+
+        breaker.before_call()
+        breaker.on_success()
+        assert breaker.state == CircuitState.CLOSED
+        assert breaker.consecutive_failures == 0
+
+    def test_open_circuit_fails_fast(self):
+        """Test that an open circuit rejects calls until the recovery timeout passes."""
+        breaker = CircuitBreaker("upstream", failure_threshold=1, recovery_timeout=60.0)
+        breaker.on_failure()
+        with pytest.raises(CircuitOpenError) as exc_info:
+            breaker.before_call()
+        assert 59 < exc_info.value.retry_after <= 60
+
+    @pytest.mark.asyncio
+    async def test_client_opens_circuit_on_server_errors(self, mock_chai_api_key):
+        """Test that repeated 5xx responses open the client's circuit, while 429s don't count."""
+        calls = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal calls
+            calls += 1
+            return httpx.Response(503)
+
+        client = CHAIAPIClient(
+            transport=httpx.MockTransport(handler),
+            rate_limiter=AdaptiveRateLimiter(initial_rate=100.0, max_rate=100.0),
+            circuit_breaker_failure_threshold=2,
+        )
+        for _ in range(2):
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.invoke_llm("prompt", "Bot", "User", [])
+        with pytest.raises(CircuitOpenError):
+            await client.invoke_llm("prompt", "Bot", "User", [])
+        assert calls == 2
+        await client.aclose()
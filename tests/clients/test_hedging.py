@@ -0,0 +1,93 @@
+"""
+Unit tests for request hedging.
+"""
+import asyncio
+import time
+import httpx
+import pytest
+from app.clients.hedging import LatencyTracker, RequestHedger
+
+def _primed_hedger(budget_ratio: float = 1.0) -> RequestHedger:
+    hedger = RequestHedger(percentile=0.9, budget_ratio=budget_ratio, min_samples=5, min_delay=0.0)
+    for _ in range(5):
+        hedger.tracker("dialogue").observe(0.01)
+    return hedger
+
+
+async def _allow() -> bool:
+    return True
+
+
+class TestRequestHedger:
+    """Test cases for the RequestHedger class."""
+
+    def test_latency_tracker_percentile(self):
+        """Test that percentiles need min_samples and follow the rolling window."""
+        tracker = LatencyTracker(window_size=10, min_samples=3, refresh_interval=1)
+        tracker.observe(1.0)
+        tracker.observe(2.0)
+        assert tracker.percentile(0.5) is None
+
+        for latency in range(3, 11):
+            tracker.observe(float(latency))
+        assert tracker.percentile(0.5) == 5.0
+        assert tracker.percentile(0.95) == 10.0
+
+        tracker.observe(11.0)
+        assert tracker.percentile(0.05) == 2.0
+
+    @pytest.mark.asyncio
+    async def test_slow_request_is_hedged_and_loser_cancelled(self):
+        """Test that a hedge is sent after the percentile delay and the first response wins."""
+        hedger = _primed_hedger()
+        attempts = []
+
+        async def send_request() -> httpx.Response:
+            attempt = len(attempts)
+            attempts.append("started")
+            try:
+                await asyncio.sleep(1.0 if attempt == 0 else 0.01)
+            except asyncio.CancelledError:
+                attempts[attempt] = "cancelled"
+                raise
+            return httpx.Response(200, json={"attempt": attempt})
+
+        start = time.monotonic()
+        response = await hedger.send("dialogue", send_request, _allow)
+        await asyncio.sleep(0)
+
+        assert response.json() == {"attempt": 1}
+        assert time.monotonic() - start < 0.5
+        assert attempts == ["cancelled", "started"]
+
+    @pytest.mark.asyncio
+    async def test_hedges_respect_budget_and_limiter(self):
+        """Test that no hedge is sent without budget or when the limiter has no token."""
+        calls = 0
+
+        async def send_request() -> httpx.Response:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return httpx.Response(200)
+
+        async def deny() -> bool:
+            return False
+
+        await _primed_hedger(budget_ratio=0.1).send("dialogue", send_request, _allow)
+        await _primed_hedger().send("dialogue", send_request, deny)
+        assert calls == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_hedge_does_not_win(self):
+        """Test that an error response from one request doesn't beat a good response from the other."""
+        hedger = _primed_hedger()
+        statuses = [200, 500]
+
+        async def send_request() -> httpx.Response:
+            status = statuses.pop(0)
+            await asyncio.sleep(0.05 if status == 200 else 0.0)
+            return httpx.Response(status)
+
+        response = await hedger.send("dialogue", send_request, _allow)
+        assert response.status_code == 200
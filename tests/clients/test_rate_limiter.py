@@ -0,0 +1,115 @@
+"""
+Unit tests for the AdaptiveRateLimiter class.
+"""
+import asyncio
+import time
+import pytest
+from app.clients.rate_limiter import AdaptiveRateLimiter, SharedAdaptiveRateLimiter, parse_retry_after
+
+class TestAdaptiveRateLimiter:
+    """Test cases for the AdaptiveRateLimiter class."""
+
+    @pytest.mark.asyncio
+    async def test_acquire_allows_burst_then_paces(self):
+        """Test that a full bucket is spent immediately and later calls wait for refill."""
+        limiter = AdaptiveRateLimiter(initial_rate=20.0, min_rate=1.0, max_rate=20.0, burst=2.0)
+
+        start = time.monotonic()
+        await limiter.acquire()
+        await limiter.acquire()
+        assert time.monotonic() - start < 0.02
+
+        await limiter.acquire()
+        assert time.monotonic() - start >= 0.04
+
+    @pytest.mark.asyncio
+    async def test_aimd_rate_adjustments(self):
+        """Test that successes add to the rate and throttles multiply it down, within bounds."""
+        limiter = AdaptiveRateLimiter(initial_rate=2.0, min_rate=0.5, max_rate=2.5, additive_increase=0.3)
+
+        limiter.on_success()
+        assert limiter.rate == pytest.approx(2.3)
+        limiter.on_success()
+        assert limiter.rate == pytest.approx(2.5)
+
+        await limiter.on_throttle()
+        assert limiter.rate == pytest.approx(1.25)
+        await limiter.on_throttle()
+        await limiter.on_throttle()
+        assert limiter.rate == pytest.approx(0.5)
+
+    @pytest.mark.asyncio
+    async def test_retry_after_blocks_callers(self):
+        """Test that a Retry-After value holds back the next acquire until it has elapsed."""
+        limiter = AdaptiveRateLimiter(initial_rate=100.0, min_rate=100.0, max_rate=100.0, multiplicative_decrease=0.5)
+
+        await limiter.on_throttle(retry_after=0.1)
+        start = time.monotonic()
+        await limiter.acquire()
+        assert time.monotonic() - start >= 0.09
+
+    @pytest.mark.asyncio
+    async def test_shared_state_between_limiters(self, tmp_path):
+        """Test that limiters on the same state file draw from one bucket and back off together."""
+        state_path = str(tmp_path / "limiter.sqlite3")
+        settings = dict(initial_rate=10.0, min_rate=1.0, max_rate=10.0, burst=2.0)
+        first = SharedAdaptiveRateLimiter(state_path=state_path, **settings)
+        second = SharedAdaptiveRateLimiter(state_path=state_path, **settings)
+
+        start = time.monotonic()
+        await first.acquire()
+        await first.acquire()
+        assert time.monotonic() - start < 0.05
+        # The bucket is empty for every process now
+        await second.acquire()
+        assert time.monotonic() - start >= 0.08
+
+        await first.on_throttle()
+        await second.acquire()
+        assert second.rate == pytest.approx(5.0)
+
+        # Successes are applied to the shared rate with the next acquire
+        second.on_success()
+        await second.acquire()
+        await first.acquire()
+        assert first.rate == pytest.approx(5.2)
+
+        first.close()
+        second.close()
+
+    @pytest.mark.asyncio
+    async def test_shared_throttle_does_not_block_event_loop(self, tmp_path):
+        """Test that a throttle waiting on the shared state's lock leaves the event loop free."""
+        limiter = SharedAdaptiveRateLimiter(state_path=str(tmp_path / "limiter.sqlite3"), initial_rate=10.0, max_rate=10.0)
+
+        with limiter._connection_lock:
+            throttle = asyncio.create_task(limiter.on_throttle())
+            await asyncio.sleep(0.05)
+            assert not throttle.done()
+        await throttle
+        assert limiter.rate == pytest.approx(5.0)
+        limiter.close()
+
+    @pytest.mark.asyncio
+    async def test_shared_successes_are_not_lost(self, tmp_path):
+        """Test that successes counted on the event loop while transactions run in threads all reach the shared rate."""
+        limiter = SharedAdaptiveRateLimiter(state_path=str(tmp_path / "limiter.sqlite3"), initial_rate=1.0, max_rate=10_000.0, burst=1_000_000.0)
+        successes = 2000
+
+        async def count_successes():
+            for index in range(successes):
+                limiter.on_success()
+                if index % 50 == 0:
+                    await asyncio.sleep(0)
+
+        await asyncio.gather(count_successes(), *[limiter.try_acquire() for _ in range(50)])
+        await limiter.try_acquire()
+        assert limiter.rate == pytest.approx(1.0 + successes * limiter.additive_increase)
+        limiter.close()
+
+    def test_parse_retry_after(self):
+        """Test that Retry-After headers are parsed in both seconds and HTTP-date form."""
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("3") == 3.0
+        assert parse_retry_after("not a date") is None
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
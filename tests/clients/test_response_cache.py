@@ -0,0 +1,98 @@
+"""
+Unit tests for the ResponseCache class.
+"""
+import pytest
+import httpx
+from app.clients.chai_api_client import CHAIAPIClient
+from app.clients.rate_limiter import AdaptiveRateLimiter
+from app.clients.response_cache import CachePolicy, ResponseCache, canonical_request_key
+from app.clients.schemas.chai_schemas import CallSite
+
+class TestResponseCache:
+    """Test cases for the ResponseCache class."""
+
+    def test_canonical_request_key(self):
+        """Test that the key only depends on the request content."""
+        history = [{"sender": "Jason", "message": "Hi"}]
+        key = canonical_request_key("prompt", "Brian", "Jason", history)
+
+        assert key == canonical_request_key("prompt", "Brian", "Jason", [{"message": "Hi", "sender": "Jason"}])
+        assert key != canonical_request_key("prompt", "Jason", "Brian", history)
+        assert key != canonical_request_key("prompt", "Brian", "Jason", history + history)
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction_and_ttl(self):
+        """Test that the memory tier evicts least recently used entries and expires stale ones."""
+        cache = ResponseCache(policies={}, max_entries=2)
+        policy = CachePolicy()
+
+        await cache.set("a", "A", policy)
+        await cache.set("b", "B", policy)
+        assert await cache.get("a") == "A"  # "b" is now least recently used
+        await cache.set("c", "C", policy)
+
+        assert await cache.get("b") is None
+        assert await cache.get("c") == "C"
+
+        await cache.set("d", "D", CachePolicy(ttl_seconds=-1))
+        assert await cache.get("d") is None
+
+        stats = cache.stats()
+        assert stats.hits == 2
+        assert stats.misses == 2
+        assert stats.evictions == 2
+        assert stats.expirations == 1
+
+    @pytest.mark.asyncio
+    async def test_byte_limit(self):
+        """Test that the memory tier stays within its byte limit."""
+        cache = ResponseCache(policies={}, max_bytes=400)
+
+        for index in range(10):
+            await cache.set(str(index), "x" * 100, CachePolicy())
+
+        assert cache.stats().bytes <= 400
+        assert await cache.get("9") == "x" * 100
+        assert await cache.get("0") is None
+
+    @pytest.mark.asyncio
+    async def test_disk_tier(self, tmp_path):
+        """Test that responses survive in the on-disk tier for a new cache instance."""
+        db_path = str(tmp_path / "response_cache.sqlite3")
+        await ResponseCache(policies={}, db_path=db_path).set("key", "value", CachePolicy())
+
+        cache = ResponseCache(policies={}, db_path=db_path)
+        assert await cache.get("key") == "value"
+        assert cache.stats().diskHits == 1
+
+    @pytest.mark.asyncio
+    async def test_client_only_caches_call_sites_with_a_policy(self, mock_chai_api_key):
+        """Test that CHAIAPIClient serves cached call sites from the cache and always calls upstream for others."""
+        upstream_calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            upstream_calls.append(request)
+            return httpx.Response(200, json={"model_output": f"reply {len(upstream_calls)}"})
+
+        cache = ResponseCache(policies={CallSite.CHARACTER_BACKSTORY: CachePolicy()})
+        client = CHAIAPIClient(
+            transport=httpx.MockTransport(handler),
+            rate_limiter=AdaptiveRateLimiter(initial_rate=100.0, max_rate=100.0, burst=10),
+            response_cache=cache,
+        )
+        history = [{"sender": "Jason", "message": "Name: Elara."}]
+
+        assert await client.invoke_llm("prompt", "Brian", "Jason", history, call_site=CallSite.CHARACTER_BACKSTORY) == "reply 1"
+        assert await client.invoke_llm("prompt", "Brian", "Jason", history, call_site=CallSite.CHARACTER_BACKSTORY) == "reply 1"
+        assert await client.invoke_llm("prompt", "Brian", "Jason", history, call_site=CallSite.DIALOGUE) == "reply 2"
+        assert await client.invoke_llm("prompt", "Brian", "Jason", history, call_site=CallSite.DIALOGUE) == "reply 3"
+
+        assert len(upstream_calls) == 3
+        assert cache.stats().hits == 1
+        await client.aclose()
+
+    def test_character_names_are_never_cached(self):
+        """Test that a policy for the character_name call site is ignored."""
+        cache = ResponseCache(policies={CallSite.CHARACTER_NAME: CachePolicy(), CallSite.CHARACTER_BACKSTORY: CachePolicy()})
+        assert cache.policy_for(CallSite.CHARACTER_NAME) is None
+        assert cache.policy_for(CallSite.CHARACTER_BACKSTORY) is not None
@@ -0,0 +1,166 @@
+"""
+Unit tests for the latency-aware router and the fake completion backend.
+"""
+import asyncio
+import random
+from typing import AsyncIterator, Optional
+import httpx
+import pytest
+from app.clients.chai_api_client import CHAIAPIClient
+from app.clients.circuit_breaker import CircuitOpenError
+from app.clients.fake_backend import FakeCompletionBackend
+from app.clients.rate_limiter import AdaptiveRateLimiter
+from app.clients.router import LatencyAwareRouter
+from app.clients.schemas.chai_schemas import CallSite
+from app.utils.deadline import DeadlineExceededError
+
+class FailingBackend(FakeCompletionBackend):
+    """Fake backend whose calls fail with the given exception."""
+
+    def __init__(self, error: Exception):
+        super().__init__()
+        self.error = error
+
+    async def invoke_llm(self, *args, **kwargs) -> Optional[str]:
+        self.calls += 1
+        raise self.error
+
+    async def stream_llm(self, *args, **kwargs) -> AsyncIterator[str]:
+        raise self.error
+        yield
+
+
+async def _invoke(router: LatencyAwareRouter, times: int) -> None:
+    for index in range(times):
+        await router.invoke_llm("prompt", "Bot", "User", [{"sender": "User", "message": str(index)}], CallSite.DIALOGUE)
+
+
+class TestLatencyAwareRouter:
+    """Test cases for the LatencyAwareRouter class."""
+
+    @pytest.mark.asyncio
+    async def test_prefers_the_faster_backend(self):
+        """Test that once latencies are known, the slower backend only gets calls when it is drawn twice."""
+        fast, slow = FakeCompletionBackend(), FakeCompletionBackend()
+        router = LatencyAwareRouter({"fast": fast, "slow": slow}, rng=random.Random(0))
+        router.stats["fast"].on_success(0.1)
+        router.stats["slow"].on_success(2.0)
+
+        await _invoke(router, 20)
+        assert fast.calls == 20
+        assert slow.calls == 0
+
+    @pytest.mark.asyncio
+    async def test_spreads_calls_over_equal_backends(self):
+        """Test that backends with the same load share the calls."""
+        backends = {name: FakeCompletionBackend() for name in ("a", "b", "c")}
+        router = LatencyAwareRouter(backends, rng=random.Random(0))
+
+        await _invoke(router, 60)
+        assert sum(backend.calls for backend in backends.values()) == 60
+        assert all(backend.calls > 0 for backend in backends.values())
+
+    def test_avoids_a_backend_with_errors(self):
+        """Test that a backend's error rate inflates its load above an otherwise equal backend's."""
+        router = LatencyAwareRouter({"ok": FakeCompletionBackend(), "failing": FakeCompletionBackend()}, rng=random.Random(0))
+        for stats in router.stats.values():
+            stats.on_success(0.5)
+        router.stats["failing"].on_error()
+
+        assert router.choose() == ["ok", "failing"]
+
+    @pytest.mark.asyncio
+    async def test_fails_over_when_circuit_is_open(self):
+        """Test that a call is made on the other candidate when the chosen backend's circuit is open."""
+        broken = FailingBackend(CircuitOpenError("http://broken", 30.0))
+        healthy = FakeCompletionBackend()
+        router = LatencyAwareRouter({"broken": broken, "healthy": healthy}, rng=random.Random(0))
+        # Make the broken backend look best, so it is tried first
+        router.stats["broken"].on_success(0.01)
+        router.stats["healthy"].on_success(1.0)
+
+        response = await router.invoke_llm("prompt", "Bot", "User", [], CallSite.DIALOGUE)
+        assert response
+        assert broken.calls == 1
+        assert healthy.calls == 1
+        assert router.stats["broken"].error_rate > 0
+        assert router.in_flight_requests == 0
+
+    @pytest.mark.asyncio
+    async def test_identical_concurrent_calls_make_one_upstream_call(self, mock_chai_api_key):
+        """Test that identical calls in flight at once are coalesced before an endpoint is picked."""
+        upstream_calls = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            upstream_calls.append(request.url)
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json={"model_output": "Shared reply"})
+
+        endpoints = {
+            url: CHAIAPIClient(base_url=url, transport=httpx.MockTransport(handler), rate_limiter=AdaptiveRateLimiter(initial_rate=100.0, max_rate=100.0, burst=10))
+            for url in ("http://a.test/chat", "http://b.test/chat")
+        }
+        router = LatencyAwareRouter(endpoints, rng=random.Random(0))
+        history = [{"sender": "User", "message": "Hello"}]
+
+        responses = await asyncio.gather(*[router.invoke_llm("prompt", "Bot", "User", history, CallSite.DIALOGUE) for _ in range(10)])
+        assert responses == ["Shared reply"] * 10
+        assert len(upstream_calls) == 1
+        assert router._single_flight.pending == {}
+        await router.aclose()
+
+    @pytest.mark.asyncio
+    async def test_other_errors_are_not_retried(self):
+        """Test that errors other than an open circuit propagate from the chosen backend."""
+        failing = FailingBackend(RuntimeError("boom"))
+        router = LatencyAwareRouter({"failing": failing})
+
+        with pytest.raises(RuntimeError):
+            await router.invoke_llm("prompt", "Bot", "User", [], CallSite.DIALOGUE)
+        assert failing.calls == 1
+        assert router.stats["failing"].in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_caller_side_failures_are_not_backend_errors(self):
+        """Test that a missed deadline or a cancelled caller doesn't count against the backend."""
+        timed_out = FailingBackend(DeadlineExceededError("deadline exceeded"))
+        router = LatencyAwareRouter({"timed_out": timed_out})
+        with pytest.raises(DeadlineExceededError):
+            await router.invoke_llm("prompt", "Bot", "User", [], CallSite.DIALOGUE)
+        with pytest.raises(DeadlineExceededError):
+            async for _ in router.stream_llm("prompt", "Bot", "User", [], CallSite.DIALOGUE):
+                pass
+        assert router.stats["timed_out"].error_rate == 0
+
+        router = LatencyAwareRouter({"slow": FakeCompletionBackend(latency=1.0)})
+        # The coalesced call is shielded from its callers, so cancel the routed call itself
+        call = asyncio.create_task(router._invoke_routed("prompt", "Bot", "User", [], CallSite.DIALOGUE, None, None, None))
+        await asyncio.sleep(0.01)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        assert router.stats["slow"].error_rate == 0
+        assert router.stats["slow"].in_flight == 0
+
+class TestFakeCompletionBackend:
+    """Test cases for the FakeCompletionBackend class."""
+
+    @pytest.mark.asyncio
+    async def test_responses_are_deterministic(self):
+        """Test that identical requests get identical responses, across instances with the same seed."""
+        history = [{"sender": "User", "message": "Hello"}]
+        first = await FakeCompletionBackend(seed=1).invoke_llm("prompt", "Bot", "User", history, CallSite.DIALOGUE)
+        second = await FakeCompletionBackend(seed=1).invoke_llm("prompt", "Bot", "User", history, CallSite.DIALOGUE)
+        assert first == second
+
+    @pytest.mark.asyncio
+    async def test_cuts_at_stop_sequences_and_streams_the_same_text(self):
+        """Test that stop sequences cut the response, and streamed chunks join up to the full response."""
+        backend = FakeCompletionBackend()
+        name = await backend.invoke_llm("prompt", "Bot", "User", [], CallSite.CHARACTER_NAME, stop_sequences=["."])
+        assert name and "." not in name
+
+        full = await backend.invoke_llm("prompt", "Bot", "User", [], CallSite.DIALOGUE)
+        chunks = [chunk async for chunk in backend.stream_llm("prompt", "Bot", "User", [], CallSite.DIALOGUE)]
+        assert "".join(chunks) == full
+        assert backend.in_flight_requests == 0
@@ -0,0 +1,103 @@
+"""
+Unit tests for the fair upstream call scheduler.
+"""
+import asyncio
+from typing import List
+import httpx
+import pytest
+from app.clients.chai_api_client import CHAIAPIClient
+from app.clients.rate_limiter import AdaptiveRateLimiter
+from app.clients.scheduler import FairScheduler, priority_for
+from app.clients.schemas.chai_schemas import CallSite, RequestPriority
+from app.utils.deadline import Deadline, DeadlineExceededError
+
+INTERACTIVE = RequestPriority.INTERACTIVE
+BACKGROUND = RequestPriority.BACKGROUND
+
+async def _grant_order(scheduler: FairScheduler, calls: List[tuple]) -> List[str]:
+    """
+    Queue calls of (session, priority) behind a held slot, then release it and return the order they ran in.
+    """
+    order = []
+
+    async def call(session_id: str, priority: RequestPriority) -> None:
+        async with scheduler.slot(session_id, priority):
+            order.append(session_id)
+            await asyncio.sleep(0)
+
+    await scheduler.acquire("holder", INTERACTIVE)
+    tasks = []
+    for session_id, priority in calls:
+        tasks.append(asyncio.create_task(call(session_id, priority)))
+        await asyncio.sleep(0)
+    scheduler.release()
+    await asyncio.gather(*tasks)
+    return order
+
+
+class TestFairScheduler:
+    """Test cases for the FairScheduler class."""
+
+    def test_character_generation_is_background_work(self):
+        """Test that only character generation call sites are scheduled as background work."""
+        assert priority_for(CallSite.CHARACTER_NAME) == BACKGROUND
+        assert priority_for(CallSite.CHARACTER_BACKSTORY) == BACKGROUND
+        assert priority_for(CallSite.DIALOGUE) == INTERACTIVE
+        assert priority_for(None) == INTERACTIVE
+
+    @pytest.mark.asyncio
+    async def test_sessions_are_interleaved(self):
+        """Test that a session with many queued calls doesn't hold up a session that queued after it."""
+        scheduler = FairScheduler(max_concurrency=1)
+        order = await _grant_order(scheduler, [("a", INTERACTIVE)] * 3 + [("b", INTERACTIVE)])
+        assert order == ["a", "b", "a", "a"]
+        assert scheduler.in_use == 0
+
+    @pytest.mark.asyncio
+    async def test_interactive_calls_go_ahead_of_background_work(self):
+        """Test that interactive sessions get their weight's share ahead of background sessions."""
+        scheduler = FairScheduler(max_concurrency=1, weights={INTERACTIVE: 2})
+        calls = [("pool", BACKGROUND)] * 3 + [("user", INTERACTIVE)] * 4
+        order = await _grant_order(scheduler, calls)
+        assert order == ["pool", "user", "user", "pool", "user", "user", "pool"]
+
+    @pytest.mark.asyncio
+    async def test_queued_call_gives_up_at_deadline(self):
+        """Test that a call stops waiting when its deadline passes and doesn't take a slot later."""
+        scheduler = FairScheduler(max_concurrency=1)
+        await scheduler.acquire("holder", INTERACTIVE)
+
+        with pytest.raises(DeadlineExceededError):
+            await scheduler.acquire("late", INTERACTIVE, deadline=Deadline(0.01))
+        assert scheduler.queued(INTERACTIVE) == 0
+
+        scheduler.release()
+        assert scheduler.in_use == 0
+        await scheduler.acquire("next", INTERACTIVE)
+        assert scheduler.in_use == 1
+
+    @pytest.mark.asyncio
+    async def test_client_calls_hold_a_slot(self, mock_chai_api_key):
+        """Test that CHAIAPIClient calls wait for a scheduler slot and give it back afterwards."""
+        scheduler = FairScheduler(max_concurrency=1)
+        slots_in_use = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            slots_in_use.append(scheduler.in_use)
+            return httpx.Response(200, json={"model_output": "Hi"})
+
+        client = CHAIAPIClient(
+            transport=httpx.MockTransport(handler),
+            rate_limiter=AdaptiveRateLimiter(initial_rate=100.0, max_rate=100.0),
+            coalesce_requests=False,
+            scheduler=scheduler,
+        )
+        responses = await asyncio.gather(*[
+            client.invoke_llm("prompt", "Bot", "User", [], call_site=CallSite.DIALOGUE, session_id=f"session-{i}")
+            for i in range(3)
+        ])
+        await client.aclose()
+
+        assert responses == ["Hi", "Hi", "Hi"]
+        assert slots_in_use == [1, 1, 1]
+        assert scheduler.in_use == 0
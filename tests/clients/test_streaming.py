@@ -0,0 +1,130 @@
+"""
+Unit tests for the incremental response helpers in app.clients.streaming.
+"""
+import json
+import re
+import pytest
+import httpx
+from app.clients.chai_api_client import CHAIAPIClient
+from app.clients.hedging import RequestHedger
+from app.clients.rate_limiter import AdaptiveRateLimiter
+from app.clients.schemas.chai_schemas import CallSite
+from app.clients.streaming import ModelOutputDecoder, WhitespaceTrimmer, StopSequenceScanner
+from app.services.character_sandbox_service import CHARACTER_NAME_STOP_SEQUENCES, CONTINUE_CONVERSATION_STOP_SEQUENCES
+
+def _split_every(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+class TestModelOutputDecoder:
+    """Test cases for the ModelOutputDecoder class."""
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1000])
+    def test_decodes_model_output_across_chunk_boundaries(self, chunk_size):
+        """Test that escapes, unicode and surrogate pairs split across chunks decode like json.loads."""
+        model_output = 'Héllo "traveler"\\n\n\t\u00e9 \U0001F600 done'
+        body = json.dumps({"generation_params": {"x": 1}, "model_output": model_output, "after": "ignored"}).encode()
+
+        decoder = ModelOutputDecoder()
+        decoded = "".join(decoder.feed(chunk) for chunk in _split_every(body, chunk_size))
+        decoder.close()
+
+        assert decoder.finished
+        assert decoded == model_output
+
+    def test_close_raises_when_model_output_missing(self):
+        """Test that a body without model_output is reported as an error."""
+        decoder = ModelOutputDecoder()
+        decoder.feed(b'{"detail": "nope"}')
+        with pytest.raises(ValueError):
+            decoder.close()
+
+class TestStreamingHelpers:
+    """Test cases for the WhitespaceTrimmer and StopSequenceScanner classes."""
+
+    def test_whitespace_trimmer_matches_strip(self):
+        """Test that the trimmer drops leading and trailing whitespace but keeps inner whitespace."""
+        trimmer = WhitespaceTrimmer()
+        pieces = ["  ", " Hello", "  ", "there ", "  "]
+        assert "".join(trimmer.feed(piece) for piece in pieces) == "".join(pieces).strip()
+
+    def test_stop_sequence_scanner_holds_back_partial_matches(self):
+        """Test that a stop sequence split across chunks is found and nothing after it is emitted."""
+        scanner = StopSequenceScanner(["USER", ":"])
+
+        assert scanner.feed("I sense a disturbance. US") == ("I sense a disturbance. ", False)
+        assert scanner.feed("ER: What?") == ("", True)
+
+        scanner = StopSequenceScanner(["USER", ":"])
+        assert scanner.feed("Trust the US") == ("Trust the ", False)
+        assert scanner.feed(" army") == ("US army", False)
+        assert scanner.flush() == ""
+
+class TestCHAIAPIClientStreaming:
+    """Test cases for CHAIAPIClient.stream_llm."""
+
+    @pytest.mark.asyncio
+    async def test_stream_llm_yields_stripped_model_output(self, mock_chai_api_key):
+        """Test that the streamed chunks join up to the same text invoke_llm returns."""
+        body = json.dumps({"model_output": "  Greetings, traveler.  "}).encode()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, stream=httpx.ByteStream(body))
+
+        rate_limiter = AdaptiveRateLimiter(initial_rate=100.0, max_rate=100.0)
+        client = CHAIAPIClient(transport=httpx.MockTransport(handler), rate_limiter=rate_limiter)
+
+        chunks = [chunk async for chunk in client.stream_llm("prompt", "Bot", "User", [])]
+        assert "".join(chunks) == "Greetings, traveler."
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("model_output", ["  Elara Moonwhisper.  ", "Kael*", "  Wren", "Orin <br> Jason: more?"])
+    async def test_invoke_llm_stop_sequences_match_name_post_processing(self, model_output, mock_chai_api_key):
+        """Test that cutting at the name stop sequences gives what the old split on the full text did."""
+        body = json.dumps({"model_output": model_output}).encode()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            assert "stop" not in json.loads(request.content)
+            return httpx.Response(200, stream=httpx.ByteStream(body))
+
+        rate_limiter = AdaptiveRateLimiter(initial_rate=100.0, max_rate=100.0)
+        client = CHAIAPIClient(transport=httpx.MockTransport(handler), rate_limiter=rate_limiter)
+
+        response = await client.invoke_llm("prompt", "Bot", "User", [], stop_sequences=CHARACTER_NAME_STOP_SEQUENCES)
+        assert response == re.split(r'\.|\*|Jason|<| ', model_output.strip())[0]
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_invoke_llm_cuts_at_stop_sequence_on_hedged_path(self, mock_chai_api_key):
+        """Test that stop sequences are applied client-side to the buffered response, which is still hedged."""
+        bodies = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            bodies.append(json.loads(request.content))
+            return httpx.Response(200, json={"model_output": " Hello there.\nUSER: what now? "})
+
+        hedger = RequestHedger(percentile=0.9, min_samples=5)
+        rate_limiter = AdaptiveRateLimiter(initial_rate=100.0, max_rate=100.0)
+        client = CHAIAPIClient(transport=httpx.MockTransport(handler), rate_limiter=rate_limiter, hedger=hedger)
+
+        response = await client.invoke_llm("prompt", "Bot", "User", [], CallSite.DIALOGUE, stop_sequences=CONTINUE_CONVERSATION_STOP_SEQUENCES)
+        assert response == "Hello there.\n"
+        assert "stop" not in bodies[0]
+        assert len(hedger.tracker(CallSite.DIALOGUE.value)) == 1
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_invoke_llm_sends_stop_sequences_upstream_when_supported(self, mock_chai_api_key):
+        """Test that stop sequences go in the request body when the endpoint supports them."""
+        bodies = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            bodies.append(json.loads(request.content))
+            return httpx.Response(200, json={"model_output": " Hello there. "})
+
+        rate_limiter = AdaptiveRateLimiter(initial_rate=100.0, max_rate=100.0)
+        client = CHAIAPIClient(transport=httpx.MockTransport(handler), rate_limiter=rate_limiter, upstream_stop_sequences=True)
+
+        assert await client.invoke_llm("prompt", "Bot", "User", [], stop_sequences=["USER"]) == "Hello there."
+        assert bodies[0]["stop"] == ["USER"]
+        await client.aclose()
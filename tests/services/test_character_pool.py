@@ -0,0 +1,116 @@
+"""
+Unit tests for the CharacterPool class.
+"""
+import asyncio
+import sqlite3
+import pytest
+from app.schemas import Participant
+from app.services.character_sandbox_service import CharacterSandboxService
+from app.services.character_pool import CharacterPool
+
+async def _wait_for_depth(pool: CharacterPool, depth: int):
+    for _ in range(100):
+        if len(pool) >= depth:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Character pool never reached depth {depth}")
+
+def _idle_service(mock_chai_client) -> CharacterSandboxService:
+    mock_chai_client.in_flight_requests = 0
+    service = CharacterSandboxService()
+    service.chai_client = mock_chai_client
+    return service
+
+class TestCharacterPool:
+    """Test cases for the CharacterPool class."""
+
+    @pytest.mark.asyncio
+    async def test_pool_fills_to_capacity_and_serves_initialize_characters(self, mock_chai_api_key, mock_chai_client, sample_initialize_request):
+        """Test that the producer fills the pool and initialize_characters uses it instead of calling the API."""
+        mock_chai_client.invoke_llm.side_effect = ["Elara Moonwhisper", "Elara's backstory", "Thorne Blackwood", "Thorne's backstory"]
+        service = _idle_service(mock_chai_client)
+        pool = CharacterPool(service, capacity=2)
+        service.character_pool = pool
+
+        await pool.start()
+        await _wait_for_depth(pool, 2)
+        await pool.stop()
+        assert mock_chai_client.invoke_llm.call_count == 4
+
+        participants = await service.initialize_characters(sample_initialize_request)
+
+        assert [p.name for p in participants] == ["Stranger", "Elara", "Thorne"]
+        assert mock_chai_client.invoke_llm.call_count == 4  # no live generation
+        stats = pool.stats()
+        assert stats.depth == 0
+        assert stats.hits == 2
+        assert stats.generatedTotal == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_generations_are_not_pooled(self, mock_chai_api_key, mock_chai_client):
+        """Test that placeholder characters from failed generations never enter the pool."""
+        mock_chai_client.invoke_llm.side_effect = Exception("upstream down")
+        service = _idle_service(mock_chai_client)
+        pool = CharacterPool(service, capacity=2, failure_backoff_seconds=0.01)
+
+        await pool.start()
+        await asyncio.sleep(0.05)
+        await pool.stop()
+
+        assert len(pool) == 0
+        assert pool.stats().failedTotal > 0
+        assert await pool.pop() is None
+
+    @pytest.mark.asyncio
+    async def test_pool_is_persisted_across_restarts(self, mock_chai_api_key, mock_chai_client, tmp_path):
+        """Test that pooled characters are reloaded from the SQLite file by a new pool."""
+        mock_chai_client.invoke_llm.side_effect = ["Elara Moonwhisper", "Elara's backstory"]
+        db_path = str(tmp_path / "character_pool.sqlite3")
+        service = _idle_service(mock_chai_client)
+
+        pool = CharacterPool(service, capacity=1, db_path=db_path)
+        await pool.start()
+        await _wait_for_depth(pool, 1)
+        await pool.stop()
+
+        restarted_pool = CharacterPool(service, capacity=1, db_path=db_path)
+        await restarted_pool.start()
+        participant = await restarted_pool.pop()
+        await restarted_pool.stop()
+
+        assert participant.name == "Elara"
+        assert participant.backstory == "Elara's backstory"
+        assert CharacterPool(service, capacity=1, db_path=db_path)._load_persisted() == []
+
+    @pytest.mark.asyncio
+    async def test_pop_returns_character_when_pool_file_fails(self, mock_chai_api_key, mock_chai_client, tmp_path):
+        """Test that a failure deleting the persisted row doesn't stop the character being served."""
+        mock_chai_client.invoke_llm.side_effect = ["Elara Moonwhisper", "Elara's backstory"]
+        service = _idle_service(mock_chai_client)
+        pool = CharacterPool(service, capacity=1, db_path=str(tmp_path / "character_pool.sqlite3"))
+        await pool.start()
+        await _wait_for_depth(pool, 1)
+        await pool.stop()
+
+        def locked(row_id: int) -> None:
+            raise sqlite3.OperationalError("database is locked")
+
+        pool._delete_persisted = locked
+        participant = await pool.pop()
+        assert participant.name == "Elara"
+
+    @pytest.mark.asyncio
+    async def test_characters_with_clashing_names_stay_pooled(self, mock_chai_api_key, mock_chai_client, sample_initialize_request):
+        """Test that a pooled character whose name is already in the cast is left in the pool instead of being dropped."""
+        service = _idle_service(mock_chai_client)
+        pool = CharacterPool(service, capacity=3)
+        service.character_pool = pool
+        for name in ("Elara", "Elara", "Thorne"):
+            pool._participants.append((None, Participant(type="AI", name=name, backstory=f"{name}'s backstory")))
+
+        participants = await service.initialize_characters(sample_initialize_request)
+
+        assert [p.name for p in participants] == ["Stranger", "Elara", "Thorne"]
+        assert mock_chai_client.invoke_llm.call_count == 0
+        assert len(pool) == 1
+        assert (await pool.pop()).name == "Elara"
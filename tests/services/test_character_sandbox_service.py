@@ -3,9 +3,11 @@ Unit tests for the CharacterSandboxService class.
 """
 import pytest
 import asyncio
+import time
 from unittest.mock import AsyncMock, MagicMock, patch
+from app.clients.fake_backend import FakeCompletionBackend
 from app.services.character_sandbox_service import CharacterSandboxService
-from app.schemas import Participant, DialogTurn, Conversation, ContinueConversationRequest
+from app.schemas import Participant, DialogTurn, Conversation, ContinueConversationRequest, AutoplayConversationRequest, InitalizeCharactersRequest
 
 class TestCharacterSandboxService:
     """Test cases for the CharacterSandboxService class."""
@@ -174,6 +176,37 @@ class TestCharacterSandboxService:
         # Check that the API was called the correct number of times
         assert mock_chai_client.invoke_llm.call_count == 4  # 2 characters * 2 calls each (name + backstory)
 
+    @pytest.mark.asyncio
+    async def test_initialize_characters_regenerates_duplicate_names(self, mock_chai_api_key, mock_chai_client):
+        """Test that a name already in the cast is regenerated instead of reused."""
+        mock_chai_client.invoke_llm.side_effect = [
+            "Elara Moonwhisper", "Elara's backstory",
+            "Elara Nightshade",
+            "Thorne Blackwood", "Thorne's backstory",
+        ]
+        service = CharacterSandboxService()
+        service.chai_client = mock_chai_client
+
+        participants = await service.initialize_characters(InitalizeCharactersRequest(count=2, userEngagementEnabled=False))
+
+        assert [participant.name for participant in participants] == ["Elara", "Thorne"]
+        assert mock_chai_client.invoke_llm.call_count == 5
+        # The retry is seeded with the duplicate, so it isn't the same request again
+        retry_history = mock_chai_client.invoke_llm.call_args_list[2].kwargs["chat_history"]
+        assert retry_history[1]["message"] == "Elara"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_casts_generate_names_in_parallel(self, mock_chai_api_key):
+        """Test that name generation is only serialized within a cast, not across concurrent casts."""
+        service = CharacterSandboxService(chai_client=FakeCompletionBackend(latency=0.2))
+        request = InitalizeCharactersRequest(count=1, userEngagementEnabled=False)
+
+        start = time.monotonic()
+        casts = await asyncio.gather(*[service.initialize_characters(request) for _ in range(3)])
+        # A name and a backstory call each, all casts at once: ~0.4s rather than ~0.8s
+        assert time.monotonic() - start < 0.6
+        assert all(len(cast) == 1 and not service.is_fallback_character(cast[0]) for cast in casts)
+
     @pytest.mark.asyncio
     async def test_continue_conversation(self, mock_chai_api_key, mock_chai_client, sample_conversation, mock_continue_conversation_response):
         """Test that the conversation is correctly continued with a mocked API response."""
@@ -225,3 +258,55 @@ class TestCharacterSandboxService:
         
         # Check that the API was called
         mock_chai_client.invoke_llm.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_continue_conversation_stream(self, mock_chai_api_key, mock_chai_client, sample_conversation):
+        """Test that streamed dialogue is cut like the non-streaming response and the upstream stream is closed early."""
+        upstream_chunks = ["I sense a dist", "urbance. US", "ER: What kind of disturbance?", " never read"]
+        consumed = []
+
+        async def fake_stream_llm(**kwargs):
+            for chunk in upstream_chunks:
+                consumed.append(chunk)
+                yield chunk
+
+        mock_chai_client.stream_llm = fake_stream_llm
+
+        service = CharacterSandboxService()
+        service.chai_client = mock_chai_client
+
+        request = ContinueConversationRequest(conversation=sample_conversation)
+        events = [event async for event in service.continue_conversation_stream(request)]
+
+        assert events[0][0] == "turn"
+        next_speaker = events[0][1].participant
+        deltas = [data.content for event, data in events if event == "delta"]
+        assert "".join(deltas) == service.post_process_continue_conversation_response("".join(upstream_chunks))
+
+        event, updated_conversation = events[-1]
+        assert event == "done"
+        assert updated_conversation.dialogTurns[-1].participant == next_speaker
+        assert updated_conversation.dialogTurns[-1].content == "I sense a disturbance. "
+
+        # Stopped as soon as the cut point was seen
+        assert consumed == upstream_chunks[:3]
+
+    @pytest.mark.asyncio
+    async def test_autoplay_conversation(self, mock_chai_api_key, mock_chai_client, sample_conversation):
+        """Test that autoplay generates the requested number of turns in order, with alternating speakers."""
+        mock_chai_client.invoke_llm.side_effect = ["First reply.", "Second reply.", "Third reply. USER: hi"]
+
+        service = CharacterSandboxService()
+        service.chai_client = mock_chai_client
+
+        request = AutoplayConversationRequest(conversation=sample_conversation, turns=3)
+        new_turns = [turn async for turn in service.autoplay_conversation_turns(request)]
+
+        assert [turn.content for turn in new_turns] == ["First reply.", "Second reply.", "Third reply. "]
+        assert request.conversation.dialogTurns[-3:] == new_turns
+        assert len(request.conversation.dialogTurns) == 6
+        assert mock_chai_client.invoke_llm.call_count == 3
+
+        # Nobody speaks twice in a row
+        speakers = [turn.participant for turn in request.conversation.dialogTurns[2:]]
+        assert all(a != b for a, b in zip(speakers, speakers[1:]))
@@ -0,0 +1,66 @@
+"""
+Unit tests for the CompactConversation class.
+"""
+import orjson
+import pytest
+from app.schemas import Conversation, DialogTurn
+from app.services.character_sandbox_service import CharacterSandboxService
+from app.services.compact_conversation import CompactConversation, ConversationFormatError, parse_continue_conversation_request
+
+class TestCompactConversation:
+    """Test cases for CompactConversation and parse_continue_conversation_request."""
+
+    def test_round_trips_like_the_pydantic_model(self, sample_conversation):
+        """Test that parsing and serializing gives the same JSON as the Conversation model."""
+        body = orjson.dumps({"conversation": sample_conversation.model_dump()})
+        conversation = parse_continue_conversation_request(body)
+
+        assert orjson.loads(conversation.to_json_bytes()) == orjson.loads(sample_conversation.model_dump_json())
+        assert conversation.to_conversation() == sample_conversation
+        assert len(conversation.dialogTurns) == len(sample_conversation.dialogTurns)
+        assert conversation.dialogTurns[-1] == sample_conversation.dialogTurns[-1]
+        assert conversation.dialogTurns[-2:] == sample_conversation.dialogTurns[-2:]
+        assert conversation.chat_history()[0] == {
+            "sender": sample_conversation.dialogTurns[0].participant,
+            "message": sample_conversation.dialogTurns[0].content,
+        }
+
+    def test_speaker_names_are_interned_and_unknown_keys_dropped(self):
+        """Test that every turn by the same speaker shares one name string."""
+        body = orjson.dumps({"conversation": {
+            "participants": [],
+            "dialogTurns": [{"participant": "Elara", "content": str(i), "extra": True} for i in range(3)],
+        }})
+        turns = parse_continue_conversation_request(body).dialogTurns.to_json_list()
+
+        assert turns[0]["participant"] is turns[2]["participant"]
+        assert turns[0] == {"participant": "Elara", "content": "0"}
+
+    @pytest.mark.parametrize("body", [
+        b"not json",
+        b"[]",
+        b'{"conversation": {"participants": [], "dialogTurns": {}}}',
+        b'{"conversation": {"participants": [{"name": "Elara"}], "dialogTurns": []}}',
+        b'{"conversation": {"participants": [], "dialogTurns": [{"participant": "Elara", "content": 1}]}}',
+    ])
+    def test_invalid_bodies_are_rejected(self, body):
+        """Test that bodies that aren't a ContinueConversationRequest raise ConversationFormatError."""
+        with pytest.raises(ConversationFormatError):
+            parse_continue_conversation_request(body)
+
+    @pytest.mark.asyncio
+    async def test_service_continues_compact_conversation(self, mock_chai_api_key, mock_chai_client, sample_empty_conversation):
+        """Test that the service bootstraps and continues a CompactConversation like a Conversation."""
+        mock_chai_client.invoke_llm.return_value = "Greetings, traveler."
+        service = CharacterSandboxService()
+        service.chai_client = mock_chai_client
+
+        compact = CompactConversation.from_conversation(sample_empty_conversation)
+        await service.continue_compact_conversation(compact)
+
+        conversation = compact.to_conversation()
+        assert conversation.dialogTurns[-1].content == "Greetings, traveler."
+        # Backstory bootstrap turns were inserted in front of the new turn
+        assert len(conversation.dialogTurns) == len([p for p in conversation.participants if p.type == "AI"]) + 1
+        chat_history = mock_chai_client.invoke_llm.call_args.kwargs["chat_history"]
+        assert all(set(message) == {"sender", "message"} for message in chat_history)
@@ -0,0 +1,64 @@
+"""
+Unit tests for the ContextWindowManager class.
+"""
+from app.services.context_window import BACKSTORY_MESSAGE_PREFIX, ContextWindowManager, extractive_summary
+
+def _history(turn_count: int, message_length: int = 100):
+    backstories = [
+        {"sender": "Seraphina Vale", "message": f"{BACKSTORY_MESSAGE_PREFIX} A warrior.. Allow me to introduce myself."},
+        {"sender": "Thorne Blackwood", "message": f"{BACKSTORY_MESSAGE_PREFIX} A druid.. Allow me to introduce myself."},
+    ]
+    turns = [
+        {"sender": "Seraphina Vale" if i % 2 else "Thorne Blackwood", "message": f"Turn {i}. " + "x" * message_length}
+        for i in range(turn_count)
+    ]
+    return backstories + turns
+
+class TestContextWindowManager:
+    """Test cases for the ContextWindowManager class."""
+
+    def test_history_within_budget_is_untouched(self):
+        """Test that short histories are passed through as-is."""
+        history = _history(3)
+        assert ContextWindowManager(max_chars=10000).fit(history) is history
+
+    def test_keeps_backstories_and_recent_turns(self):
+        """Test that the middle is dropped while backstory turns and the most recent turns survive."""
+        history = _history(200)
+        manager = ContextWindowManager(max_chars=2000, summarizer=None)
+
+        fitted = manager.fit(history)
+
+        assert fitted[:2] == history[:2]
+        assert fitted[-1] == history[-1]
+        assert fitted[2:] == history[-(len(fitted) - 2):]
+        assert sum(len(m["sender"]) + len(m["message"]) + 8 for m in fitted) <= 2000
+
+    def test_min_recent_turns_kept_over_budget(self):
+        """Test that the most recent turns are kept even if they alone exceed the budget."""
+        fitted = ContextWindowManager(max_chars=500, min_recent_turns=3, summarizer=None).fit(_history(10, message_length=400))
+        assert [m["message"] for m in fitted[2:]] == [m["message"] for m in _history(10, message_length=400)[-3:]]
+
+    def test_rolling_summary_is_cached_and_extended(self):
+        """Test that evicted turns are summarized once and later requests only summarize newly evicted turns."""
+        summarized = []
+
+        def recording_summarizer(previous_summary, messages):
+            summarized.append(len(messages))
+            return extractive_summary(previous_summary, messages)
+
+        manager = ContextWindowManager(max_chars=3000, summarizer=recording_summarizer, summary_max_chars=800)
+        history = _history(60)
+
+        first = manager.fit(history)
+        assert first[2]["sender"] == "Narrator"
+        last_evicted_index = int(first[3]["message"].split(".")[0].split()[1]) - 1
+        assert f"Turn {last_evicted_index}." in first[2]["message"]
+        assert len(first[2]["message"]) <= 800 + len("Summary of the earlier conversation:\n")
+
+        manager.fit(history)
+        assert len(summarized) == 1  # served from cache
+
+        manager.fit(history + _history(2)[2:])
+        assert len(summarized) == 2
+        assert summarized[1] < summarized[0]
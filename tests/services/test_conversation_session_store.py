@@ -0,0 +1,95 @@
+"""
+Unit tests for server-side conversation sessions.
+"""
+import pytest
+from app.services.character_sandbox_service import CharacterSandboxService
+from app.services.conversation_session_store import ConversationSessionStore, SessionConflictError, SessionNotFoundError
+from app.schemas import Conversation, ContinueSessionRequest, DialogTurn
+
+class TestConversationSessionStore:
+    """Test cases for the ConversationSessionStore class."""
+
+    def test_lru_eviction(self, sample_conversation):
+        """Test that the least recently used session is evicted when the store is full."""
+        store = ConversationSessionStore(max_sessions=2)
+        first = store.create(sample_conversation)
+        second = store.create(sample_conversation)
+
+        store.get(first.session_id)
+        store.create(sample_conversation)
+
+        assert store.get(first.session_id) is first
+        with pytest.raises(SessionNotFoundError):
+            store.get(second.session_id)
+
+    def test_ttl_expiry(self, sample_conversation):
+        """Test that sessions unused for longer than the TTL are dropped."""
+        store = ConversationSessionStore(ttl_seconds=-1)
+        session = store.create(sample_conversation)
+
+        with pytest.raises(SessionNotFoundError):
+            store.get(session.session_id)
+        assert len(store) == 0
+
+class TestContinueSession:
+    """Test cases for CharacterSandboxService.continue_session."""
+
+    @pytest.mark.asyncio
+    async def test_delta_protocol(self, mock_chai_api_key, mock_chai_client, sample_conversation):
+        """Test that only new turns travel in either direction once a session exists."""
+        mock_chai_client.invoke_llm.side_effect = ["First reply.", "Second reply."]
+        service = CharacterSandboxService()
+        service.chai_client = mock_chai_client
+
+        started = await service.continue_session(ContinueSessionRequest(conversation=sample_conversation))
+        assert started.offset == 3
+        assert [turn.content for turn in started.dialogTurns] == ["First reply."]
+        assert started.turnCount == 4
+
+        user_turn = DialogTurn(participant="Stranger", content="Tell me more.")
+        continued = await service.continue_session(ContinueSessionRequest(
+            sessionId=started.sessionId,
+            knownTurnCount=started.turnCount,
+            newDialogTurns=[user_turn]
+        ))
+        assert continued.sessionId == started.sessionId
+        assert continued.offset == 5
+        assert [turn.content for turn in continued.dialogTurns] == ["Second reply."]
+        assert continued.turnCount == 6
+
+        stored_turns = service.session_store.get(started.sessionId).conversation.dialogTurns
+        assert stored_turns[4] == user_turn
+
+    @pytest.mark.asyncio
+    async def test_bootstrap_turns_resend_everything(self, mock_chai_api_key, mock_chai_client, sample_empty_conversation, mock_continue_conversation_response):
+        """Test that when backstory turns are prepended the whole conversation is returned from offset 0."""
+        mock_chai_client.invoke_llm.return_value = mock_continue_conversation_response
+        service = CharacterSandboxService()
+        service.chai_client = mock_chai_client
+
+        conversation = Conversation(
+            participants=sample_empty_conversation.participants,
+            dialogTurns=[DialogTurn(participant="Stranger", content="Hello?")]
+        )
+        response = await service.continue_session(ContinueSessionRequest(conversation=conversation))
+
+        assert response.offset == 0
+        assert len(response.dialogTurns) == response.turnCount == 4
+
+    @pytest.mark.asyncio
+    async def test_missing_session_and_conflicts(self, mock_chai_api_key, mock_chai_client, sample_conversation):
+        """Test the fallback signals for missing sessions and out-of-sync clients, and rollback on failure."""
+        service = CharacterSandboxService()
+        service.chai_client = mock_chai_client
+
+        with pytest.raises(SessionNotFoundError):
+            await service.continue_session(ContinueSessionRequest(sessionId="unknown"))
+
+        mock_chai_client.invoke_llm.side_effect = Exception("upstream down")
+        with pytest.raises(Exception):
+            await service.continue_session(ContinueSessionRequest(conversation=sample_conversation))
+        session_id = next(iter(service.session_store._sessions))
+        assert len(service.session_store.get(session_id).conversation.dialogTurns) == 3
+
+        with pytest.raises(SessionConflictError):
+            await service.continue_session(ContinueSessionRequest(sessionId=session_id, knownTurnCount=7))
@@ -0,0 +1,72 @@
+"""
+Unit tests for the ConversationStore class.
+"""
+import pytest
+from app.schemas import Conversation, DialogTurn, Participant
+from app.services.conversation_store import ConversationStore
+
+def build_conversation(turns: int) -> Conversation:
+    return Conversation(
+        participants=[Participant(type="AI", name="Elara", backstory="A sorceress."), Participant(type="AI", name="Thorne", backstory="A druid.")],
+        dialogTurns=[DialogTurn(participant="Elara" if i % 2 == 0 else "Thorne", content=f"Turn {i}") for i in range(turns)],
+    )
+
+
+class TestConversationStore:
+    """Test cases for the ConversationStore class."""
+
+    @pytest.mark.asyncio
+    async def test_batched_writes_and_paginated_reads(self, tmp_path):
+        """Test that recorded turns are written in the background and read back a page at a time."""
+        store = ConversationStore(str(tmp_path / "conversations.sqlite3"), flush_interval=0.01)
+        await store.start()
+
+        conversation = build_conversation(5)
+        store.record("c1", conversation)
+        conversation.dialogTurns.extend(build_conversation(10).dialogTurns[5:])
+        store.record("c1", conversation, start_ordinal=5)
+        await store.flush()
+
+        participants, turn_count, turns = await store.get_turns("c1", limit=4)
+        assert [participant.name for participant in participants] == ["Elara", "Thorne"]
+        assert turn_count == 10
+        assert [turn.ordinal for turn in turns] == [6, 7, 8, 9]
+        assert turns[-1].content == "Turn 9"
+
+        _, _, earlier = await store.get_turns("c1", before=turns[0].ordinal, limit=4)
+        assert [turn.ordinal for turn in earlier] == [2, 3, 4, 5]
+        _, _, first = await store.get_turns("c1", before=2, limit=4)
+        assert [turn.content for turn in first] == ["Turn 0", "Turn 1"]
+
+        assert await store.get_turns("missing") is None
+        assert store.written_turns == 10
+        await store.stop()
+
+    @pytest.mark.asyncio
+    async def test_rewritten_turns_are_overwritten_and_persist_across_restarts(self, tmp_path):
+        """Test that re-recording a turn replaces it, and the store survives a restart in WAL mode."""
+        db_path = str(tmp_path / "conversations.sqlite3")
+        store = ConversationStore(db_path, flush_interval=0.01)
+        await store.start()
+        conversation = build_conversation(3)
+        store.record("c1", conversation)
+        conversation.dialogTurns[2] = DialogTurn(participant="Thorne", content="Rewritten")
+        store.record("c1", conversation, start_ordinal=2)
+        await store.stop()
+
+        restarted = ConversationStore(db_path)
+        with restarted.engine.connect() as connection:
+            assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        _, turn_count, turns = await restarted.get_turns("c1")
+        assert turn_count == 3
+        assert [turn.content for turn in turns] == ["Turn 0", "Turn 1", "Rewritten"]
+        restarted.engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_writes_without_blocking(self, tmp_path):
+        """Test that record never blocks the caller when the writer falls behind."""
+        store = ConversationStore(str(tmp_path / "conversations.sqlite3"), max_pending=1)
+        store.record("c1", build_conversation(1))
+        store.record("c2", build_conversation(1))
+        assert store.dropped_writes == 1
+        store.engine.dispose()
@@ -0,0 +1,30 @@
+"""
+Unit tests for the MentionIndex class.
+"""
+import random
+from app.services.mention_index import MentionIndex, get_mention_index
+
+class TestMentionIndex:
+    """Test cases for the MentionIndex class."""
+
+    def test_overlapping_and_nested_names(self):
+        """Test that names inside other names and overlapping occurrences are all found."""
+        index = MentionIndex(["Ann", "Anna", "Hannah", "nah", "Bob"])
+
+        assert index.mentions("Hannah waved.") == {"Hannah", "nah"}
+        assert index.mentions("Annah!") == {"Ann", "Anna", "nah"}
+        assert index.mentions("Nobody here.") == frozenset()
+
+    def test_matches_substring_semantics(self):
+        """Test that results agree with a plain substring check on random inputs."""
+        rng = random.Random(0)
+        alphabet = "abc "
+        for _ in range(200):
+            names = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 4))) for _ in range(rng.randint(1, 6))]
+            content = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+            index = MentionIndex(names)
+            assert index.mentions(content) == {name for name in names if name in content}
+
+    def test_index_is_shared_per_cast(self):
+        """Test that conversations with the same set of names share one index."""
+        assert get_mention_index(frozenset(["Ann", "Bob"])) is get_mention_index(frozenset(["Bob", "Ann"]))
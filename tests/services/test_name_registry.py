@@ -0,0 +1,46 @@
+"""
+Unit tests for the NameRegistry class.
+"""
+import pytest
+from app.services.name_registry import NameRegistry
+
+class TestNameRegistry:
+    """Test cases for the NameRegistry class."""
+
+    def test_add_and_contains(self):
+        """Test that added names are found regardless of case and surrounding whitespace."""
+        registry = NameRegistry()
+        assert registry.last() is None
+
+        registry.add("Elara")
+        registry.add("Thorne")
+
+        assert "Elara" in registry
+        assert "elara " in registry
+        assert "Zephyr" not in registry
+        assert registry.last() == "Thorne"
+        assert list(registry) == ["Elara", "Thorne"]
+
+    def test_capacity_evicts_oldest(self):
+        """Test that the registry stays at capacity and forgets the oldest names first."""
+        registry = NameRegistry(capacity=2)
+        registry.add("Elara")
+        registry.add("Elara")
+        registry.add("Thorne")
+
+        # One of the two "Elara"s was evicted; the other is still remembered
+        assert len(registry) == 2
+        assert "Elara" in registry
+
+        for i in range(1000):
+            registry.add(f"Name{i}")
+        assert len(registry) == 2
+        assert "Elara" not in registry
+        assert "Thorne" not in registry
+        assert list(registry) == ["Name998", "Name999"]
+        assert len(registry._counts) == 2
+
+    def test_invalid_capacity(self):
+        """Test that a registry must be able to hold at least one name."""
+        with pytest.raises(ValueError):
+            NameRegistry(capacity=0)
@@ -0,0 +1,231 @@
+"""
+Route-level tests for the FastAPI app, run against the fake completion backend.
+"""
+import asyncio
+import json
+import time
+from typing import List, Tuple
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from app.clients.circuit_breaker import CircuitOpenError
+from app.clients.fake_backend import FakeCompletionBackend
+from app.main import create_app
+
+@pytest.fixture
+def make_app(monkeypatch, tmp_path):
+    """Build the app with the fake backend, from a directory holding a stand-in front end build."""
+    (tmp_path / "app/frontend/build/static").mkdir(parents=True)
+    (tmp_path / "app/frontend/build/index.html").write_text("<html></html>")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("CHAI_API_BEARER_TOKEN", "dummy_api_key")
+    monkeypatch.setenv("CHAI_BACKEND", "fake")
+    monkeypatch.setenv("FAKE_BACKEND_LATENCY_SECONDS", "0")
+    monkeypatch.setenv("CHARACTER_POOL_SIZE", "0")
+
+    def make(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        return create_app()
+
+    return make
+
+
+@pytest.fixture
+def conversation_body(sample_conversation):
+    return {"conversation": sample_conversation.model_dump()}
+
+
+def _sse_events(text: str) -> List[Tuple[str, dict]]:
+    """Parse a text/event-stream body into (event, data) pairs."""
+    events = []
+    for raw_event in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in raw_event.split("\n"))
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+async def _circuit_open(*args, **kwargs):
+    raise CircuitOpenError("http://chai.test/chat", 5.0)
+
+
+class TestConversationRoutes:
+    """Test cases for the conversation routes."""
+
+    def test_stream_sends_turn_then_deltas_then_done(self, make_app, conversation_body):
+        """Test the SSE event order of /continueConversationStream, and that the deltas add up to the new turn."""
+        with TestClient(make_app()) as client:
+            response = client.post("/continueConversationStream", json=conversation_body)
+
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _sse_events(response.text)
+        names = [event for event, _ in events]
+        assert names[0] == "turn" and names[-1] == "done"
+        assert set(names[1:-1]) == {"delta"}
+
+        speaker = events[0][1]["participant"]
+        new_turn = events[-1][1]["dialogTurns"][-1]
+        assert new_turn["participant"] == speaker
+        assert new_turn["content"] == "".join(data["content"] for _, data in events[1:-1])
+
+    def test_autoplay_generates_the_requested_turns(self, make_app, conversation_body):
+        """Test that /autoplayConversation and its stream both append the requested number of turns."""
+        turn_count = len(conversation_body["conversation"]["dialogTurns"])
+        with TestClient(make_app()) as client:
+            response = client.post("/autoplayConversation", json={**conversation_body, "turns": 3})
+            stream = client.post("/autoplayConversationStream", json={**conversation_body, "turns": 3})
+
+        assert response.status_code == 200
+        assert len(response.json()["dialogTurns"]) == turn_count + 3
+
+        events = _sse_events(stream.text)
+        assert [event for event, _ in events] == ["turn"] * 3 + ["done"]
+        assert events[-1][1]["dialogTurns"][turn_count:] == [data for _, data in events[:3]]
+
+    def test_continue_conversation_appends_a_turn(self, make_app, conversation_body):
+        """Test that the compact body parser accepts a conversation and the response has one more turn."""
+        with TestClient(make_app()) as client:
+            response = client.post("/continueConversation", json=conversation_body)
+
+        assert response.status_code == 200
+        dialog_turns = response.json()["dialogTurns"]
+        assert dialog_turns[:-1] == conversation_body["conversation"]["dialogTurns"]
+        assert dialog_turns[-1]["participant"] in {"Seraphina Vale", "Thorne Blackwood"}
+        assert dialog_turns[-1]["content"]
+
+    @pytest.mark.parametrize("body", [b"not json", b'{"conversation": {"participants": []}}', b'{"conversation": {"participants": [], "dialogTurns": [{"participant": 1}]}}'])
+    def test_continue_conversation_rejects_malformed_bodies(self, make_app, body):
+        """Test that bodies which don't hold a valid conversation get a 422."""
+        with TestClient(make_app()) as client:
+            response = client.post("/continueConversation", content=body, headers={"Content-Type": "application/json"})
+        assert response.status_code == 422
+
+
+class TestSessionRoutes:
+    """Test cases for /continueSession and stored conversation turns."""
+
+    def test_session_delta_protocol(self, make_app, conversation_body):
+        """Test starting a session, sending a delta, and the 404/409 paths."""
+        with TestClient(make_app()) as client:
+            started = client.post("/continueSession", json=conversation_body).json()
+            session_id = started["sessionId"]
+            # The client already has the turns it sent, so only the generated one comes back
+            assert started["offset"] == len(conversation_body["conversation"]["dialogTurns"])
+            assert started["turnCount"] == started["offset"] + 1
+
+            new_turn = {"participant": "Stranger", "content": "Tell me more."}
+            delta = client.post("/continueSession", json={"sessionId": session_id, "knownTurnCount": started["turnCount"], "newDialogTurns": [new_turn]})
+            assert delta.status_code == 200
+            # Likewise for the turn it just sent
+            assert delta.json()["offset"] == started["turnCount"] + 1
+            assert len(delta.json()["dialogTurns"]) == 1
+            assert delta.json()["turnCount"] == started["turnCount"] + 2
+
+            conflict = client.post("/continueSession", json={"sessionId": session_id, "knownTurnCount": 1, "newDialogTurns": []})
+            assert conflict.status_code == 409
+            missing = client.post("/continueSession", json={"sessionId": "expired", "newDialogTurns": [new_turn]})
+            assert missing.status_code == 404
+
+    def test_stored_turns_are_paged_backwards(self, make_app, conversation_body, tmp_path):
+        """Test that a session's conversation is stored in the background and read back a page at a time."""
+        app = make_app(CONVERSATION_DB_PATH=tmp_path / "conversations.sqlite3", CONVERSATION_STORE_FLUSH_SECONDS=0.01)
+        with TestClient(app) as client:
+            started = client.post("/continueSession", json=conversation_body).json()
+            session_id = started["sessionId"]
+            new_turn = {"participant": "Stranger", "content": "Tell me more."}
+            delta = client.post("/continueSession", json={"sessionId": session_id, "knownTurnCount": started["turnCount"], "newDialogTurns": [new_turn]})
+            turn_count = delta.json()["turnCount"]
+
+            for _ in range(100):
+                page = client.get(f"/conversations/{session_id}/turns", params={"limit": 2})
+                if page.status_code == 200 and page.json()["turnCount"] == turn_count:
+                    break
+                time.sleep(0.01)
+            assert page.json()["nextBefore"] == turn_count - 2
+            assert [turn["ordinal"] for turn in page.json()["dialogTurns"]] == [turn_count - 2, turn_count - 1]
+            assert client.get("/conversations/unknown/turns").status_code == 404
+
+    def test_turns_route_is_404_without_a_store(self, make_app):
+        """Test that stored turns can't be read when CONVERSATION_DB_PATH isn't set."""
+        with TestClient(make_app()) as client:
+            assert client.get("/conversations/anything/turns").status_code == 404
+
+
+class TestUpstreamFailureRoutes:
+    """Test cases for mapping upstream failures to 503 and 504 responses."""
+
+    def test_deadline_maps_to_504(self, make_app, conversation_body):
+        """Test that running out of time gives a 504, and an error event on streaming routes."""
+        app = make_app(FAKE_BACKEND_LATENCY_SECONDS=1.0, REQUEST_DEADLINE_SECONDS=0.05)
+        with TestClient(app) as client:
+            response = client.post("/continueConversation", json=conversation_body)
+            stream = client.post("/continueConversationStream", json=conversation_body)
+
+        assert response.status_code == 504
+        assert _sse_events(stream.text)[-1] == ("error", {"detail": "Timed out waiting for the CHAI API"})
+
+    def test_open_circuit_maps_to_503(self, make_app, conversation_body, monkeypatch):
+        """Test that an open circuit gives a 503 with Retry-After."""
+        monkeypatch.setattr(FakeCompletionBackend, "invoke_llm", _circuit_open)
+        with TestClient(make_app()) as client:
+            response = client.post("/continueConversation", json=conversation_body)
+            autoplay = client.post("/autoplayConversation", json={**conversation_body, "turns": 2})
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "5"
+        assert autoplay.status_code == 503
+
+
+class TestMetricsRoute:
+    """Test cases for the /metrics route."""
+
+    def test_metrics_are_rendered_in_the_prometheus_format(self, make_app, conversation_body):
+        """Test that /metrics serves the app's metrics, including live gauges, as Prometheus text."""
+        with TestClient(make_app()) as client:
+            client.post("/continueConversation", json=conversation_body)
+            response = client.get("/metrics")
+
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'http_request_duration_seconds_count{method="POST",route="/continueConversation",status="200"}' in response.text
+        assert "chai_requests_in_flight 0.0" in response.text
+
+
+class TestAdmissionRoutes:
+    """Test cases for admission control of the routes."""
+
+    def test_full_admission_queue_maps_to_503(self, make_app, conversation_body):
+        """Test that a request arriving while the route is full and has no queue gets a 503."""
+        app = make_app(FAKE_BACKEND_LATENCY_SECONDS=0.2, ADMISSION_CONVERSATION_MAX_CONCURRENCY=1, ADMISSION_CONVERSATION_MAX_QUEUE=0)
+
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                return await asyncio.gather(
+                    client.post("/continueConversation", json=conversation_body),
+                    client.post("/continueConversation", json=conversation_body),
+                )
+
+        first, rejected = asyncio.run(run())
+        assert first.status_code == 200
+        assert rejected.status_code == 503
+        assert "retry-after" in rejected.headers
+
+    @pytest.mark.asyncio
+    async def test_queue_wait_counts_against_request_deadline(self, make_app, conversation_body):
+        """Test that a request which waited in the admission queue only gets what is left of its deadline."""
+        app = make_app(
+            FAKE_BACKEND_LATENCY_SECONDS=0.4,
+            REQUEST_DEADLINE_SECONDS=0.5,
+            ADMISSION_CONVERSATION_MAX_CONCURRENCY=1,
+        )
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            start = time.monotonic()
+            first, queued = await asyncio.gather(
+                client.post("/continueConversation", json=conversation_body),
+                client.post("/continueConversation", json=conversation_body),
+            )
+            elapsed = time.monotonic() - start
+
+        assert first.status_code == 200
+        # Admitted after ~0.4s with ~0.1s of its 0.5s budget left, too little for a 0.4s call
+        assert queued.status_code == 504
+        assert elapsed < 0.7
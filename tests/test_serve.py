@@ -0,0 +1,45 @@
+"""
+Unit tests for the multi-worker serving entrypoint.
+"""
+import os
+import sqlite3
+import sys
+from app import serve
+
+class TestServe:
+    """Test cases for app.serve."""
+
+    def test_temporary_rate_limiter_state_is_removed_on_exit(self, monkeypatch, tmp_path):
+        """Test that the rate limiter state file created for several workers is deleted, with its WAL files, when the server exits."""
+        monkeypatch.delenv("CHAI_RATE_LIMIT_STATE_PATH", raising=False)
+        monkeypatch.setattr(serve, "load_dotenv", lambda: None)
+        monkeypatch.setattr(serve.tempfile, "gettempdir", lambda: str(tmp_path))
+        monkeypatch.setattr(sys, "argv", ["serve", "--workers", "2"])
+        created = []
+
+        def run(*args, **kwargs):
+            # Stands in for the workers, which leave the WAL files behind while connected
+            state_path = os.environ["CHAI_RATE_LIMIT_STATE_PATH"]
+            connection = sqlite3.connect(state_path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE state (value INTEGER)")
+            created.extend(os.listdir(tmp_path))
+            connection.close()
+
+        monkeypatch.setattr(serve.uvicorn, "run", run)
+        serve.main()
+
+        assert created
+        assert os.listdir(tmp_path) == []
+
+    def test_configured_rate_limiter_state_is_kept(self, monkeypatch, tmp_path):
+        """Test that a state file given through CHAI_RATE_LIMIT_STATE_PATH is left in place."""
+        state_path = tmp_path / "limiter.sqlite3"
+        state_path.write_bytes(b"")
+        monkeypatch.setenv("CHAI_RATE_LIMIT_STATE_PATH", str(state_path))
+        monkeypatch.setattr(serve, "load_dotenv", lambda: None)
+        monkeypatch.setattr(sys, "argv", ["serve", "--workers", "2"])
+        monkeypatch.setattr(serve.uvicorn, "run", lambda *args, **kwargs: None)
+
+        serve.main()
+        assert state_path.exists()
@@ -0,0 +1,103 @@
+"""
+Unit tests for admission control.
+"""
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+from app.utils.admission import AdmissionControlMiddleware, AdmissionController, AdmissionRejectedError
+
+class TestAdmissionController:
+    """Test cases for the AdmissionController class."""
+
+    @pytest.mark.asyncio
+    async def test_queues_up_to_the_limit_then_rejects(self):
+        """Test that requests beyond the concurrency wait in the queue, and are rejected once it is full."""
+        controller = AdmissionController("/route", max_concurrency=1, max_queue=1, deadline_seconds=10.0)
+        await controller.acquire()
+        queued = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        assert controller.queued == 1
+
+        with pytest.raises(AdmissionRejectedError) as rejection:
+            await controller.acquire()
+        assert rejection.value.reason == "queue_full"
+        assert rejection.value.retry_after >= 1
+
+        controller.release(0.5)
+        await queued
+        assert controller.in_flight == 1
+        assert controller.queued == 0
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_estimated_wait_exceeds_deadline(self):
+        """Test that a request is turned away up front when recent durations say it would wait too long."""
+        controller = AdmissionController("/route", max_concurrency=2, max_queue=10, deadline_seconds=5.0)
+        await controller.acquire()
+        controller.release(8.0)
+        await controller.acquire()
+        await controller.acquire()
+
+        assert controller.estimated_wait() == pytest.approx(4.0)
+        queued = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+
+        # One request ahead of it: (1 + 1) / 2 slots * 8s = 8s > 5s
+        with pytest.raises(AdmissionRejectedError) as rejection:
+            await controller.acquire()
+        assert rejection.value.reason == "deadline"
+        assert rejection.value.retry_after == pytest.approx(8.0)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        assert controller.queued == 0
+
+    @pytest.mark.asyncio
+    async def test_queued_request_gives_up_at_deadline(self):
+        """Test that a queued request is rejected when the deadline passes and leaves the queue."""
+        controller = AdmissionController("/route", max_concurrency=1, max_queue=1, deadline_seconds=0.01)
+        await controller.acquire()
+        with pytest.raises(AdmissionRejectedError) as rejection:
+            await controller.acquire()
+        assert rejection.value.reason == "deadline"
+        assert controller.queued == 0
+
+        controller.release()
+        assert controller.in_flight == 0
+
+
+class TestAdmissionControlMiddleware:
+    """Test cases for the AdmissionControlMiddleware class."""
+
+    @pytest.mark.asyncio
+    async def test_overloaded_route_returns_503_with_retry_after(self):
+        """Test that requests over a route's limits get a 503, while other routes are unaffected."""
+        release = asyncio.Event()
+        app = FastAPI()
+
+        @app.post("/slow")
+        async def slow():
+            await release.wait()
+            return {"ok": True}
+
+        @app.post("/other")
+        async def other():
+            return {"ok": True}
+
+        controller = AdmissionController("/slow", max_concurrency=1, max_queue=0, deadline_seconds=10.0)
+        app.add_middleware(AdmissionControlMiddleware, controllers={"/slow": controller})
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            first = asyncio.create_task(client.post("/slow"))
+            while controller.in_flight == 0:
+                await asyncio.sleep(0)
+
+            rejected = await client.post("/slow")
+            assert rejected.status_code == 503
+            assert rejected.headers["retry-after"] == "1"
+            assert (await client.post("/other")).status_code == 200
+
+            release.set()
+            assert (await first).status_code == 200
+        assert controller.in_flight == 0
+        assert controller.average_duration is not None
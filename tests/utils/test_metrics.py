@@ -0,0 +1,37 @@
+"""
+Unit tests for the app's metrics and the metrics middleware.
+"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.utils.metrics import CHAI_LLM_DURATION_SECONDS, REGISTRY, MetricsMiddleware, generate_latest
+
+class TestMetrics:
+    """Test cases for the metrics middleware and the rendered metrics."""
+
+    def test_middleware_labels_by_route_template(self):
+        """Test that the middleware records requests under their route's path template."""
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.post("/echo/{item}")
+        async def echo(item: str):
+            return {"item": item}
+
+        client = TestClient(app)
+        client.post("/echo/one", content=b"12345")
+        client.post("/echo/two")
+        client.get("/missing")
+
+        text = generate_latest(REGISTRY).decode()
+        assert 'http_request_duration_seconds_count{method="POST",route="/echo/{item}",status="200"} 2.0' in text
+        assert 'http_request_duration_seconds_count{method="GET",route="unmatched",status="404"}' in text
+        assert 'http_request_size_bytes_sum{route="/echo/{item}"} 5.0' in text
+
+    def test_latency_buckets_reach_past_ten_seconds(self):
+        """Test that latency histograms use the app's buckets rather than the library's, which stop at 10s."""
+        CHAI_LLM_DURATION_SECONDS.labels("dialogue", "bucket_test").observe(30)
+
+        text = generate_latest(REGISTRY).decode()
+        assert 'chai_llm_duration_seconds_bucket{call_site="dialogue",le="20.0",outcome="bucket_test"} 0.0' in text
+        assert 'chai_llm_duration_seconds_bucket{call_site="dialogue",le="60.0",outcome="bucket_test"} 1.0' in text
+        assert "_created" not in text
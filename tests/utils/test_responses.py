@@ -0,0 +1,48 @@
+"""
+Unit tests for PydanticJSONResponse.
+"""
+import json
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from fastapi.testclient import TestClient
+from typing import List
+from app.schemas import Conversation, DialogTurn, Participant
+from app.utils.responses import PydanticJSONResponse
+
+def build_conversation() -> Conversation:
+    return Conversation(
+        participants=[Participant(type="AI", name="Zoë", backstory="Keeps a lighthouse.")],
+        dialogTurns=[DialogTurn(participant="Zoë", content='She said "hi"\nand left.')],
+    )
+
+
+class TestPydanticJSONResponse:
+    """Test cases for the PydanticJSONResponse class."""
+
+    def test_renders_models_like_the_default_encoder(self):
+        """Test that models and lists of models render to the same JSON as jsonable_encoder."""
+        conversation = build_conversation()
+
+        assert json.loads(PydanticJSONResponse(conversation).body) == jsonable_encoder(conversation)
+        participants = conversation.participants * 2
+        assert json.loads(PydanticJSONResponse(participants).body) == jsonable_encoder(participants)
+        assert json.loads(PydanticJSONResponse({"detail": "x"}).body) == {"detail": "x"}
+
+    def test_route_keeps_response_model_schema(self):
+        """Test that a route returning the response directly still documents its response model."""
+        app = FastAPI()
+
+        @app.post("/participants", response_model=List[Participant])
+        async def participants() -> Response:
+            return PydanticJSONResponse(build_conversation().participants)
+
+        client = TestClient(app)
+        response = client.post("/participants")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json()[0]["name"] == "Zoë"
+
+        schema = client.get("/openapi.json").json()
+        response_schema = schema["paths"]["/participants"]["post"]["responses"]["200"]["content"]["application/json"]["schema"]
+        assert response_schema["items"]["$ref"].endswith("/Participant")
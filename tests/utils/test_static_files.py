@@ -0,0 +1,89 @@
+"""
+Unit tests for the precompressed static file serving.
+"""
+import gzip
+import os
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from app.utils.static_files import IMMUTABLE_CACHE_CONTROL, InMemoryPage, PrecompressedStaticFiles, choose_encoding
+
+BUNDLE = "console.log('playground');\n" * 100
+
+def build_app(tmp_path) -> TestClient:
+    static_dir = tmp_path / "static"
+    (static_dir / "js").mkdir(parents=True)
+    (static_dir / "js" / "main.3f2a1b9c.js").write_text(BUNDLE)
+    (static_dir / "manifest.json").write_text("{}")
+    index_path = tmp_path / "index.html"
+    index_path.write_text("<html><body>" + "<div></div>" * 100 + "</body></html>")
+
+    app = FastAPI()
+    app.mount("/static", PrecompressedStaticFiles(directory=str(static_dir)), name="static")
+    index_page = InMemoryPage(str(index_path))
+
+    @app.get("/")
+    def serve_root(request: Request):
+        return index_page.response(request)
+
+    return TestClient(app)
+
+
+class TestStaticFiles:
+    """Test cases for PrecompressedStaticFiles and InMemoryPage."""
+
+    def test_choose_encoding(self):
+        """Test that the first available encoding the client accepts is chosen."""
+        assert choose_encoding("gzip, deflate, br", ["br", "gzip"]) == "br"
+        assert choose_encoding("gzip, br;q=0", ["br", "gzip"]) == "gzip"
+        assert choose_encoding("identity", ["br", "gzip"]) is None
+        assert choose_encoding("", ["gzip"]) is None
+
+    def test_choose_encoding_explicit_refusal_beats_wildcard(self):
+        """Test that an encoding refused with q=0 stays refused even when "*" accepts everything else."""
+        assert choose_encoding("br;q=0, *", ["br", "gzip"]) == "gzip"
+        assert choose_encoding("*, br;q=0, gzip;q=0", ["br", "gzip"]) is None
+        assert choose_encoding("*", ["br", "gzip"]) == "br"
+        assert choose_encoding("*;q=0, gzip", ["br", "gzip"]) == "gzip"
+
+    def test_serves_generated_gzip_variant_with_immutable_caching(self, tmp_path):
+        """Test that a hashed asset gets a .gz variant at startup and is served from it."""
+        client = build_app(tmp_path)
+        assert os.path.exists(tmp_path / "static" / "js" / "main.3f2a1b9c.js.gz")
+
+        response = client.get("/static/js/main.3f2a1b9c.js", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.text == BUNDLE
+        assert int(response.headers["content-length"]) < len(BUNDLE)
+
+        identity = client.get("/static/js/main.3f2a1b9c.js", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in identity.headers
+        assert identity.content == BUNDLE.encode()
+        assert identity.headers["etag"] != response.headers["etag"]
+
+    def test_etag_revalidation(self, tmp_path):
+        """Test that a matching If-None-Match gets a 304, and unhashed files must revalidate."""
+        client = build_app(tmp_path)
+        response = client.get("/static/manifest.json")
+        assert response.headers["cache-control"] == "no-cache"
+        assert "content-encoding" not in response.headers  # too small to compress
+
+        not_modified = client.get("/static/manifest.json", headers={"If-None-Match": response.headers["etag"]})
+        assert not_modified.status_code == 304
+        assert client.get("/static/missing.js").status_code == 404
+
+    def test_index_page_served_from_memory(self, tmp_path):
+        """Test that index.html is served compressed from memory, even after the file is gone."""
+        client = build_app(tmp_path)
+        os.remove(tmp_path / "index.html")
+
+        response = client.get("/", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["content-type"].startswith("text/html")
+        assert response.text.startswith("<html>")
+
+        not_modified = client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]})
+        assert not_modified.status_code == 304
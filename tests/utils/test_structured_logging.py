@@ -0,0 +1,63 @@
+"""
+Unit tests for the queue-based structured logging.
+"""
+import io
+import json
+import logging
+import sys
+from app.utils.structured_logging import JSONFormatter, setup_logging, truncate_for_log
+
+class TestStructuredLogging:
+    """Test cases for truncate_for_log, JSONFormatter and setup_logging."""
+
+    def test_truncate_for_log_bounds_strings_and_lists(self):
+        """Test that long strings are cut and long lists keep only their head and tail."""
+        assert truncate_for_log("short", max_chars=10) == "short"
+        assert truncate_for_log("x" * 25, max_chars=10) == "x" * 10 + "... (15 more chars)"
+
+        history = [{"sender": "A", "message": str(i)} for i in range(100)]
+        truncated = truncate_for_log(history, max_items=4)
+        assert truncated[:2] == history[:2]
+        assert truncated[2] == "... (96 more items)"
+        assert truncated[3:] == history[-2:]
+
+    def test_json_formatter_includes_extra_fields(self):
+        """Test that extra fields become JSON keys and the exception is kept apart from the message."""
+        record = logging.LogRecord("app.test", logging.ERROR, __file__, 1, "Failed %s", ("call",), None)
+        record.call_site = "dialogue"
+        record.payload = {"prompt": "p" * 50}
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record.exc_info = sys.exc_info()
+
+        entry = json.loads(JSONFormatter(max_field_chars=20).format(record))
+        assert entry["message"] == "Failed call"
+        assert entry["level"] == "ERROR"
+        assert entry["logger"] == "app.test"
+        assert entry["call_site"] == "dialogue"
+        assert entry["payload"] == {"prompt": "p" * 20 + "... (30 more chars)"}
+        assert "ValueError: boom" in entry["exception"]
+
+    def test_setup_logging_writes_from_background_thread(self, monkeypatch):
+        """Test that records go through the queue and are written as JSON lines by the listener."""
+        stream = io.StringIO()
+        monkeypatch.setattr("sys.stderr", stream)
+        root = logging.getLogger()
+        previous_handlers, previous_level = root.handlers[:], root.level
+
+        listener = setup_logging(level="DEBUG")
+        try:
+            logging.getLogger("app.test").debug("Chat history", extra={"chat_history_turns": 3})
+            args = [1]
+            logging.getLogger("app.test").info("args %s", args)
+            args.append(2)  # mutated after the call; the logged message must not change
+        finally:
+            listener.stop()
+            root.handlers[:] = previous_handlers
+            root.setLevel(previous_level)
+
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert lines[0]["message"] == "Chat history"
+        assert lines[0]["chat_history_turns"] == 3
+        assert lines[1]["message"] == "args [1]"